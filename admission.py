@@ -0,0 +1,131 @@
+"""
+Hava durumu endpoint'leri için kabul kontrolü (admission control).
+
+Trafik sıçramalarında threaded Flask sunucusu her bağlantıyı kabul eder;
+upstream'i bekleyen iş parçacıkları birikir ve sonunda tüm istekler zaman
+aşımına uğrar. AdmissionController yalnızca upstream'e giden çağrıları
+sınırlar:
+
+- aynı anda en fazla ADMISSION_MAX_IN_FLIGHT upstream çağrısı yapılır,
+- fazlası en fazla ADMISSION_MAX_QUEUE uzunluğunda bir kuyrukta
+  ADMISSION_QUEUE_TIMEOUT saniyeye kadar bekler,
+- kuyruk doluysa ya da bekleme süresi dolarsa istek AdmissionRejected ile
+  hemen reddedilir (çağıran Retry-After başlıklı 503 döner ya da eldeki
+  bayat veriyi sunar).
+
+Önbellekten yanıtlanan istekler, /health ve /api/v1/ bu kontrole hiç
+girmez. Arka plan yenilemeleri kuyrukta beklemez; boş yer yoksa atlanır.
+"""
+
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Kabul kontrolü konfigürasyonu (ortam değişkenlerinden)
+ADMISSION_MAX_IN_FLIGHT = int(os.getenv('ADMISSION_MAX_IN_FLIGHT', 50))
+ADMISSION_MAX_QUEUE = int(os.getenv('ADMISSION_MAX_QUEUE', 100))
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv('ADMISSION_QUEUE_TIMEOUT', 2))
+
+
+class AdmissionRejected(Exception):
+    """Upstream çağrısı kapasite dolu olduğu için kabul edilmedi"""
+
+    def __init__(self, retry_after, reason):
+        super().__init__(f"İstek kabul edilmedi ({reason}), {retry_after}s sonra tekrar deneyin")
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+class AdmissionController:
+    """Eşzamanlı upstream çağrılarını sınırlayan, süreli kuyruklu kabul kontrolü"""
+
+    def __init__(self, max_in_flight=ADMISSION_MAX_IN_FLIGHT, max_queue=ADMISSION_MAX_QUEUE,
+                 queue_timeout=ADMISSION_QUEUE_TIMEOUT):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+
+        self._cond = threading.Condition()
+        self.in_flight = 0
+        self.queued = 0
+        # Bir çağrının slotu ortalama ne kadar tuttuğu (üstel hareketli ortalama)
+        self._avg_hold = 0.1
+
+        self.admitted = 0
+        self.waited = 0
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+        self.rejected_background = 0
+
+    def retry_after(self):
+        """Kuyruğun boşalması için tahmini süre (tam saniye, en az 1)"""
+        return max(1, math.ceil(self._avg_hold * (self.queued + 1) / max(1, self.max_in_flight)))
+
+    def acquire(self, background=False):
+        """Slot al; kapasite ve kuyruk doluysa ya da bekleme süresi dolarsa AdmissionRejected"""
+        with self._cond:
+            if self.in_flight < self.max_in_flight:
+                self.in_flight += 1
+                self.admitted += 1
+                return
+            if background:
+                self.rejected_background += 1
+                raise AdmissionRejected(self.retry_after(), 'background')
+            if self.queued >= self.max_queue:
+                self.rejected_queue_full += 1
+                raise AdmissionRejected(self.retry_after(), 'queue_full')
+
+            self.queued += 1
+            self.waited += 1
+            deadline = time.monotonic() + self.queue_timeout
+            try:
+                while self.in_flight >= self.max_in_flight:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.rejected_timeout += 1
+                        raise AdmissionRejected(self.retry_after(), 'queue_timeout')
+                    self._cond.wait(remaining)
+                self.in_flight += 1
+                self.admitted += 1
+            finally:
+                self.queued -= 1
+
+    def release(self, held):
+        """Slotu bırak ve kuyrukta bekleyen bir isteği uyandır"""
+        with self._cond:
+            self.in_flight -= 1
+            self._avg_hold = 0.9 * self._avg_hold + 0.1 * held
+            self._cond.notify()
+
+    @contextmanager
+    def slot(self, background=False):
+        """`with admission.slot():` bloğunu bir upstream slotu tutarak çalıştır"""
+        self.acquire(background)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(time.monotonic() - started)
+
+    def stats(self):
+        """Kabul kontrolü sayaçlarını döndür"""
+        with self._cond:
+            return {
+                'in_flight': self.in_flight,
+                'queued': self.queued,
+                'max_in_flight': self.max_in_flight,
+                'max_queue': self.max_queue,
+                'queue_timeout': self.queue_timeout,
+                'avg_hold_ms': round(self._avg_hold * 1000, 1),
+                'admitted': self.admitted,
+                'waited': self.waited,
+                'rejected_queue_full': self.rejected_queue_full,
+                'rejected_timeout': self.rejected_timeout,
+                'rejected_background': self.rejected_background
+            }
+
+
+# Weather endpoint'lerinin upstream çağrılarını sınırlayan paylaşılan kontrol
+weather_admission = AdmissionController()
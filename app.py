@@ -1,11 +1,18 @@
+import math
 import os
-import requests
 from flask import Flask, request, jsonify
 from dotenv import load_dotenv
 
-# Ortam değişkenlerini yükle
+# Ortam değişkenlerini yükle (yerel modüller ayarlarını import sırasında okur)
 load_dotenv()
 
+from weather_cache import weather_cache, negative_cache
+from singleflight import weather_singleflight
+from upstream import upstream_client
+from quota import upstream_quota
+from conditional import public
+from weather_service import WeatherError, INVALID_KEY_MESSAGE, weather_service
+
 app = Flask(__name__)
 
 # API anahtarını güvenli şekilde al
@@ -46,80 +53,24 @@ def get_weather():
             "error": "Şehir ismi en az 2 karakter olmalıdır."
         }), 400
 
+    # Önbellek, istek birleştirme ve upstream çağrısı paylaşılan servis hattında yapılır
     try:
-        # OpenWeather API'ye istek gönder
-        url = f"http://api.openweathermap.org/data/2.5/weather"
-        params = {
-            'q': city,
-            'appid': API_KEY,
-            'units': 'metric',  # Celsius için
-            'lang': 'tr'        # Türkçe açıklamalar için
-        }
-
-        response = requests.get(url, params=params, timeout=10)
-
-        # API yanıt kontrolü
-        if response.status_code == 404:
-            return jsonify({
-                "error": f"'{city}' şehri bulunamadı. Lütfen şehir ismini kontrol edin."
-            }), 404
-        elif response.status_code == 401:
-            return jsonify({
-                "error": "API anahtarı geçersiz."
-            }), 401
-        elif response.status_code != 200:
-            return jsonify({
-                "error": f"Hava durumu servisi hatası: {response.status_code}"
-            }), 500
-
-        # JSON verisini çözümle
-        data = response.json()
-
-        # Hava durumu bilgilerini çıkar
-        weather_desc = data['weather'][0]['description'].title()
-        temp = round(data['main']['temp'])
-        humidity = data['main']['humidity']
-        wind_speed = round(data['wind']['speed'] * 3.6, 1)  # m/s'den km/h'ye çevir
-        feels_like = round(data['main']['feels_like'])
-
-        # Şehir ismini düzelt (API'den gelen doğru isim)
-        city_name = data['name']
-        country = data['sys']['country']
-
-        # Türkçe yanıt oluştur
-        message = (f"{city_name} ({country})'da hava sıcaklığı {temp}°C "
-                  f"(hissedilen {feels_like}°C), nem oranı %{humidity}, "
-                  f"rüzgar hızı {wind_speed} km/h ve hava durumu: {weather_desc}.")
-
-        result = {
-            "success": True,
-            "city": city_name,
-            "country": country,
-            "message": message,
-            "details": {
-                "temperature": temp,
-                "feels_like": feels_like,
-                "humidity": humidity,
-                "wind_speed_kmh": wind_speed,
-                "description": weather_desc,
-                "icon": data['weather'][0]['icon']
-            }
-        }
-
-        return jsonify(result)
-
-    except requests.exceptions.Timeout:
-        return jsonify({
-            "error": "Hava durumu servisi yanıt vermiyor. Lütfen daha sonra tekrar deneyin."
-        }), 504
-    except requests.exceptions.ConnectionError:
-        return jsonify({
-            "error": "İnternet bağlantısı sorunu. Lütfen bağlantınızı kontrol edin."
-        }), 503
-    except Exception as e:
-        return jsonify({
-            "error": f"Beklenmeyen bir hata oluştu: {str(e)}"
-        }), 500
+        result = weather_service.get(city)
+    except WeatherError as e:
+        return weather_error_response(e)
+    return jsonify(public(result))
+
+def weather_error_response(error):
+    """Servis hattı hatasını bu uygulamanın yanıt biçimine çevir
+
+    Geçersiz API anahtarı bu uygulamada tarihsel olarak 401 döner; kota, devre
+    kesici ve aşırı yük 503'leri Retry-After başlığıyla gönderilir.
+    """
+    status = 401 if error.message == INVALID_KEY_MESSAGE else error.status
+    headers = {}
+    if error.retry_after is not None:
+        headers['Retry-After'] = str(max(1, math.ceil(error.retry_after)))
+    return jsonify({"error": error.message}), status, headers
 
 @app.route('/weather/<city>', methods=['GET'])
 def get_weather_by_path(city):
@@ -132,11 +83,22 @@ def get_weather_by_path(city):
     # Ana weather fonksiyonunu çağır
     return get_weather()
 
+@app.route('/stats', methods=['GET'])
+def stats():
+    """Önbellek, istek birleştirme ve upstream istatistikleri"""
+    return jsonify({
+        "cache": weather_cache.stats(),
+        "negative_cache": negative_cache.stats(),
+        "coalescing": weather_singleflight.stats(),
+        "upstream": upstream_client.stats(),
+        "quota": upstream_quota.stats()
+    })
+
 @app.errorhandler(404)
 def not_found(error):
     return jsonify({
         "error": "Endpoint bulunamadı.",
-        "available_endpoints": ["/", "/weather", "/weather/<city>"]
+        "available_endpoints": ["/", "/weather", "/weather/<city>", "/stats"]
     }), 404
 
 @app.errorhandler(500)
@@ -0,0 +1,931 @@
+"""
+Hava Durumu API'sinin asyncio tabanlı (ASGI) sunum modu.
+
+app_swagger_fixed.py ile aynı route'ları, yanıt modellerini ve Türkçe hata
+mesajlarını sunar; ancak OpenWeather çağrıları engellemeyen bir HTTP
+istemcisiyle (aiohttp) yapılır. Böylece bir istek upstream
+yanıtını beklerken bir iş parçacığı tutmaz ve tek süreç binlerce eşzamanlı
+sorguyu taşıyabilir.
+
+Servis hattının (weather_service.py) doğrulama, hata eşleme ve dönüştürme
+aşamaları ile önbellek, negatif önbellek, takma ad dizini ve şehir ID
+çözümleyici Flask uygulamasıyla paylaşılır. Swagger UI Flask uygulamasında kalır; bu
+mod aynı modellerden üretilen /api/v1/swagger.json dosyasını sunar.
+
+Çalıştırma:
+    uvicorn app_async:app --host 0.0.0.0 --port 5001
+    python benchmark.py --targets flask,async   # threaded Flask ile karşılaştırma
+"""
+
+import asyncio
+import collections
+import json
+import math
+import os
+import time
+from contextlib import asynccontextmanager
+from urllib.parse import parse_qs
+
+import aiohttp
+from dotenv import load_dotenv
+
+# Ortam değişkenlerini yükle (yerel modüller ayarlarını import sırasında okur)
+load_dotenv()
+
+import app_swagger_fixed as flask_app_module
+from app_swagger_fixed import (BATCH_MAX_CITIES, BATCH_MAX_WORKERS, BATCH_TIMEOUT, admission_metrics,
+                               hedge_metrics)
+from weather_cache import weather_cache, negative_cache, make_key
+from city_names import alias_index
+from city_resolver import city_resolver, chunked
+from upstream import (OPENWEATHER_BASE_URL, UPSTREAM_KEEP_ALIVE, UPSTREAM_CONNECT_TIMEOUT,
+                      UPSTREAM_READ_TIMEOUT, UPSTREAM_MAX_RETRIES, UPSTREAM_BACKOFF, RETRY_STATUSES,
+                      parse_retry_after)
+from quota import upstream_quota, QuotaExceededError
+from circuit_breaker import upstream_breaker, CircuitOpenError
+from hedging import HedgePolicy
+from admission import AdmissionController, AdmissionRejected
+from metrics import metrics, CONTENT_TYPE
+from fixtures import upstream_fixtures, fixture_key
+from conditional import public, validator_headers, not_modified
+from serialization import serialized_body
+from compression import negotiate, encode_body, encode_not_modified
+from weather_service import (WeatherService, WeatherError, INVALID_CITY_MESSAGE, TIMEOUT_MESSAGE,
+                             clean_city, cell_key, upstream_params, map_exception, clean_forecast_query,
+                             build_forecast_response)
+from forecast import forecast_cache, load_value
+from cache_warmer import CacheWarmer, WARMER_ENABLED, WARMER_CITIES, parse_city_list
+from city_locator import city_locator
+
+# Async mod iş parçacığı tutmadığı için binlerce eşzamanlı upstream bağlantısı açabilir
+ASYNC_POOL_SIZE = int(os.getenv('ASYNC_POOL_SIZE', 1000))
+# Eşzamanlı upstream çağrısı sınırı (varsayılan bağlantı havuzu boyutu)
+ASYNC_ADMISSION_MAX_IN_FLIGHT = int(os.getenv('ASYNC_ADMISSION_MAX_IN_FLIGHT', ASYNC_POOL_SIZE))
+
+
+class UpstreamResponse:
+    """Gövdesi okunmuş upstream yanıtı (requests.Response ile aynı alanlar)"""
+
+    def __init__(self, status_code, body, headers=None):
+        self.status_code = status_code
+        self.body = body
+        self.headers = headers or {}
+
+    def json(self):
+        return json.loads(self.body)
+
+
+class AsyncOpenWeatherClient:
+    """aiohttp üzerine kurulu, engellemeyen OpenWeather istemcisi"""
+
+    def __init__(self, base_url=OPENWEATHER_BASE_URL, pool_size=ASYNC_POOL_SIZE,
+                 keep_alive=UPSTREAM_KEEP_ALIVE, connect_timeout=UPSTREAM_CONNECT_TIMEOUT,
+                 read_timeout=UPSTREAM_READ_TIMEOUT, max_retries=UPSTREAM_MAX_RETRIES,
+                 backoff=UPSTREAM_BACKOFF, quota=upstream_quota, breaker=upstream_breaker,
+                 fixtures=upstream_fixtures):
+        self.base_url = base_url.rstrip('/')
+        self.pool_size = pool_size
+        self.keep_alive = keep_alive
+        self.quota = quota
+        self.breaker = breaker
+        self.fixtures = fixtures
+        self.policy = HedgePolicy(read_timeout)
+        self.timeout = aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.in_flight = 0
+        self._session = None
+
+    @property
+    def session(self):
+        # Oturum, çalışan event loop içinde ilk kullanımda oluşturulur
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                timeout=self.timeout,
+                connector=aiohttp.TCPConnector(limit=self.pool_size, force_close=not self.keep_alive)
+            )
+        return self._session
+
+    async def get(self, endpoint, params=None, background=False):
+        """Endpoint'e GET isteği gönder; geçici hatalarda backoff ile yeniden dene
+
+        Zaman aşımında asyncio.TimeoutError, bağlantı hatalarında
+        aiohttp.ClientError çağırana iletilir. Devre açıksa CircuitOpenError,
+        kota bütçesi yoksa QuotaExceededError istek gönderilmeden yükselir.
+        İstek gözlenen p95'i aşarsa (hedge bütçesi izin veriyorsa) ikinci bir
+        istek gönderilir; önce gelen yanıt kullanılır, diğeri iptal edilir.
+        """
+        self._admit(background)
+        timeout = aiohttp.ClientTimeout(sock_connect=self.timeout.sock_connect,
+                                        sock_read=self.policy.read_timeout())
+
+        started = time.monotonic()
+        hedge_after = self.policy.hedge_delay()
+        if hedge_after is None:
+            result = await self._send(endpoint, params, timeout, background)
+        else:
+            result = await self._send_hedged(endpoint, params, timeout, hedge_after, background)
+        self.policy.effective_latency.record(time.monotonic() - started)
+        return result
+
+    def _admit(self, background):
+        """Devre kesici ve kota kontrolü; izin yoksa istek gönderilmeden hata yükselir"""
+        if self.breaker is not None:
+            self.breaker.before_call()
+        if self.quota is not None:
+            try:
+                self.quota.acquire(background=background)
+            except QuotaExceededError:
+                if self.breaker is not None:
+                    self.breaker.release()
+                raise
+
+    async def _send(self, endpoint, params, timeout, background=False):
+        """Tek bir upstream denemesi (yeniden denemeleriyle) gönder ve sonucu kaydet"""
+        self.requests += 1
+        self.in_flight += 1
+        started = time.monotonic()
+        try:
+            result = await self._get_with_retries(endpoint, params, timeout, background)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self.errors += 1
+            if self.breaker is not None:
+                self.breaker.record_failure()
+            self._record_latency(endpoint, started, 'timeout' if isinstance(e, asyncio.TimeoutError) else 'error')
+            raise
+        except BaseException:
+            # İptal edilen deneme (kaybeden hedge, toplu sorgu süresi) ya da beklenmeyen hata
+            # sonuç bildirmez; half_open deneme hakkı geri verilmezse devre bir daha çağrıya izin vermez
+            if self.breaker is not None:
+                self.breaker.release()
+            raise
+        finally:
+            self.in_flight -= 1
+        # Hedge'i kaybedip iptal edilen denemeler dağılıma yazılmaz
+        self._record_latency(endpoint, started, result.status_code)
+
+        if self.breaker is not None:
+            if result.status_code >= 500:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+        if result.status_code == 429 and self.quota is not None:
+            self.quota.penalize(parse_retry_after(result.headers.get('Retry-After')))
+        return result
+
+    def _record_latency(self, endpoint, started, status):
+        elapsed = time.monotonic() - started
+        self.policy.latency.record(elapsed)
+        metrics.observe('upstream_request_duration_seconds', elapsed, endpoint=endpoint)
+        metrics.inc('upstream_responses_total', endpoint=endpoint, status=status)
+
+    async def _send_hedged(self, endpoint, params, timeout, hedge_after, background=False):
+        """İlk deneme hedge_after saniyede bitmezse ikinci bir istek gönder"""
+        primary = asyncio.ensure_future(self._send(endpoint, params, timeout, background))
+        done, _ = await asyncio.wait({primary}, timeout=hedge_after)
+        if done:
+            return primary.result()
+
+        # Önce hedge bütçesine bakılır; kota token'ı yalnızca gönderilecek hedge için harcanır.
+        # Hedge kota ve devre kesiciden arka plan çağrısı olarak izin alır
+        if not self.policy.take_hedge():
+            return await primary
+        try:
+            self._admit(background=True)
+        except (QuotaExceededError, CircuitOpenError):
+            self.policy.refund_hedge()
+            return await primary
+        hedge = asyncio.ensure_future(self._send(endpoint, params, timeout, True))
+
+        pending = {primary, hedge}
+        error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self.policy.record_hedge_win()
+                        return task.result()
+                    error = error or task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _get_with_retries(self, endpoint, params, timeout, background=False):
+        """Yeniden denemeli isteği gönder; fikstür modunda son sonucu kaydet ya da kayıttan sun
+
+        Senkron istemcide olduğu gibi kayıt, yeniden denemeler bittikten sonraki
+        sonucu tutar; tekrar oynatmada yeniden deneme yapılmaz.
+        """
+        mode = self.fixtures.mode if self.fixtures is not None else None
+        if mode == 'replay':
+            return await self._replay(fixture_key(endpoint, params), timeout)
+        if mode != 'record':
+            return await self._attempts(endpoint, params, timeout, background)
+
+        key = fixture_key(endpoint, params)
+        started = time.monotonic()
+        try:
+            result = await self._attempts(endpoint, params, timeout, background)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self.fixtures.record(key, started, time.monotonic() - started,
+                                 error='timeout' if isinstance(e, asyncio.TimeoutError) else 'connection')
+            raise
+        self.fixtures.record(key, started, time.monotonic() - started, result.status_code,
+                             result.body.decode('utf-8', 'replace'), result.headers)
+        return result
+
+    async def _attempts(self, endpoint, params, timeout, background=False):
+        """Geçici hatalarda backoff ile yeniden dene; her yeniden deneme kotadan ayrıca düşülür"""
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self.session.get(f"{self.base_url}/{endpoint.lstrip('/')}", params=params,
+                                            timeout=timeout) as response:
+                    result = UpstreamResponse(response.status, await response.read(), response.headers)
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                if attempt == self.max_retries or not self._admit_retry(background):
+                    raise
+            else:
+                if (result.status_code not in RETRY_STATUSES or attempt == self.max_retries
+                        or not self._admit_retry(background)):
+                    return result
+            self.retries += 1
+            await asyncio.sleep(self.backoff * (2 ** attempt))
+
+    def _admit_retry(self, background):
+        """Yeniden deneme için kotadan token al; bütçe yoksa False"""
+        if self.quota is None:
+            return True
+        try:
+            self.quota.acquire(background=background)
+        except QuotaExceededError:
+            return False
+        return True
+
+    async def _replay(self, key, timeout):
+        """Kayıtlı yanıtı hıza göre ölçeklenmiş süre bekleyerek sun"""
+        entry = self.fixtures.lookup(key)
+        if entry is None:
+            raise aiohttp.ClientConnectionError(f"Kayıtlı upstream yanıtı yok: {key}")
+        delay = self.fixtures.delay(entry)
+        if timeout.sock_read is not None and delay > timeout.sock_read:
+            await asyncio.sleep(timeout.sock_read)
+            raise asyncio.TimeoutError()
+        if delay:
+            await asyncio.sleep(delay)
+        error = entry.get('x')
+        if error == 'timeout':
+            raise asyncio.TimeoutError()
+        if error is not None:
+            raise aiohttp.ClientConnectionError('Kayıtlı bağlantı hatası')
+        return UpstreamResponse(entry['s'], entry['b'].encode('utf-8'), entry.get('h', {}))
+
+    def stats(self):
+        """İstemci sayaçlarını döndür"""
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'retries': self.retries,
+            'in_flight': self.in_flight,
+            'pool_size': self.pool_size,
+            'keep_alive': self.keep_alive,
+            'connect_timeout': self.timeout.sock_connect,
+            'read_timeout': self.timeout.sock_read,
+            'latency': self.policy.stats(),
+            'fixtures': self.fixtures.stats() if self.fixtures is not None else None
+        }
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+class AsyncSingleFlight:
+    """asyncio için anahtar bazında çağrı birleştirme
+
+    fn() kendi görevinde (task) çalışır; çağıranlar sonucu shield ile bekler.
+    Böylece bir çağıranın iptali (toplu sorgu süresinin dolması, kopan istemci)
+    upstream çağrısını ve aynı anahtarı bekleyen diğer istekleri etkilemez.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self.executions = 0
+        self.coalesced = 0
+        self.errors = 0
+
+    async def do(self, key, fn):
+        """fn() coroutine'ini anahtar başına aynı anda en fazla bir kez çalıştır"""
+        task = self._calls.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            self.executions += 1
+            task.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(task)
+
+    def _finish(self, key, task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Bekleyen kalmadıysa "exception was never retrieved" uyarısını da engeller
+        if not task.cancelled() and task.exception() is not None:
+            self.errors += 1
+
+    def stats(self):
+        return {
+            'in_flight': len(self._calls),
+            'executions': self.executions,
+            'coalesced': self.coalesced,
+            'errors': self.errors
+        }
+
+
+class AsyncAdmissionController(AdmissionController):
+    """asyncio için kabul kontrolü; slot bırakılınca sıradaki bekleyene devredilir"""
+
+    def __init__(self, max_in_flight=ASYNC_ADMISSION_MAX_IN_FLIGHT, **kwargs):
+        super().__init__(max_in_flight, **kwargs)
+        self._waiters = collections.deque()
+
+    async def acquire(self, background=False):
+        if self.in_flight < self.max_in_flight and not self._waiters:
+            self.in_flight += 1
+            self.admitted += 1
+            return
+        if background:
+            self.rejected_background += 1
+            raise AdmissionRejected(self.retry_after(), 'background')
+        if self.queued >= self.max_queue:
+            self.rejected_queue_full += 1
+            raise AdmissionRejected(self.retry_after(), 'queue_full')
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.queued += 1
+        self.waited += 1
+        try:
+            await asyncio.wait({waiter}, timeout=self.queue_timeout)
+        except BaseException:
+            # İstek beklerken iptal edildi; devredilmiş slot varsa sıradakine aktar
+            self._abandon(waiter)
+            raise
+        finally:
+            self.queued -= 1
+        if waiter.done():
+            # release() slotu in_flight azaltmadan bu bekleyene devretti
+            self.admitted += 1
+            return
+        self._abandon(waiter)
+        self.rejected_timeout += 1
+        raise AdmissionRejected(self.retry_after(), 'queue_timeout')
+
+    def _abandon(self, waiter):
+        if waiter.done():
+            self._hand_off()
+        else:
+            waiter.cancel()
+            self._waiters.remove(waiter)
+
+    def _hand_off(self):
+        """Slotu sıradaki bekleyene devret; bekleyen yoksa boşalt"""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+    def release(self, held):
+        self._avg_hold = 0.9 * self._avg_hold + 0.1 * held
+        self._hand_off()
+
+    @asynccontextmanager
+    async def slot(self, background=False):
+        await self.acquire(background)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(time.monotonic() - started)
+
+
+class AsyncWeatherService(WeatherService):
+    """Servis hattının engellemeyen sürümü
+
+    Doğrulama, önbellek kararı, hata eşleme ve dönüştürme senkron hatla
+    aynıdır; upstream çağrısı, istek birleştirme ve arka plan yenilemesi
+    event loop üzerinde çalışır.
+    """
+
+    connection_errors = (aiohttp.ClientError,)
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._background_tasks = set()
+
+    async def get(self, city, cache_info=None):
+        """Senkron get ile aynı kurallar (taze, SWR, bayat, negatif önbellek)"""
+        cache_info = {} if cache_info is None else cache_info
+        city = clean_city(city)
+        cache_key = make_key(city)
+        entry, value = self.lookup(city, cache_key, cache_info)
+        if value is not None:
+            return value
+
+        try:
+            result = await self.singleflight.do(cache_key, lambda: self.fetch(city, cache_key))
+        except WeatherError as e:
+            return self.serve_stale(entry, e, cache_info)
+
+        self.mark_cache(cache_info, 'MISS')
+        return result
+
+    async def get_by_coords(self, lat, lon, cache_info=None):
+        """Senkron get_by_coords ile aynı kurallar (en yakın şehir, yoksa ızgara hücresi)"""
+        cache_info = {} if cache_info is None else cache_info
+        city, cell = self.locate(lat, lon)
+        if city is not None:
+            return await self.get(city, cache_info)
+
+        key = cell_key(cell)
+        entry = self.cache.get_entry(key)
+        if entry is not None and entry.fresh:
+            self.mark_cache(cache_info, 'HIT', entry.age)
+            return entry.value
+
+        try:
+            result = await self.singleflight.do(key, lambda: self.fetch_cell(cell, key))
+        except WeatherError as e:
+            return self.serve_stale(entry, e, cache_info)
+
+        self.mark_cache(cache_info, 'MISS')
+        return result
+
+    async def fetch_cell(self, cell, key):
+        lat, lon = self.locator.cell_center(cell)
+        try:
+            async with self.admission.slot():
+                response = await self.client.get('weather', params=upstream_params(self.api_key, lat=lat, lon=lon))
+            return self.accept_cell(cell, key, response)
+        except Exception as e:
+            raise map_exception(e, self.timeout_errors, self.connection_errors)
+
+    async def get_forecast(self, city, cache_info=None):
+        """Senkron get_forecast ile aynı kurallar (taze, bayat, negatif önbellek)"""
+        cache_info = {} if cache_info is None else cache_info
+        city = clean_city(city)
+        cache_key = make_key(city)
+        entry, series = self.lookup_forecast(city, cache_key, cache_info)
+        if series is not None:
+            return series
+
+        try:
+            series = await self.singleflight.do(f"forecast:{cache_key}",
+                                                lambda: self.fetch_forecast(city, cache_key))
+        except WeatherError as e:
+            return load_value(self.serve_stale(entry, e, cache_info))
+
+        self.mark_cache(cache_info, 'MISS')
+        return series
+
+    async def fetch_forecast(self, city, cache_key):
+        try:
+            async with self.admission.slot():
+                response = await self.client.get('forecast', params=upstream_params(self.api_key, q=city))
+            return self.accept_forecast(city, cache_key, response)
+        except Exception as e:
+            raise map_exception(e, self.timeout_errors, self.connection_errors)
+
+    async def fetch(self, city, cache_key, background=False):
+        try:
+            async with self.admission.slot(background=background):
+                response = await self.client.get('weather', params=upstream_params(self.api_key, q=city),
+                                                 background=background)
+            return self.accept(city, cache_key, response)
+        except Exception as e:
+            raise map_exception(e, self.timeout_errors, self.connection_errors)
+
+    async def fetch_group(self, chunk):
+        params = upstream_params(self.api_key, id=','.join(str(city_id) for _, _, city_id in chunk))
+        async with self.admission.slot():
+            response = await self.client.get('group', params=params)
+        return self.accept_group(chunk, response)
+
+    async def warm(self, city, cache_key):
+        """Şehri arka plan önceliğiyle yeniden getir (eşzamanlı async isteklerle birleştirilir)"""
+        return await self.singleflight.do(cache_key, lambda: self.fetch(city, cache_key, background=True))
+
+    def refresh_in_background(self, city, cache_key):
+        async def refresh():
+            try:
+                await self.warm(city, cache_key)
+            except Exception:
+                pass
+
+        task = asyncio.get_running_loop().create_task(refresh())
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+
+class AsyncCacheWarmer(CacheWarmer):
+    """Event loop üzerinde çalışan önbellek ısıtıcısı
+
+    Seçim (skorlar, sabit liste, bütçe) iş parçacıklı ısıtıcıyla aynıdır;
+    yenilemeler AsyncWeatherService.warm ile yapılır, böylece aynı bağlantı
+    havuzunu kullanır ve eşzamanlı async isteklerle birleştirilir.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._task = None
+
+    async def run_once(self):
+        refreshed = 0
+        for city, cache_key in self._due():
+            try:
+                await self.fetch(city, cache_key)
+                self.refreshes += 1
+                refreshed += 1
+            except Exception:
+                self.failures += 1
+        return refreshed
+
+    async def _run(self):
+        while not self._stop.is_set():
+            try:
+                await self.run_once()
+            except Exception:
+                pass
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        """Isıtıcı görevini çalışan event loop üzerinde başlat (lifespan başlangıcında)"""
+        if self.running():
+            return
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Isıtıcı görevini iptal et ve bitmesini bekle"""
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def running(self):
+        return self._task is not None and not self._task.done()
+
+
+upstream = AsyncOpenWeatherClient()
+singleflight = AsyncSingleFlight()
+admission = AsyncAdmissionController()
+weather_service = AsyncWeatherService(client=upstream, singleflight=singleflight, admission=admission)
+cache_warmer = AsyncCacheWarmer(weather_cache, weather_service.warm, make_key, negative_cache=negative_cache,
+                                static_cities=parse_city_list(WARMER_CITIES))
+weather_service.warmer = cache_warmer
+_swagger_json = None
+
+
+# Metriklerde Flask uygulamasıyla aynı route etiketleri kullanılır
+ROUTE_LABELS = {
+    '/api/v1': '/api/v1/',
+    '/api/v1/': '/api/v1/',
+    '/api/v1/health': '/api/v1/health',
+    '/api/v1/stats': '/api/v1/stats',
+    '/api/v1/swagger.json': '/api/v1/swagger.json',
+    '/api/v1/weather': '/api/v1/weather',
+    '/api/v1/weather/batch': '/api/v1/weather/batch',
+    '/api/v1/weather/coords': '/api/v1/weather/coords',
+    '/metrics': '/metrics'
+}
+
+metrics.register_collector('admission', lambda: admission_metrics(admission))
+metrics.register_collector('hedging', lambda: hedge_metrics(upstream.policy))
+
+
+def _route_label(path):
+    label = ROUTE_LABELS.get(path)
+    if label is None:
+        if path.startswith('/api/v1/weather/'):
+            label = '/api/v1/weather/<string:city>'
+        elif path.startswith('/api/v1/forecast/'):
+            label = '/api/v1/forecast/<string:city>'
+        else:
+            label = 'unmatched'
+    return label
+
+
+async def fetch_weather_batch(cities):
+    """Birden fazla şehrin hava durumunu eşzamanlı getir (senkron sürümle aynı kurallar)"""
+    if not cities:
+        raise WeatherError(400, 'Lütfen en az bir şehir ismi giriniz.')
+    if len(cities) > BATCH_MAX_CITIES:
+        raise WeatherError(400, f'Tek istekte en fazla {BATCH_MAX_CITIES} şehir sorgulanabilir.')
+
+    deadline = time.monotonic() + BATCH_TIMEOUT
+    limiter = asyncio.Semaphore(BATCH_MAX_WORKERS)
+
+    async def limited(coro):
+        async with limiter:
+            return await coro
+
+    jobs = []
+    seen = set()
+    resolved = {}
+    tasks = {}
+    grouped = []
+    for city in cities:
+        city = city.strip() if isinstance(city, str) else ''
+        key = make_key(city) if len(city) >= 2 else None
+        jobs.append((city, key))
+        if key is None or key in seen:
+            continue
+        seen.add(key)
+
+        cached = weather_cache.get(key)
+        if cached is not None:
+            metrics.inc('cache_lookups_total', result='hit')
+            resolved[key] = cached
+            continue
+
+        city_id = city_resolver.resolve(city)
+        if city_id is None:
+            tasks[key] = asyncio.ensure_future(limited(weather_service.get(city)))
+        else:
+            grouped.append((key, city, city_id))
+
+    group_tasks = [(chunk, asyncio.ensure_future(limited(weather_service.fetch_group(chunk))))
+                   for chunk in chunked(grouped)]
+    if group_tasks:
+        await asyncio.wait([t for _, t in group_tasks], timeout=max(0, deadline - time.monotonic()))
+
+    # /group yanıtında eksik kalan ya da başarısız olan şehirleri tek tek getir
+    for chunk, task in group_tasks:
+        found = {}
+        if task.done() and not task.cancelled() and task.exception() is None:
+            found = task.result()
+        elif not task.done():
+            task.cancel()
+        resolved.update(found)
+        for key, city, _ in chunk:
+            if key not in found:
+                tasks[key] = asyncio.ensure_future(limited(weather_service.get(city)))
+
+    pending = set()
+    if tasks:
+        _, pending = await asyncio.wait(tasks.values(), timeout=max(0, deadline - time.monotonic()))
+
+    results = []
+    errors = []
+    for city, key in jobs:
+        task = tasks.get(key)
+        if key in resolved:
+            results.append(public(resolved[key]))
+        elif task is None:
+            errors.append({'city': city, 'status': 400, 'error': INVALID_CITY_MESSAGE})
+        elif task in pending:
+            task.cancel()
+            errors.append({'city': city, 'status': 504, 'error': TIMEOUT_MESSAGE})
+        else:
+            error = task.exception()
+            if error is None:
+                results.append(public(task.result()))
+            elif isinstance(error, WeatherError):
+                errors.append({'city': city, 'status': error.status, 'error': error.message})
+            else:
+                errors.append({'city': city, 'status': 500, 'error': f"Beklenmeyen bir hata oluştu: {str(error)}"})
+
+    return {
+        'success': not errors,
+        'requested': len(jobs),
+        'succeeded': len(results),
+        'failed': len(errors),
+        'results': results,
+        'errors': errors
+    }
+
+
+def _swagger_schema():
+    """Flask uygulamasındaki modellerden üretilen Swagger şemasını döndür"""
+    global _swagger_json
+    if _swagger_json is None:
+        with flask_app_module.app.test_request_context():
+            _swagger_json = flask_app_module.api.__schema__
+    return _swagger_json
+
+
+def stats():
+    """Async moda ait önbellek ve upstream istatistikleri"""
+    return {
+        'cache': weather_cache.stats(),
+        'negative_cache': negative_cache.stats(),
+        'forecast_cache': forecast_cache.stats(),
+        'coalescing': singleflight.stats(),
+        'upstream': upstream.stats(),
+        'quota': upstream_quota.stats(),
+        'circuit': upstream_breaker.stats(),
+        'admission': admission.stats(),
+        'city_ids': city_resolver.stats(),
+        'aliases': alias_index.stats(),
+        'locator': city_locator.stats(),
+        'warmer': cache_warmer.stats()
+    }
+
+
+def _cache_headers(headers, cache_info):
+    """Önbellek durumunu X-Cache ve Age başlıklarıyla bildir"""
+    if cache_info.get('status'):
+        headers['X-Cache'] = cache_info['status']
+        if cache_info['status'] != 'MISS':
+            headers['Age'] = str(int(cache_info['age']))
+
+
+async def route(method, path, query, body, headers, request_headers=None):
+    """İsteği ilgili işleyiciye yönlendir; (durum, gövde) döndür
+
+    Yanıt başlıkları, hata durumunda da korunabilmesi için `headers`
+    sözlüğüne yazılır. Koşullu istekte kopya geçerliyse (304, None), önceden
+    serileştirilmiş tekil şehir yanıtlarında (gerekirse sıkıştırılmış) gövde
+    byte olarak döner.
+    """
+    request_headers = request_headers or {}
+    cache_info = {}
+
+    if path in ('/api/v1', '/api/v1/'):
+        return 200, flask_app_module.Home(api=flask_app_module.api).get()
+    if path == '/api/v1/health':
+        return 200, flask_app_module.HealthCheck(api=flask_app_module.api).get()
+    if path == '/api/v1/stats':
+        return 200, stats()
+    if path == '/api/v1/swagger.json':
+        return 200, _swagger_schema()
+
+    if path == '/api/v1/weather/batch':
+        if method == 'GET':
+            raw = query.get('cities', [''])[0]
+            if not raw:
+                return 400, {'errors': {'cities': "Virgülle ya da ';' ile ayrılmış şehir adları"},
+                             'message': 'Input payload validation failed'}
+            separator = ';' if ';' in raw else ','
+            cities = [city for city in raw.split(separator) if city.strip()]
+        elif method == 'POST':
+            try:
+                payload = json.loads(body or b'null')
+            except ValueError:
+                payload = None
+            if isinstance(payload, dict):
+                payload = payload.get('cities')
+            if not isinstance(payload, list):
+                raise WeatherError(400, 'Lütfen şehir isimlerini JSON liste olarak gönderiniz.')
+            cities = payload
+        else:
+            return 405, {'message': 'The method is not allowed for the requested URL.'}
+        return 200, await fetch_weather_batch(cities)
+
+    if path == '/api/v1/weather' or path.startswith('/api/v1/weather/'):
+        if method != 'GET':
+            return 405, {'message': 'The method is not allowed for the requested URL.'}
+        if path == '/api/v1/weather/coords':
+            missing = {name: help_text for name, help_text in (('lat', 'Enlem (örn: 41.01)'),
+                                                               ('lon', 'Boylam (örn: 28.98)'))
+                       if name not in query}
+            if missing:
+                return 400, {'errors': missing, 'message': 'Input payload validation failed'}
+            lookup = weather_service.get_by_coords(query['lat'][0], query['lon'][0], cache_info)
+        elif path == '/api/v1/weather':
+            if 'city' not in query:
+                return 400, {'errors': {'city': 'Şehir adı (örn: Istanbul, Ankara)'},
+                             'message': 'Input payload validation failed'}
+            lookup = weather_service.get(query['city'][0], cache_info)
+        else:
+            lookup = weather_service.get(path[len('/api/v1/weather/'):], cache_info)
+
+        try:
+            result = await lookup
+        finally:
+            _cache_headers(headers, cache_info)
+        headers.update(validator_headers(result, cache_info['status'], cache_info['age']))
+        encoding = negotiate(request_headers.get('accept-encoding'))
+        if not_modified(result, request_headers.get('if-none-match'), request_headers.get('if-modified-since')):
+            encode_not_modified(encoding, headers, result)
+            return 304, None
+        # Önbelleğe girerken serileştirilmiş (ve sıkıştırılmış) gövde varsa olduğu gibi gönderilir
+        body = serialized_body(result)
+        if body is None:
+            return 200, public(result)
+        return 200, encode_body(body, encoding, headers, result)
+
+    if path.startswith('/api/v1/forecast/'):
+        if method != 'GET':
+            return 405, {'message': 'The method is not allowed for the requested URL.'}
+        args = {name: query[name][0] if name in query else None for name in ('fields', 'start', 'end', 'hours')}
+        forecast_query = clean_forecast_query(args['fields'], args['start'], args['end'], args['hours'])
+        try:
+            series = await weather_service.get_forecast(path[len('/api/v1/forecast/'):], cache_info)
+        finally:
+            _cache_headers(headers, cache_info)
+        return 200, build_forecast_response(series, *forecast_query)
+
+    return 404, {'message': 'Endpoint bulunamadı.'}
+
+
+async def _read_body(receive):
+    body = b''
+    while True:
+        message = await receive()
+        body += message.get('body', b'')
+        if not message.get('more_body'):
+            return body
+
+
+async def _send_body(send, status, data, content_type, headers):
+    raw_headers = [(b'content-type', content_type.encode('latin-1')),
+                   (b'content-length', str(len(data)).encode('latin-1'))]
+    raw_headers += [(k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in headers.items()]
+    await send({'type': 'http.response.start', 'status': status, 'headers': raw_headers})
+    await send({'type': 'http.response.body', 'body': data})
+
+
+async def _send_not_modified(send, headers):
+    """Gövdesiz 304 yanıtı (içerik başlıkları gönderilmez)"""
+    raw_headers = [(k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in headers.items()]
+    await send({'type': 'http.response.start', 'status': 304, 'headers': raw_headers})
+    await send({'type': 'http.response.body', 'body': b''})
+
+
+async def app(scope, receive, send):
+    """ASGI giriş noktası"""
+    if scope['type'] == 'lifespan':
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                if WARMER_ENABLED:
+                    cache_warmer.start()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await cache_warmer.stop()
+                await upstream.close()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    if scope['type'] != 'http':
+        return
+
+    query = parse_qs(scope.get('query_string', b'').decode('utf-8'), keep_blank_values=True)
+    request_headers = {name.decode('latin-1'): value.decode('latin-1') for name, value in scope.get('headers', ())}
+    body = await _read_body(receive) if scope['method'] == 'POST' else b''
+
+    started = time.monotonic()
+    route_label = _route_label(scope['path'])
+    metrics.gauge_add('http_requests_in_flight', 1, route=route_label)
+    status = 500
+    encoding = negotiate(request_headers.get('accept-encoding'))
+    try:
+        if scope['path'] == '/metrics':
+            status = 200
+            headers = {}
+            data = encode_body(metrics.render().encode('utf-8'), encoding, headers)
+            await _send_body(send, status, data, CONTENT_TYPE, headers)
+            return
+
+        headers = {}
+        try:
+            status, payload = await route(scope['method'], scope['path'], query, body, headers, request_headers)
+        except WeatherError as e:
+            status, payload = e.status, {'message': e.message}
+            if e.retry_after is not None:
+                headers['Retry-After'] = str(max(1, math.ceil(e.retry_after)))
+        except Exception as e:
+            status, payload = 500, {'message': f"Beklenmeyen bir hata oluştu: {str(e)}"}
+        if status == 304:
+            await _send_not_modified(send, headers)
+            return
+        data = payload if isinstance(payload, bytes) else (json.dumps(payload) + '\n').encode('utf-8')
+        if status == 200 and 'Content-Encoding' not in headers:
+            data = encode_body(data, encoding, headers)
+        await _send_body(send, status, data, 'application/json', headers)
+    finally:
+        metrics.gauge_add('http_requests_in_flight', -1, route=route_label)
+        metrics.observe('http_request_duration_seconds', time.monotonic() - started,
+                        route=route_label, method=scope['method'], status=status)
+
+
+if __name__ == '__main__':
+    import uvicorn
+
+    port = int(os.getenv('PORT', 5001))
+    print("🌤️  Hava Durumu API'si (async/ASGI) başlatılıyor...")
+    print(f"🌡️  Hava durumu: http://0.0.0.0:{port}/api/v1/weather?city=Istanbul")
+    uvicorn.run(app, host='0.0.0.0', port=port, log_level='warning')
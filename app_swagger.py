@@ -1,12 +1,14 @@
 import os
-import requests
 from flask import Flask
 from flask_restx import Api, Resource, fields
 from dotenv import load_dotenv
 
-# Ortam değişkenlerini yükle
+# Ortam değişkenlerini yükle (yerel modüller ayarlarını import sırasında okur)
 load_dotenv()
 
+from conditional import public
+from weather_service import WeatherError, weather_service
+
 # Flask uygulaması oluştur
 app = Flask(__name__)
 
@@ -52,6 +54,13 @@ error_model = api.model('Error', {
     'error': fields.String(description='Hata mesajı', example='Lütfen geçerli bir şehir ismi giriniz.')
 })
 
+def fetch_weather(city):
+    """Hava durumunu paylaşılan servis hattından getir; hataları api.abort ile döndür"""
+    try:
+        return public(weather_service.get(city))
+    except WeatherError as e:
+        api.abort(e.status, e.message)
+
 # Ana sayfa endpoint'i
 @api.route('/')
 class Home(Resource):
@@ -108,68 +117,7 @@ class Weather(Resource):
         if len(city) < 2:
             api.abort(400, 'Şehir ismi en az 2 karakter olmalıdır.')
         
-        try:
-            # OpenWeather API'ye istek gönder
-            url = f"http://api.openweathermap.org/data/2.5/weather"
-            params = {
-                'q': city,
-                'appid': API_KEY,
-                'units': 'metric',  # Celsius için
-                'lang': 'tr'        # Türkçe açıklamalar için
-            }
-            
-            response = requests.get(url, params=params, timeout=10)
-            
-            # API yanıt kontrolü
-            if response.status_code == 404:
-                api.abort(404, f"'{city}' şehri bulunamadı. Lütfen şehir ismini kontrol edin.")
-            elif response.status_code == 401:
-                api.abort(500, "API anahtarı geçersiz.")
-            elif response.status_code != 200:
-                api.abort(500, f"Hava durumu servisi hatası: {response.status_code}")
-            
-            # JSON verisini çözümle
-            data = response.json()
-            
-            # Hava durumu bilgilerini çıkar
-            weather_desc = data['weather'][0]['description'].title()
-            temp = round(data['main']['temp'])
-            humidity = data['main']['humidity']
-            wind_speed = round(data['wind']['speed'] * 3.6, 1)  # m/s'den km/h'ye çevir
-            feels_like = round(data['main']['feels_like'])
-            
-            # Şehir ismini düzelt (API'den gelen doğru isim)
-            city_name = data['name']
-            country = data['sys']['country']
-            
-            # Türkçe yanıt oluştur
-            message = (f"{city_name} ({country})'da hava sıcaklığı {temp}°C "
-                      f"(hissedilen {feels_like}°C), nem oranı %{humidity}, "
-                      f"rüzgar hızı {wind_speed} km/h ve hava durumu: {weather_desc}.")
-            
-            result = {
-                "success": True,
-                "city": city_name,
-                "country": country,
-                "message": message,
-                "details": {
-                    "temperature": temp,
-                    "feels_like": feels_like,
-                    "humidity": humidity,
-                    "wind_speed_kmh": wind_speed,
-                    "description": weather_desc,
-                    "icon": data['weather'][0]['icon']
-                }
-            }
-            
-            return result
-            
-        except requests.exceptions.Timeout:
-            api.abort(504, "Hava durumu servisi yanıt vermiyor. Lütfen daha sonra tekrar deneyin.")
-        except requests.exceptions.ConnectionError:
-            api.abort(503, "İnternet bağlantısı sorunu. Lütfen bağlantınızı kontrol edin.")
-        except Exception as e:
-            api.abort(500, f"Beklenmeyen bir hata oluştu: {str(e)}")
+        return fetch_weather(city)
 
 # Şehir adı ile direkt erişim endpoint'i
 @weather_ns.route('/<string:city>')
@@ -189,34 +137,12 @@ class WeatherByCity(Resource):
         - /api/v1/weather/Ankara
         - /api/v1/weather/London
         """
-        from flask import request
-        
-        # Query parametresi olarak işle
-        request.args = request.args.copy()
-        if hasattr(request.args, 'to_dict'):
-            args_dict = request.args.to_dict()
-        else:
-            args_dict = dict(request.args)
-        args_dict['city'] = city
-        
-        # Mock request args
-        class MockArgs:
-            def __init__(self, args_dict):
-                self._args = args_dict
-            def get(self, key, default=None):
-                return self._args.get(key, default)
-        
-        # Geçici olarak args'ı değiştir
-        original_args = request.args
-        request.args = MockArgs(args_dict)
-        
-        try:
-            # Weather endpoint'ini çağır
-            weather_resource = Weather()
-            return weather_resource.get()
-        finally:
-            # Args'ı geri yükle
-            request.args = original_args
+        # Şehir ismini temizle
+        city = city.strip()
+        if len(city) < 2:
+            api.abort(400, 'Şehir ismi en az 2 karakter olmalıdır.')
+
+        return fetch_weather(city)
 
 if __name__ == '__main__':
     port = 5001
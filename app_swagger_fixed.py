@@ -1,15 +1,43 @@
+import math
 import os
-import requests
-from flask import Flask, request, jsonify
-from flask_restx import Api, Resource, fields, reqparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import Flask, Response, request, jsonify, g, has_app_context
+from flask_restx import Api, Resource, fields, marshal, reqparse
 from dotenv import load_dotenv
 
-# Ortam değişkenlerini yükle
+# Ortam değişkenlerini yükle (yerel modüller ayarlarını import sırasında okur)
 load_dotenv()
 
+from weather_cache import weather_cache, negative_cache, make_key
+from singleflight import weather_singleflight
+from upstream import upstream_client
+from quota import upstream_quota
+from circuit_breaker import upstream_breaker, CLOSED, HALF_OPEN, OPEN
+from admission import weather_admission
+from metrics import metrics, CONTENT_TYPE, COUNTER, GAUGE
+from city_resolver import city_resolver, chunked
+from city_names import alias_index
+from city_locator import city_locator
+from cache_warmer import WARMER_ENABLED
+from conditional import validator_headers, not_modified
+from serialization import serialized_body
+from compression import COMPRESSIBLE_TYPES, negotiate, encode_body, encode_not_modified
+from weather_service import (WeatherError, INVALID_CITY_MESSAGE, TIMEOUT_MESSAGE, weather_service,
+                             cache_warmer, weather_details, weather_response, clean_forecast_query,
+                             build_forecast_response)
+from forecast import FORECAST_FIELDS, forecast_cache
+
 # Flask uygulaması oluştur
 app = Flask(__name__)
 
+# 404 mesajlarına flask-restx'in "did you mean" önerilerini ekleme
+app.config['ERROR_404_HELP'] = False
+
 # Swagger UI için API oluştur
 api = Api(
     app,
@@ -26,35 +54,108 @@ API_KEY = os.getenv('OPENWEATHER_API_KEY')
 if not API_KEY:
     raise ValueError("OPENWEATHER_API_KEY ortam değişkeni bulunamadı! .env dosyasını kontrol edin.")
 
+# Toplu sorgu konfigürasyonu
+BATCH_MAX_CITIES = int(os.getenv('BATCH_MAX_CITIES', 200))
+BATCH_MAX_WORKERS = int(os.getenv('BATCH_MAX_WORKERS', 16))
+BATCH_TIMEOUT = float(os.getenv('BATCH_TIMEOUT', 15))
+
+# Toplu sorgular için paylaşılan, sınırlı iş parçacığı havuzu
+batch_executor = ThreadPoolExecutor(max_workers=BATCH_MAX_WORKERS, thread_name_prefix='weather-batch')
+
 # Namespace oluştur
 weather_ns = api.namespace('weather', description='Hava durumu işlemleri')
+forecast_ns = api.namespace('forecast', description='5 günlük / 3 saatlik hava tahmini')
+
+# Response modelleri tanımla (hava durumu modelleri servis hattının dönüştürücüsüyle paylaşılır)
+api.add_model(weather_details.name, weather_details)
+api.add_model(weather_response.name, weather_response)
+
+error_response = api.model('ErrorResponse', {
+    'error': fields.String(description='Hata mesajı', example='Lütfen geçerli bir şehir ismi giriniz.')
+})
 
-# Response modelleri tanımla
-weather_details = api.model('WeatherDetails', {
-    'temperature': fields.Integer(description='Sıcaklık (°C)', example=18),
-    'feels_like': fields.Integer(description='Hissedilen sıcaklık (°C)', example=17),
+batch_error = api.model('BatchWeatherError', {
+    'city': fields.String(description='İstenen şehir adı', example='asdfgh'),
+    'status': fields.Integer(description='HTTP durum kodu', example=404),
+    'error': fields.String(description='Hata mesajı', example="'asdfgh' şehri bulunamadı. Lütfen şehir ismini kontrol edin.")
+})
+
+batch_response = api.model('BatchWeatherResponse', {
+    'success': fields.Boolean(description='Tüm şehirler başarıyla alındı mı', example=True),
+    'requested': fields.Integer(description='İstenen şehir sayısı', example=3),
+    'succeeded': fields.Integer(description='Başarılı şehir sayısı', example=3),
+    'failed': fields.Integer(description='Başarısız şehir sayısı', example=0),
+    'results': fields.List(fields.Nested(weather_response), description='Şehir bazında hava durumu yanıtları'),
+    'errors': fields.List(fields.Nested(batch_error), description='Şehir bazında hatalar')
+})
+
+forecast_point = api.model('ForecastPoint', {
+    'time': fields.Integer(description='Tahmin zamanı (Unix, UTC)', example=1700000000),
+    'temperature': fields.Float(description='Sıcaklık (°C)', example=18.4),
+    'feels_like': fields.Float(description='Hissedilen sıcaklık (°C)', example=17.2),
     'humidity': fields.Integer(description='Nem oranı (%)', example=63),
     'wind_speed_kmh': fields.Float(description='Rüzgar hızı (km/h)', example=18.5),
+    'precipitation_chance': fields.Integer(description='Yağış olasılığı (%)', example=20),
     'description': fields.String(description='Hava durumu açıklaması', example='Parçalı Az Bulutlu'),
     'icon': fields.String(description='Hava durumu ikonu kodu', example='03d')
 })
 
-weather_response = api.model('WeatherResponse', {
+forecast_response = api.model('ForecastResponse', {
     'success': fields.Boolean(description='İşlem başarı durumu', example=True),
     'city': fields.String(description='Şehir adı', example='İstanbul'),
     'country': fields.String(description='Ülke kodu', example='TR'),
-    'message': fields.String(description='Türkçe hava durumu mesajı'),
-    'details': fields.Nested(weather_details, description='Detaylı hava durumu bilgileri')
+    'count': fields.Integer(description='Penceredeki tahmin noktası sayısı', example=8),
+    'forecast': fields.List(fields.Nested(forecast_point),
+                            description='Tahmin noktaları (yalnızca istenen alanlarla)')
 })
 
-error_response = api.model('ErrorResponse', {
-    'error': fields.String(description='Hata mesajı', example='Lütfen geçerli bir şehir ismi giriniz.')
+batch_request = api.model('BatchWeatherRequest', {
+    'cities': fields.List(fields.String, required=True, description='Şehir adları', example=['Istanbul', 'Ankara', 'Izmir'])
 })
 
+def marshal_fast(model, **kwargs):
+    """api.marshal_with ile aynı Swagger dokümanını üreten, hızlı yollu marshal dekoratörü
+
+    Sonucun önbelleğe girerken serileştirilmiş gövdesi varsa model her
+    istekte yeniden dolaşılmadan doğrudan döndürülür. X-Fields maskesi
+    verildiğinde, debug modunda (girintili JSON) ya da gövdesi olmayan eski
+    kayıtlarda normal marshal yoluna düşülür.
+    """
+    def decorator(func):
+        # Dokümantasyon (__apidoc__) api.marshal_with tarafından func üzerine yazılır
+        api.marshal_with(model, **kwargs)(func)
+
+        @wraps(func)
+        def wrapper(*args, **kw):
+            result = func(*args, **kw)
+            mask = request.headers.get(app.config['RESTX_MASK_HEADER'])
+            body = serialized_body(result)
+            if body is not None and not mask and not app.debug:
+                # Önceden sıkıştırılmış varyantlar yalnızca bu gövdeye karşılık gelir
+                g.serialized_result = result
+                return Response(body, mimetype='application/json')
+            return marshal(result, model, mask=mask)
+        return wrapper
+    return decorator
+
 # Parser tanımla
 weather_parser = reqparse.RequestParser()
 weather_parser.add_argument('city', type=str, required=True, help='Şehir adı (örn: Istanbul, Ankara)', location='args')
 
+coords_parser = reqparse.RequestParser()
+coords_parser.add_argument('lat', type=float, required=True, help='Enlem (örn: 41.01)', location='args')
+coords_parser.add_argument('lon', type=float, required=True, help='Boylam (örn: 28.98)', location='args')
+
+forecast_parser = reqparse.RequestParser()
+forecast_parser.add_argument('start', type=str, help='Pencere başlangıcı (Unix zamanı, dahil)', location='args')
+forecast_parser.add_argument('end', type=str, help='Pencere sonu (Unix zamanı, hariç)', location='args')
+forecast_parser.add_argument('hours', type=str, help='Başlangıçtan itibaren kaç saat (örn: 24)', location='args')
+forecast_parser.add_argument('fields', type=str, location='args',
+                             help=f"Virgülle ayrılmış alanlar ({', '.join(FORECAST_FIELDS)})")
+
+batch_parser = reqparse.RequestParser()
+batch_parser.add_argument('cities', type=str, required=True, help="Virgülle ya da ';' ile ayrılmış şehir adları (örn: Istanbul,Ankara veya Istanbul,TR;Paris,FR)", location='args')
+
 # Ana sayfa endpoint'i
 @api.route('/')
 class Home(Resource):
@@ -67,8 +168,13 @@ class Home(Resource):
             'swagger_ui': '/swagger/',
             'endpoints': {
                 '/api/v1/weather': 'GET - Hava durumu sorgulama',
+                '/api/v1/weather/coords': 'GET - Koordinatla hava durumu sorgulama',
+                '/api/v1/weather/batch': 'GET/POST - Toplu hava durumu sorgulama',
+                '/api/v1/forecast/<city>': 'GET - 5 günlük / 3 saatlik hava tahmini',
                 '/swagger/': 'GET - API dokümantasyonu',
-                '/health': 'GET - Health check'
+                '/health': 'GET - Health check',
+                '/api/v1/stats': 'GET - Önbellek istatistikleri',
+                '/metrics': 'GET - Prometheus metrikleri'
             }
         }
 
@@ -77,19 +183,311 @@ class Home(Resource):
 class HealthCheck(Resource):
     def get(self):
         """Health check endpoint for monitoring"""
+        # Devre açıkken servis önbellekten yanıt vermeye devam eder; durum 'degraded' olur
+        circuit = upstream_breaker.state
         return {
-            'status': 'healthy',
+            'status': 'degraded' if circuit == OPEN else 'healthy',
             'service': 'weather-api',
             'version': '1.0.0',
-            'timestamp': '2025-05-27'
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'upstream_circuit': circuit
+        }
+
+# Önbellek istatistikleri endpoint'i
+@api.route('/stats')
+class Stats(Resource):
+    def get(self):
+        """Önbellek ve upstream istatistikleri"""
+        return {
+            'cache': weather_cache.stats(),
+            'negative_cache': negative_cache.stats(),
+            'forecast_cache': forecast_cache.stats(),
+            'coalescing': weather_singleflight.stats(),
+            'upstream': upstream_client.stats(),
+            'quota': upstream_quota.stats(),
+            'circuit': upstream_breaker.stats(),
+            'admission': weather_admission.stats(),
+            'city_ids': city_resolver.stats(),
+            'aliases': alias_index.stats(),
+            'locator': city_locator.stats(),
+            'warmer': cache_warmer.stats()
         }
 
+@app.route('/metrics')
+def prometheus_metrics():
+    """Prometheus metin formatında metrikler"""
+    return Response(metrics.render(), content_type=CONTENT_TYPE)
+
+def _route_label():
+    """Metrik etiketi olarak route şablonu (şehir adları etiket sayısını büyütmez)"""
+    return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+@app.before_request
+def start_request_metrics():
+    g.metrics_started = time.monotonic()
+    g.metrics_route = _route_label()
+    metrics.gauge_add('http_requests_in_flight', 1, route=g.metrics_route)
+
+@app.after_request
+def remember_response_status(response):
+    g.metrics_status = response.status_code
+    return response
+
+@app.teardown_request
+def record_request_metrics(error=None):
+    """İstek süresini route/method/durum histogramına yaz"""
+    started = g.pop('metrics_started', None)
+    if started is None:
+        return
+    route = g.metrics_route
+    metrics.gauge_add('http_requests_in_flight', -1, route=route)
+    metrics.observe('http_request_duration_seconds', time.monotonic() - started,
+                    route=route, method=request.method, status=g.get('metrics_status', 500))
+
+@app.after_request
+def compress_response(response):
+    """JSON ve metin yanıtlarını istemcinin kabul ettiği kodlamayla sıkıştır
+
+    add_cache_headers'tan sonra çalışır (after_request kayıt sırasının
+    tersiyle çağrılır); ETag'ler kodlamaya özgü varyanta çevrilir.
+    """
+    if (response.mimetype not in COMPRESSIBLE_TYPES or response.direct_passthrough
+            or 'Content-Encoding' in response.headers):
+        return response
+    encoding = negotiate(request.headers.get('Accept-Encoding'))
+    if response.status_code == 304:
+        encode_not_modified(encoding, response.headers, g.get('weather_result') or {})
+    elif response.status_code == 200:
+        data = encode_body(response.get_data(), encoding, response.headers, g.get('serialized_result'))
+        if 'Content-Encoding' in response.headers:
+            response.set_data(data)
+    return response
+
+@app.after_request
+def add_cache_headers(response):
+    """Önbellek durumunu X-Cache ve Age başlıklarıyla bildir
+
+    Tekil şehir yanıtlarına ETag, Last-Modified ve Cache-Control eklenir;
+    istemcinin kopyası hâlâ geçerliyse yanıt gövdesiz 304'e çevrilir.
+    """
+    cache_status = g.get('cache_status')
+    if cache_status:
+        response.headers['X-Cache'] = cache_status
+        if cache_status != 'MISS':
+            response.headers['Age'] = str(int(g.cache_age))
+
+    result = g.get('weather_result')
+    if result is not None and response.status_code == 200:
+        response.headers.update(validator_headers(result, cache_status, g.get('cache_age', 0)))
+        if not_modified(result, request.headers.get('If-None-Match'), request.headers.get('If-Modified-Since')):
+            # werkzeug 304 yanıtlarında gövdeyi ve içerik başlıklarını göndermez
+            response.status_code = 304
+    return response
+
+@forecast_ns.errorhandler(WeatherError)
+@weather_ns.errorhandler(WeatherError)
+def handle_weather_error(error):
+    """Servis hattı hatalarını api.abort ile aynı gövdeye çevir (503'lerde Retry-After)"""
+    headers = {}
+    if error.retry_after is not None:
+        headers['Retry-After'] = str(max(1, math.ceil(error.retry_after)))
+    return {'message': error.message}, error.status, headers
+
+def fetch_weather(city):
+    """Şehir için hava durumunu paylaşılan servis hattından getir
+
+    Önbellek durumu X-Cache ve Age başlıkları için istek bağlamına yazılır.
+    """
+    cache_info = {}
+    try:
+        return weather_service.get(city, cache_info)
+    finally:
+        _record_cache(cache_info)
+
+def fetch_weather_by_coords(lat, lon):
+    """Koordinat için hava durumunu en yakın bilinen şehrin kaydından getir"""
+    cache_info = {}
+    try:
+        return weather_service.get_by_coords(lat, lon, cache_info)
+    finally:
+        _record_cache(cache_info)
+
+def fetch_forecast(city, args):
+    """Şehrin tahmin serisini getir ve istenen pencere/alanlarla yanıtı oluştur"""
+    # Geçersiz sorgu upstream'e gidilmeden reddedilir
+    query = clean_forecast_query(args['fields'], args['start'], args['end'], args['hours'])
+    cache_info = {}
+    try:
+        series = weather_service.get_forecast(city, cache_info)
+    finally:
+        _record_cache(cache_info)
+    return build_forecast_response(series, *query)
+
+def _record_cache(cache_info):
+    """Önbellek durumunu X-Cache ve Age başlıkları için istek bağlamına yaz"""
+    if cache_info and has_app_context():
+        g.cache_status = cache_info['status']
+        g.cache_age = cache_info['age']
+
+def _conditional(result):
+    """Tekil şehir yanıtını koşullu istek başlıkları için kaydet"""
+    g.weather_result = result
+    return result
+
+def _service_metrics():
+    """/metrics okunurken devre kesici, kota ve önbellek değerleri"""
+    circuit = upstream_breaker.stats()
+    for state in (CLOSED, HALF_OPEN, OPEN):
+        yield ('upstream_circuit_state', GAUGE, 'Devre kesici durumu (1 = etkin durum)',
+               {'state': state}, int(circuit['state'] == state))
+    yield ('upstream_circuit_opened_total', COUNTER, 'Devrenin açılma sayısı', {}, circuit['opened'])
+    yield ('upstream_circuit_rejected_total', COUNTER, 'Devre açıkken reddedilen çağrılar', {}, circuit['rejected'])
+
+    quota = upstream_quota.stats()
+    for name, bucket in quota['buckets'].items():
+        yield ('upstream_quota_tokens', GAUGE, 'Kota kovasında kalan token', {'bucket': name}, bucket['tokens'])
+    yield ('upstream_quota_rejected_total', COUNTER, 'Kota nedeniyle gönderilmeyen çağrılar',
+           {'priority': 'user'}, quota['rejected'])
+    yield ('upstream_quota_rejected_total', COUNTER, 'Kota nedeniyle gönderilmeyen çağrılar',
+           {'priority': 'background'}, quota['background_rejected'])
+
+    cache = weather_cache.stats()
+    if cache.get('entries') is not None:
+        yield ('cache_entries', GAUGE, 'Önbellekteki kayıt sayısı', {}, cache['entries'])
+
+def hedge_metrics(policy):
+    """Upstream istemcisinin hedge ve zaman aşımı değerlerini metrik demetleri olarak üret"""
+    latency = policy.stats()
+    yield ('upstream_hedges_total', COUNTER, 'Gönderilen hedged istekler', {}, latency['hedges'])
+    yield ('upstream_hedge_wins_total', COUNTER, 'İlk denemeden önce dönen hedged istekler', {},
+           latency['hedge_wins'])
+    yield ('upstream_read_timeout_seconds', GAUGE, 'Güncel upstream okuma zaman aşımı', {},
+           latency['read_timeout'])
+
+def admission_metrics(controller):
+    """Kabul kontrolü değerlerini metrik demetleri olarak üret"""
+    admission = controller.stats()
+    yield ('admission_in_flight', GAUGE, 'Kabul edilmiş, süren upstream çağrıları', {}, admission['in_flight'])
+    yield ('admission_queued', GAUGE, 'Kabul kuyruğunda bekleyen istekler', {}, admission['queued'])
+    for reason, key in (('queue_full', 'rejected_queue_full'), ('queue_timeout', 'rejected_timeout'),
+                        ('background', 'rejected_background')):
+        yield ('admission_rejected_total', COUNTER, 'Kabul kontrolünün reddettiği istekler',
+               {'reason': reason}, admission[key])
+
+metrics.register_collector('service', _service_metrics)
+metrics.register_collector('admission', lambda: admission_metrics(weather_admission))
+metrics.register_collector('hedging', lambda: hedge_metrics(upstream_client.policy))
+
+# Popüler şehirleri süreleri dolmadan yenileyen ısıtıcı (servis hattının sıklık skorlarını kullanır).
+# Modül içe aktarılırken değil, Flask isteklerini sunan süreçte başlatılır: app_async bu modülü
+# yalnızca modeller için içe aktarır, gunicorn işçileri de fork sonrası kendi ısıtıcısını açar.
+_warmer_lock = threading.Lock()
+_warmer_started = False
+
+@app.before_request
+def start_warmer():
+    global _warmer_started
+    if _warmer_started or not WARMER_ENABLED:
+        return
+    with _warmer_lock:
+        if not _warmer_started:
+            cache_warmer.start()
+            _warmer_started = True
+
+def fetch_weather_batch(cities):
+    """Birden fazla şehrin hava durumunu sınırlı iş parçacığı havuzunda eşzamanlı getir
+
+    Önbellekte olmayan ve OpenWeather ID'si bilinen şehirler 20'şerli /group
+    çağrılarıyla, ID'si bilinmeyenler tekil çağrılarla getirilir. Her şehir
+    bağımsız değerlendirilir: bulunamayan ya da zaman aşımına uğrayan bir
+    şehir yalnızca kendi hatasını üretir, toplu yanıtın geri kalanını bozmaz.
+    """
+    if not cities:
+        api.abort(400, 'Lütfen en az bir şehir ismi giriniz.')
+    if len(cities) > BATCH_MAX_CITIES:
+        api.abort(400, f'Tek istekte en fazla {BATCH_MAX_CITIES} şehir sorgulanabilir.')
+
+    deadline = time.monotonic() + BATCH_TIMEOUT
+
+    # Aynı şehrin farklı yazımları tek bir iş olarak çalıştırılır
+    jobs = []
+    seen = set()
+    resolved = {}
+    futures = {}
+    grouped = []
+    for city in cities:
+        city = city.strip() if isinstance(city, str) else ''
+        key = make_key(city) if len(city) >= 2 else None
+        jobs.append((city, key))
+        if key is None or key in seen:
+            continue
+        seen.add(key)
+
+        cached = weather_cache.get(key)
+        if cached is not None:
+            metrics.inc('cache_lookups_total', result='hit')
+            resolved[key] = cached
+            continue
+
+        city_id = city_resolver.resolve(city)
+        if city_id is None:
+            futures[key] = batch_executor.submit(fetch_weather, city)
+        else:
+            grouped.append((key, city, city_id))
+
+    group_futures = [(chunk, batch_executor.submit(weather_service.fetch_group, chunk))
+                     for chunk in chunked(grouped)]
+    wait([f for _, f in group_futures], timeout=max(0, deadline - time.monotonic()))
+
+    # /group yanıtında eksik kalan ya da başarısız olan şehirleri tek tek getir
+    for chunk, future in group_futures:
+        found = {}
+        if future.done() and future.exception() is None:
+            found = future.result()
+        elif not future.done():
+            future.cancel()
+        resolved.update(found)
+        for key, city, _ in chunk:
+            if key not in found:
+                futures[key] = batch_executor.submit(fetch_weather, city)
+
+    _, pending = wait(futures.values(), timeout=max(0, deadline - time.monotonic()))
+
+    results = []
+    errors = []
+    for city, key in jobs:
+        future = futures.get(key)
+        if key in resolved:
+            results.append(resolved[key])
+        elif future is None:
+            errors.append({'city': city, 'status': 400, 'error': INVALID_CITY_MESSAGE})
+        elif future in pending:
+            future.cancel()
+            errors.append({'city': city, 'status': 504, 'error': TIMEOUT_MESSAGE})
+        else:
+            try:
+                results.append(future.result())
+            except WeatherError as e:
+                errors.append({'city': city, 'status': e.status, 'error': e.message})
+            except Exception as e:
+                errors.append({'city': city, 'status': 500, 'error': f"Beklenmeyen bir hata oluştu: {str(e)}"})
+
+    return {
+        'success': not errors,
+        'requested': len(jobs),
+        'succeeded': len(results),
+        'failed': len(errors),
+        'results': results,
+        'errors': errors
+    }
+
 # Hava durumu endpoint'i
 @weather_ns.route('')
 class Weather(Resource):
     @api.expect(weather_parser)
-    @api.marshal_with(weather_response, code=200)
+    @marshal_fast(weather_response, code=200)
     @api.response(400, 'Geçersiz parametre', error_response)
+    @api.response(304, 'Değişmedi (If-None-Match / If-Modified-Since)')
     @api.response(404, 'Şehir bulunamadı', error_response)
     @api.response(500, 'Sunucu hatası', error_response)
     def get(self):
@@ -99,79 +497,66 @@ class Weather(Resource):
         Türkçe açıklamalar ve metrik birimler (°C, km/h) kullanır.
         """
         args = weather_parser.parse_args()
-        city = args['city']
-
-        # Şehir ismini temizle
-        if not city or len(city.strip()) < 2:
-            api.abort(400, 'Lütfen geçerli bir şehir ismi giriniz.')
-
-        city = city.strip()
-
-        try:
-            # OpenWeather API'ye istek gönder
-            url = f"http://api.openweathermap.org/data/2.5/weather"
-            params = {
-                'q': city,
-                'appid': API_KEY,
-                'units': 'metric',
-                'lang': 'tr'
-            }
+        return _conditional(fetch_weather(args['city']))
 
-            response = requests.get(url, params=params, timeout=10)
-
-            # API yanıt kontrolü
-            if response.status_code == 404:
-                api.abort(404, f"'{city}' şehri bulunamadı. Lütfen şehir ismini kontrol edin.")
-            elif response.status_code == 401:
-                api.abort(500, "API anahtarı geçersiz.")
-            elif response.status_code != 200:
-                api.abort(500, f"Hava durumu servisi hatası: {response.status_code}")
-
-            # JSON verisini çözümle
-            data = response.json()
-
-            # Hava durumu bilgilerini çıkar
-            weather_desc = data['weather'][0]['description'].title()
-            temp = round(data['main']['temp'])
-            humidity = data['main']['humidity']
-            wind_speed = round(data['wind']['speed'] * 3.6, 1)
-            feels_like = round(data['main']['feels_like'])
-
-            # Şehir ismini düzelt
-            city_name = data['name']
-            country = data['sys']['country']
-
-            # Türkçe yanıt oluştur
-            message = (f"{city_name} ({country})'da hava sıcaklığı {temp}°C "
-                      f"(hissedilen {feels_like}°C), nem oranı %{humidity}, "
-                      f"rüzgar hızı {wind_speed} km/h ve hava durumu: {weather_desc}.")
-
-            return {
-                "success": True,
-                "city": city_name,
-                "country": country,
-                "message": message,
-                "details": {
-                    "temperature": temp,
-                    "feels_like": feels_like,
-                    "humidity": humidity,
-                    "wind_speed_kmh": wind_speed,
-                    "description": weather_desc,
-                    "icon": data['weather'][0]['icon']
-                }
-            }
+# Koordinatla hava durumu endpoint'i
+@weather_ns.route('/coords')
+class WeatherByCoords(Resource):
+    @api.expect(coords_parser)
+    @marshal_fast(weather_response, code=200)
+    @api.response(400, 'Geçersiz parametre', error_response)
+    @api.response(304, 'Değişmedi (If-None-Match / If-Modified-Since)')
+    @api.response(404, 'Konum bulunamadı', error_response)
+    @api.response(500, 'Sunucu hatası', error_response)
+    def get(self):
+        """Koordinat için güncel hava durumu bilgilerini getir
 
-        except requests.exceptions.Timeout:
-            api.abort(504, "Hava durumu servisi yanıt vermiyor. Lütfen daha sonra tekrar deneyin.")
-        except requests.exceptions.ConnectionError:
-            api.abort(503, "İnternet bağlantısı sorunu. Lütfen bağlantınızı kontrol edin.")
-        except Exception as e:
-            api.abort(500, f"Beklenmeyen bir hata oluştu: {str(e)}")
+        Koordinat en yakın bilinen şehre (GEO_MAX_DISTANCE_KM içinde) ya da
+        ızgara hücresine eşlenir; yakın konumlardan gelen istekler aynı
+        önbellek kaydını paylaşır.
+        """
+        args = coords_parser.parse_args()
+        return _conditional(fetch_weather_by_coords(args['lat'], args['lon']))
+
+# Toplu hava durumu endpoint'i
+@weather_ns.route('/batch')
+class WeatherBatch(Resource):
+    @api.expect(batch_parser)
+    @api.marshal_with(batch_response, code=200)
+    @api.response(400, 'Geçersiz parametre', error_response)
+    def get(self):
+        """Birden fazla şehir için hava durumu (virgülle ayrılmış liste)
+
+        Şehirler sınırlı bir iş parçacığı havuzunda eşzamanlı olarak getirilir.
+        Her şehir için sonuç ya da hata ayrı ayrı döndürülür.
+        """
+        args = batch_parser.parse_args()
+        # Ülke ekli isimler ("Istanbul,TR") için ';' ayırıcısı da kabul edilir
+        separator = ';' if ';' in args['cities'] else ','
+        cities = [city for city in args['cities'].split(separator) if city.strip()]
+        return fetch_weather_batch(cities)
+
+    @api.expect(batch_request)
+    @api.marshal_with(batch_response, code=200)
+    @api.response(400, 'Geçersiz parametre', error_response)
+    def post(self):
+        """Birden fazla şehir için hava durumu (JSON liste)
+
+        Gövde olarak şehir listesi (`["Istanbul", "Ankara"]`) ya da
+        `{"cities": [...]}` nesnesi kabul edilir.
+        """
+        body = request.get_json(silent=True)
+        if isinstance(body, dict):
+            body = body.get('cities')
+        if not isinstance(body, list):
+            api.abort(400, 'Lütfen şehir isimlerini JSON liste olarak gönderiniz.')
+        return fetch_weather_batch(body)
 
 # Şehir adı ile direkt erişim endpoint'i
 @weather_ns.route('/<string:city>')
 class WeatherByCity(Resource):
-    @api.marshal_with(weather_response, code=200)
+    @marshal_fast(weather_response, code=200)
+    @api.response(304, 'Değişmedi (If-None-Match / If-Modified-Since)')
     @api.response(404, 'Şehir bulunamadı', error_response)
     @api.response(500, 'Sunucu hatası', error_response)
     def get(self, city):
@@ -179,72 +564,24 @@ class WeatherByCity(Resource):
 
         Alternatif endpoint: Şehir adını URL'de parametre olarak geçirin.
         """
-        # Şehir ismini temizle
-        if not city or len(city.strip()) < 2:
-            api.abort(400, 'Lütfen geçerli bir şehir ismi giriniz.')
-
-        city = city.strip()
-
-        try:
-            # OpenWeather API'ye istek gönder
-            url = f"http://api.openweathermap.org/data/2.5/weather"
-            params = {
-                'q': city,
-                'appid': API_KEY,
-                'units': 'metric',
-                'lang': 'tr'
-            }
+        return _conditional(fetch_weather(city))
 
-            response = requests.get(url, params=params, timeout=10)
-
-            # API yanıt kontrolü
-            if response.status_code == 404:
-                api.abort(404, f"'{city}' şehri bulunamadı. Lütfen şehir ismini kontrol edin.")
-            elif response.status_code == 401:
-                api.abort(500, "API anahtarı geçersiz.")
-            elif response.status_code != 200:
-                api.abort(500, f"Hava durumu servisi hatası: {response.status_code}")
-
-            # JSON verisini çözümle
-            data = response.json()
-
-            # Hava durumu bilgilerini çıkar
-            weather_desc = data['weather'][0]['description'].title()
-            temp = round(data['main']['temp'])
-            humidity = data['main']['humidity']
-            wind_speed = round(data['wind']['speed'] * 3.6, 1)
-            feels_like = round(data['main']['feels_like'])
-
-            # Şehir ismini düzelt
-            city_name = data['name']
-            country = data['sys']['country']
-
-            # Türkçe yanıt oluştur
-            message = (f"{city_name} ({country})'da hava sıcaklığı {temp}°C "
-                      f"(hissedilen {feels_like}°C), nem oranı %{humidity}, "
-                      f"rüzgar hızı {wind_speed} km/h ve hava durumu: {weather_desc}.")
-
-            return {
-                "success": True,
-                "city": city_name,
-                "country": country,
-                "message": message,
-                "details": {
-                    "temperature": temp,
-                    "feels_like": feels_like,
-                    "humidity": humidity,
-                    "wind_speed_kmh": wind_speed,
-                    "description": weather_desc,
-                    "icon": data['weather'][0]['icon']
-                }
-            }
+# Hava tahmini endpoint'i
+@forecast_ns.route('/<string:city>')
+class Forecast(Resource):
+    @api.expect(forecast_parser)
+    @api.response(200, 'Başarılı', forecast_response)
+    @api.response(400, 'Geçersiz parametre', error_response)
+    @api.response(404, 'Şehir bulunamadı', error_response)
+    @api.response(500, 'Sunucu hatası', error_response)
+    def get(self, city):
+        """Şehir için 5 günlük / 3 saatlik hava tahmini
 
-        except requests.exceptions.Timeout:
-            api.abort(504, "Hava durumu servisi yanıt vermiyor. Lütfen daha sonra tekrar deneyin.")
-        except requests.exceptions.ConnectionError:
-            api.abort(503, "İnternet bağlantısı sorunu. Lütfen bağlantınızı kontrol edin.")
-        except Exception as e:
-            api.abort(500, f"Beklenmeyen bir hata oluştu: {str(e)}")
+        Zaman penceresi start/end (Unix zamanı) ya da hours ile daraltılır;
+        fields ile yalnızca istenen alanlar döndürülür (time her zaman vardır).
+        Örnek: /api/v1/forecast/Istanbul?hours=24&fields=temperature,description
+        """
+        return fetch_forecast(city, forecast_parser.parse_args())
 
 if __name__ == '__main__':
     # Cloud deployment için port konfigürasyonu (Render, Railway, Heroku uyumlu)
@@ -259,6 +596,11 @@ if __name__ == '__main__':
     print(f"🌐 Port: {port}")
     print("🔄 Çıkmak için Ctrl+C")
 
+    # Sabit ısıtma listesi ilk istek beklenmeden ısıtılır (debug modunda yeniden yükleyicinin
+    # izleyici süreci istek sunmaz; ısıtıcı orada ilk istekte başlar)
+    if not debug_mode:
+        start_warmer()
+
     # Production server için Gunicorn kullanımı önerilir
     app.run(
         debug=debug_mode,
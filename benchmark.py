@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+Hava Durumu API'si performans karşılaştırma scripti.
+
+Yerel bir OpenWeather stub'ı başlatır, uygulamaları bu stub'a yönlendirerek
+ayrı süreçlerde çalıştırır ve eşzamanlı yük altında throughput ile
+p50/p95/p99 gecikmelerini ölçer.
+
+Hedefler:
+    flask  - app_swagger_fixed.py (threaded Flask, mevcut üretim yolu)
+    async  - app_async.py (asyncio/ASGI, engellemeyen upstream istemcisi)
+
+Senaryolar:
+    cold    - her istek farklı bir şehir; tüm istekler upstream'e gider
+    hot     - tüm istekler aynı şehir; önbellekten yanıtlanır
+    failure - her istek farklı bir şehir, stub --failure-rate oranında 5xx
+              döner (devre kesici ve hata yolunun maliyeti); her zaman en
+              son çalıştırılır
+
+--compare-hedging her hedefi hedged istekler kapalı ve açık olarak iki kez
+çalıştırır ve upstream gecikme histogramlarını (uygulamanın /stats
+çıktısından) yan yana raporlar. Uzun kuyruk için stub'ın --slow-ratio ve
+--slow-latency seçenekleri kullanılır.
+
+Sonuçlar --output ile JSON olarak kaydedilir; --compare önceki bir JSON
+dosyasıyla throughput ve p99 farklarını yazdırır.
+
+Örnek:
+    python benchmark.py --targets flask,async --requests 2000 --concurrency 200
+    python benchmark.py --scenarios cold --latency 0.05 --slow-ratio 0.05 --compare-hedging
+    python benchmark.py --scenarios hot,cold,failure --output before.json
+    python benchmark.py --scenarios hot,cold,failure --output after.json --compare before.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from urllib.parse import urlencode, urlsplit
+from urllib.request import urlopen
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+TARGETS = {
+    'flask': [sys.executable, os.path.join(ROOT, 'app_swagger_fixed.py')],
+    'async': [sys.executable, os.path.join(ROOT, 'app_async.py')],
+}
+
+SCENARIOS = ('hot', 'cold', 'failure')
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port, timeout=15):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.2):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Port {port} {timeout} saniyede açılmadı")
+
+
+def start_process(command, env):
+    return subprocess.Popen(command, env=env, cwd=ROOT,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def percentile(values, pct):
+    """Sıralı listede yüzdelik değeri (en yakın sıra yöntemi)"""
+    if not values:
+        return 0.0
+    index = max(0, min(len(values) - 1, int(round(pct / 100 * len(values) + 0.5)) - 1))
+    return values[index]
+
+
+def summarize(latencies, statuses, elapsed):
+    latencies = sorted(latencies)
+    return {
+        'requests': len(latencies),
+        'errors': sum(1 for status in statuses if status != 200),
+        'statuses': {str(status): count for status, count in sorted(Counter(statuses).items())},
+        'elapsed_s': round(elapsed, 3),
+        'throughput_rps': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'mean_ms': round(statistics.mean(latencies) * 1000, 1) if latencies else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 1),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 1),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 1),
+        'max_ms': round(latencies[-1] * 1000, 1) if latencies else 0.0
+    }
+
+
+async def http_get(conn, host, port, path):
+    """Tek bağlantı üzerinden keep-alive GET isteği gönder; (durum, bağlantı) döndür
+
+    httpx havuzu yüzlerce keep-alive bağlantıda ölçülen sunucudan daha fazla
+    CPU harcadığı için yük üretici her işçiye tek bir ham bağlantı açar.
+    """
+    if conn is None:
+        conn = await asyncio.open_connection(host, port)
+    reader, writer = conn
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}:{port}\r\n\r\n".encode('utf-8'))
+    await writer.drain()
+
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError('Sunucu bağlantıyı kapattı')
+    version, status = status_line.split(b' ', 2)[:2]
+    length = 0
+    chunked = False
+    keep_alive = version == b'HTTP/1.1'
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        name = name.strip().lower()
+        if name == 'content-length':
+            length = int(value)
+        elif name == 'transfer-encoding':
+            chunked = 'chunked' in value.lower()
+        elif name == 'connection':
+            keep_alive = value.strip().lower() == 'keep-alive'
+    if chunked:
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    elif length:
+        await reader.readexactly(length)
+
+    if not keep_alive:
+        writer.close()
+        conn = None
+    return int(status), conn
+
+
+async def run_load(base_url, paths, concurrency):
+    """Yolları `concurrency` eşzamanlı işçiyle (closed-loop) gönder"""
+    url = urlsplit(base_url)
+    latencies = []
+    statuses = []
+    queue = iter(paths)
+
+    async def worker():
+        conn = None
+        for path in queue:
+            started = time.perf_counter()
+            try:
+                status, conn = await http_get(conn, url.hostname, url.port, path)
+            except (OSError, ValueError, asyncio.IncompleteReadError):
+                status, conn = 0, None
+            latencies.append(time.perf_counter() - started)
+            statuses.append(status)
+        if conn is not None:
+            conn[1].close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    return summarize(latencies, statuses, elapsed)
+
+
+def scenario_paths(scenario, count, run_id):
+    if scenario in ('cold', 'failure'):
+        return [f"/api/v1/weather?city=bench-{run_id}-{i}" for i in range(count)]
+    if scenario == 'hot':
+        return ["/api/v1/weather?city=Istanbul"] * count
+    raise ValueError(f"Bilinmeyen senaryo: {scenario}")
+
+
+def stub_config(stub_url, **settings):
+    """Çalışan stub'ın ayarlarını değiştir (örn. error_rate=1.0)"""
+    url = urlsplit(stub_url)
+    with urlopen(f"{url.scheme}://{url.netloc}/__stub/config?{urlencode(settings)}", timeout=10) as response:
+        return json.load(response)
+
+
+def benchmark_target(target, stub_url, scenarios, count, concurrency, env_overrides=None,
+                     failure_rate=1.0, error_rate=0.0):
+    """Hedefi ayrı süreçte başlat, senaryoları çalıştır; (sonuçlar, upstream istatistikleri) döndür
+
+    Hata senaryosu açılan devre kesicinin sonraki senaryoları etkilememesi
+    için en son çalıştırılır.
+    """
+    scenarios = sorted(scenarios, key=lambda scenario: scenario == 'failure')
+    port = free_port()
+    # Kota ve ısıtıcı ölçümü bozmasın diye kapatılır
+    env = dict(os.environ, PORT=str(port), OPENWEATHER_API_KEY=os.getenv('OPENWEATHER_API_KEY', 'benchmark'),
+               OPENWEATHER_BASE_URL=stub_url, FLASK_DEBUG='False', UPSTREAM_QUOTA_PER_MINUTE='0',
+               WARMER_ENABLED='False')
+    env.update(env_overrides or {})
+    process = start_process(TARGETS[target], env)
+    try:
+        wait_for_port(port)
+        base_url = f"http://127.0.0.1:{port}"
+        results = {}
+        for scenario in scenarios:
+            paths = scenario_paths(scenario, count, f"{target}-{time.time_ns()}")
+            # Sıcak senaryo için önbelleği doldur
+            if scenario == 'hot':
+                asyncio.run(run_load(base_url, paths[:1], 1))
+            if scenario == 'failure':
+                stub_config(stub_url, error_rate=failure_rate)
+            try:
+                results[scenario] = asyncio.run(run_load(base_url, paths, concurrency))
+            finally:
+                if scenario == 'failure':
+                    stub_config(stub_url, error_rate=error_rate)
+        with urlopen(f"{base_url}/api/v1/stats", timeout=10) as response:
+            upstream = json.load(response)['upstream']
+        return results, upstream
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def print_histograms(label, upstream):
+    """Upstream deneme ve etkin (çağıranın gördüğü) gecikme histogramlarını yazdır"""
+    latency = upstream.get('latency', {})
+    print(f"  {label}: hedge={latency.get('hedges', 0)} (kazanan {latency.get('hedge_wins', 0)}), "
+          f"okuma zaman aşımı {latency.get('read_timeout')}s")
+    for name in ('latency', 'effective_latency'):
+        stats = latency.get(name, {})
+        buckets = ' '.join(f"{bound}:{count}" for bound, count in stats.get('histogram', {}).items() if count)
+        print(f"    {name:<18} p50 {stats.get('p50_ms')}ms p95 {stats.get('p95_ms')}ms "
+              f"p99 {stats.get('p99_ms')}ms | {buckets}")
+
+
+def compare_results(baseline_path, report):
+    """Önceki bir JSON sonucuyla throughput ve p99 farklarını yazdır"""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)
+    print(f"\n🔁 Karşılaştırma: {baseline_path} ({baseline.get('meta', {}).get('timestamp', '?')})")
+    print(f"{'hedef':<12} {'senaryo':<8} {'rps':>18} {'p99 ms':>20}")
+    for label, scenarios in report['results'].items():
+        for scenario, result in scenarios.items():
+            before = baseline.get('results', {}).get(label, {}).get(scenario)
+            if before is None:
+                continue
+            print(f"{label:<12} {scenario:<8} "
+                  f"{_delta(before['throughput_rps'], result['throughput_rps']):>18} "
+                  f"{_delta(before['p99_ms'], result['p99_ms']):>20}")
+
+
+def _delta(before, after):
+    change = f"{(after - before) / before * 100:+.1f}%" if before else 'n/a'
+    return f"{before}→{after} ({change})"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Hava Durumu API performans karşılaştırması')
+    parser.add_argument('--targets', default='flask,async', help='Virgülle ayrılmış hedefler (flask, async)')
+    parser.add_argument('--scenarios', default='cold,hot',
+                        help='Virgülle ayrılmış senaryolar (cold, hot, failure)')
+    parser.add_argument('--requests', type=int, default=1000, help='Senaryo başına istek sayısı')
+    parser.add_argument('--concurrency', type=int, default=100, help='Eşzamanlı istemci sayısı')
+    parser.add_argument('--latency', type=float, default=0.2, help='Stub upstream gecikmesi (saniye)')
+    parser.add_argument('--slow-ratio', type=float, default=0.0, help='Stub\'ın yavaş yanıtladığı istek oranı')
+    parser.add_argument('--slow-latency', type=float, default=2.0, help='Stub\'ın yavaş yanıt gecikmesi (saniye)')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='Stub\'ın tüm senaryolarda 5xx döndürdüğü istek oranı')
+    parser.add_argument('--error-status', type=int, default=500, help='Stub hata yanıtlarının durum kodu')
+    parser.add_argument('--failure-rate', type=float, default=1.0,
+                        help='failure senaryosunda stub\'ın 5xx döndürdüğü istek oranı')
+    parser.add_argument('--payloads', help='Stub için şehir ismi -> OpenWeather yanıtı JSON dosyası')
+    parser.add_argument('--seed', type=int, default=0, help='Stub rastgelelik tohumu')
+    parser.add_argument('--compare-hedging', action='store_true',
+                        help='Her hedefi hedged istekler kapalı/açık olarak çalıştır')
+    parser.add_argument('--output', help='Sonuçların yazılacağı JSON dosyası')
+    parser.add_argument('--compare', help='Karşılaştırılacak önceki JSON sonuç dosyası')
+    args = parser.parse_args()
+
+    scenarios = [s.strip() for s in args.scenarios.split(',') if s.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Bilinmeyen senaryo: {', '.join(sorted(unknown))}")
+
+    stub_port = free_port()
+    stub_command = [sys.executable, os.path.join(ROOT, 'stub_openweather.py'),
+                    '--port', str(stub_port), '--latency', str(args.latency),
+                    '--slow-ratio', str(args.slow_ratio), '--slow-latency', str(args.slow_latency),
+                    '--error-rate', str(args.error_rate), '--error-status', str(args.error_status),
+                    '--seed', str(args.seed)]
+    if args.payloads:
+        stub_command += ['--payloads', os.path.abspath(args.payloads)]
+    stub = start_process(stub_command, dict(os.environ))
+    try:
+        wait_for_port(stub_port)
+        stub_url = f"http://127.0.0.1:{stub_port}/data/2.5"
+        variants = [('', None)]
+        if args.compare_hedging:
+            variants = [('', {'UPSTREAM_HEDGE': 'False'}), ('+hedge', {'UPSTREAM_HEDGE': 'True'})]
+
+        print(f"🏁 {args.requests} istek, {args.concurrency} eşzamanlı istemci, upstream gecikmesi {args.latency}s"
+              f" (%{args.slow_ratio * 100:g} istek {args.slow_latency}s)\n")
+        print(f"{'hedef':<12} {'senaryo':<8} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'hata':>6}")
+        histograms = []
+        report = {
+            'meta': {
+                'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                'commit': _git_commit(),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'cpus': os.cpu_count(),
+                'args': vars(args)
+            },
+            'results': {},
+            'upstream': {}
+        }
+        for target in [t.strip() for t in args.targets.split(',') if t.strip()]:
+            for suffix, overrides in variants:
+                label = target + suffix
+                results, upstream = benchmark_target(target, stub_url, scenarios, args.requests,
+                                                     args.concurrency, overrides,
+                                                     failure_rate=args.failure_rate, error_rate=args.error_rate)
+                histograms.append((label, upstream))
+                report['results'][label] = results
+                report['upstream'][label] = upstream
+                for scenario, result in results.items():
+                    print(f"{label:<12} {scenario:<8} {result['throughput_rps']:>8} {result['p50_ms']:>8} "
+                          f"{result['p95_ms']:>8} {result['p99_ms']:>8} {result['errors']:>6}")
+
+        if args.compare_hedging:
+            print("\n📊 Upstream gecikme histogramları")
+            for label, upstream in histograms:
+                print_histograms(label, upstream)
+
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            print(f"\n💾 Sonuçlar kaydedildi: {args.output}")
+        if args.compare:
+            compare_results(args.compare, report)
+    finally:
+        stub.terminate()
+        stub.wait(timeout=10)
+
+
+if __name__ == '__main__':
+    main()
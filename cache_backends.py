@@ -0,0 +1,314 @@
+"""
+Birden fazla worker süreci arasında paylaşılan önbellek backend'leri.
+
+Üretimde aynı makinede birkaç worker süreci çalışır; süreç içi TTLCache her
+worker'da ayrı ve soğuk kalır. Bu modüldeki backend'ler TTLCache ile aynı
+arayüzü (get, get_entry, set, delete, clear, stats) sunar:
+
+- SQLiteCache: WAL modunda SQLite dosyası. Aynı makinedeki tüm worker'lar
+  aynı dosyayı okur/yazar; dosya yeniden başlatmalardan sonra da kalır.
+- RedisCache: Redis benzeri bir sunucu (ya da yerel bir yedek/stand-in
+  istemci). `redis` paketi isteğe bağlıdır ve yalnızca bu backend
+  seçildiğinde import edilir.
+
+Süreçler arası paylaşım için yaş hesapları time.monotonic() yerine duvar
+saati (time.time()) ile yapılır. Değerler JSON olarak saklanır; süreç içi
+önbellekte byte olarak tutulan alanlar (serileştirilmiş gövde, sıkıştırılmış
+varyantlar) yazarken base64 metnine çevrilir ve okurken bir kez geri açılır.
+"""
+
+import base64
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from weather_cache import CacheEntry
+
+SQLITE_PATH = os.getenv('WEATHER_CACHE_SQLITE_PATH', 'weather_cache.sqlite3')
+REDIS_URL = os.getenv('WEATHER_CACHE_REDIS_URL', 'redis://localhost:6379/0')
+
+# Erişim zamanı bu kadar saniyede bir güncellenir (her okumada yazma yapmamak için)
+_TOUCH_INTERVAL = 30
+# Her bu kadar yazmada bir süresi dolmuş ve fazla kayıtlar temizlenir
+_PRUNE_EVERY = 32
+
+
+# JSON'da byte değerlerini işaretleyen anahtar
+_BYTES_KEY = '$bytes'
+
+
+def _encode_bytes(value):
+    if isinstance(value, (bytes, bytearray)):
+        return {_BYTES_KEY: base64.b64encode(value).decode('ascii')}
+    raise TypeError(f"JSON'a çevrilemeyen değer: {type(value).__name__}")
+
+
+def _decode_bytes(obj):
+    if len(obj) == 1 and _BYTES_KEY in obj:
+        return base64.b64decode(obj[_BYTES_KEY])
+    return obj
+
+
+def dumps(value):
+    """Değeri JSON metnine çevir (byte alanları base64 olarak)"""
+    return json.dumps(value, ensure_ascii=False, default=_encode_bytes)
+
+
+def loads(raw):
+    """dumps çıktısını değere geri çevir (byte alanları byte olarak döner)"""
+    return json.loads(raw, object_hook=_decode_bytes)
+
+
+class _Counters:
+    """Süreç içi hit/miss sayaçları"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def add(self, name, count=1):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + count)
+
+    def snapshot(self):
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.misses
+            return {
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+class SQLiteCache:
+    """WAL modunda SQLite dosyası kullanan, süreçler arası paylaşılan TTL önbelleği"""
+
+    def __init__(self, path=SQLITE_PATH, namespace='weather', ttl=300,
+                 max_entries=1000, max_age=None):
+        self.path = path
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_age = ttl if max_age is None else max(ttl, max_age)
+        self.max_entries = max_entries
+        self.counters = _Counters()
+        self._local = threading.local()
+        self._writes = 0
+        self._writes_lock = threading.Lock()
+        self._init_schema()
+
+    def _connect(self):
+        """İş parçacığına özel bağlantıyı döndür (sqlite3 bağlantıları paylaşılmaz)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA busy_timeout=5000')
+            self._local.conn = conn
+        return conn
+
+    def _init_schema(self):
+        conn = self._connect()
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                stored_at REAL NOT NULL,
+                fresh_until REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_cache_expires '
+                     'ON cache_entries (namespace, expires_at)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_cache_accessed '
+                     'ON cache_entries (namespace, accessed_at)')
+
+    def get(self, key):
+        """Anahtarın taze değerini döndür; yoksa veya bayatsa None"""
+        entry = self.get_entry(key)
+        if entry is None or not entry.fresh:
+            return None
+        return entry.value
+
+    def get_entry(self, key):
+        """Anahtarın kaydını (taze ya da bayat) CacheEntry olarak döndür"""
+        now = time.time()
+        conn = self._connect()
+        row = conn.execute(
+            'SELECT value, stored_at, fresh_until, expires_at, accessed_at '
+            'FROM cache_entries WHERE namespace = ? AND key = ?',
+            (self.namespace, key)).fetchone()
+        if row is None:
+            self.counters.add('misses')
+            return None
+
+        value, stored_at, fresh_until, expires_at, accessed_at = row
+        if expires_at <= now:
+            conn.execute('DELETE FROM cache_entries WHERE namespace = ? AND key = ?',
+                         (self.namespace, key))
+            self.counters.add('expirations')
+            self.counters.add('misses')
+            return None
+
+        if now - accessed_at > _TOUCH_INTERVAL:
+            conn.execute('UPDATE cache_entries SET accessed_at = ? WHERE namespace = ? AND key = ?',
+                         (now, self.namespace, key))
+
+        fresh = now < fresh_until
+        self.counters.add('hits' if fresh else 'stale_hits')
+        return CacheEntry(loads(value), max(0.0, now - stored_at), fresh)
+
+    def set(self, key, value, ttl=None):
+        """Değeri önbelleğe yaz; belirli aralıklarla fazla kayıtları temizle"""
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        now = time.time()
+        payload = dumps(value)
+        self._connect().execute(
+            'INSERT OR REPLACE INTO cache_entries '
+            '(namespace, key, value, size, stored_at, fresh_until, expires_at, accessed_at) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            (self.namespace, key, payload, len(payload.encode('utf-8')), now,
+             now + ttl, now + max(ttl, self.max_age), now))
+
+        with self._writes_lock:
+            self._writes += 1
+            prune = self._writes % _PRUNE_EVERY == 0
+        if prune:
+            self.prune()
+
+    def prune(self):
+        """Süresi dolmuş kayıtları sil ve kayıt sayısını max_entries'e indir (LRU)"""
+        conn = self._connect()
+        expired = conn.execute('DELETE FROM cache_entries WHERE namespace = ? AND expires_at <= ?',
+                               (self.namespace, time.time())).rowcount
+        self.counters.add('expirations', max(expired, 0))
+        evicted = conn.execute(
+            'DELETE FROM cache_entries WHERE namespace = ? AND key IN ('
+            '  SELECT key FROM cache_entries WHERE namespace = ? '
+            '  ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)',
+            (self.namespace, self.namespace, self.max_entries)).rowcount
+        self.counters.add('evictions', max(evicted, 0))
+
+    def delete(self, key):
+        """Anahtarı önbellekten sil"""
+        self._connect().execute('DELETE FROM cache_entries WHERE namespace = ? AND key = ?',
+                                (self.namespace, key))
+
+    def clear(self):
+        """Bu namespace'teki tüm kayıtları temizle"""
+        self._connect().execute('DELETE FROM cache_entries WHERE namespace = ?',
+                                (self.namespace,))
+
+    def stats(self):
+        """Önbellek sayaçlarını döndür (sayaçlar bu sürece aittir)"""
+        entries, size = self._connect().execute(
+            'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache_entries WHERE namespace = ?',
+            (self.namespace,)).fetchone()
+        stats = {
+            'backend': 'sqlite',
+            'path': self.path,
+            'entries': entries,
+            'bytes': size,
+            'max_entries': self.max_entries,
+            'ttl': self.ttl,
+            'max_age': self.max_age
+        }
+        stats.update(self.counters.snapshot())
+        return stats
+
+    def __len__(self):
+        return self._connect().execute(
+            'SELECT COUNT(*) FROM cache_entries WHERE namespace = ?',
+            (self.namespace,)).fetchone()[0]
+
+
+class RedisCache:
+    """Redis benzeri bir sunucuda tutulan, süreçler arası paylaşılan TTL önbelleği
+
+    Kayıtlar max_age süresiyle (PX) yazılır; bellek sınırı ve LRU tahliyesi
+    sunucunun `maxmemory-policy allkeys-lru` ayarına bırakılır. `client`
+    parametresiyle redis-py uyumlu herhangi bir istemci (örn. yerel bir
+    stand-in) verilebilir.
+    """
+
+    def __init__(self, url=REDIS_URL, namespace='weather', ttl=300,
+                 max_age=None, client=None):
+        if client is None:
+            try:
+                import redis
+            except ImportError:
+                raise RuntimeError("Redis önbelleği için 'redis' paketi gerekli: pip install redis")
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.url = url
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_age = ttl if max_age is None else max(ttl, max_age)
+        self.counters = _Counters()
+
+    def _key(self, key):
+        return f"{self.namespace}:{key}"
+
+    def get(self, key):
+        """Anahtarın taze değerini döndür; yoksa veya bayatsa None"""
+        entry = self.get_entry(key)
+        if entry is None or not entry.fresh:
+            return None
+        return entry.value
+
+    def get_entry(self, key):
+        """Anahtarın kaydını (taze ya da bayat) CacheEntry olarak döndür"""
+        raw = self.client.get(self._key(key))
+        if raw is None:
+            self.counters.add('misses')
+            return None
+        record = loads(raw)
+        now = time.time()
+        fresh = now < record['f']
+        self.counters.add('hits' if fresh else 'stale_hits')
+        return CacheEntry(record['v'], max(0.0, now - record['s']), fresh)
+
+    def set(self, key, value, ttl=None):
+        """Değeri max_age süreli olarak yaz"""
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        now = time.time()
+        record = dumps({'v': value, 's': now, 'f': now + ttl})
+        self.client.set(self._key(key), record, px=int(max(ttl, self.max_age) * 1000))
+
+    def delete(self, key):
+        """Anahtarı önbellekten sil"""
+        self.client.delete(self._key(key))
+
+    def clear(self):
+        """Bu namespace'teki tüm kayıtları temizle"""
+        keys = list(self.client.scan_iter(match=f"{self.namespace}:*"))
+        if keys:
+            self.client.delete(*keys)
+
+    def stats(self):
+        """Önbellek sayaçlarını döndür (sayaçlar bu sürece aittir)"""
+        stats = {
+            'backend': 'redis',
+            'namespace': self.namespace,
+            'ttl': self.ttl,
+            'max_age': self.max_age
+        }
+        stats.update(self.counters.snapshot())
+        return stats
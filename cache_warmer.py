@@ -0,0 +1,219 @@
+"""
+Popüler şehirleri önbellek süresi dolmadan yenileyen arka plan ısıtıcısı.
+
+Trafiğin büyük kısmı az sayıda şehre gelir; bu şehirlerin kaydı her
+dolduğunda bir kullanıcı soğuk bir upstream çağrısını bekler. CacheWarmer
+kanonik önbellek anahtarı başına istek sıklığını (zamanla sönümlenen bir
+skor olarak) tutar ve periyodik olarak:
+
+- konfigürasyondaki sabit ısıtma listesini (WARMER_CITIES),
+- en sık istenen ilk WARMER_TOP_N şehri
+
+kontrol eder. Kaydı olmayan ya da tazeliği WARMER_LEAD saniyeden az kalan
+şehirler, dakikalık upstream bütçesi (WARMER_BUDGET) aşılmadan yeniden
+getirilir. Isıtıcı süreç kapanırken durdurulur.
+
+Isıtıcıyı modülü içe aktaran kod değil, isteği sunan uygulama başlatır:
+Flask uygulaması ilk istekte bu iş parçacıklı ısıtıcıyı, async uygulama
+lifespan başlangıcında event loop üzerinde çalışan kendi ısıtıcısını
+(app_async.AsyncCacheWarmer) başlatır.
+"""
+
+import atexit
+import os
+import threading
+import time
+
+# Isıtıcı konfigürasyonu (ortam değişkenlerinden)
+WARMER_ENABLED = os.getenv('WARMER_ENABLED', 'True').lower() == 'true'
+WARMER_TOP_N = int(os.getenv('WARMER_TOP_N', 50))
+WARMER_INTERVAL = float(os.getenv('WARMER_INTERVAL', 15))
+WARMER_LEAD = float(os.getenv('WARMER_LEAD', 60))
+WARMER_BUDGET = int(os.getenv('WARMER_BUDGET', 60))
+WARMER_HALF_LIFE = float(os.getenv('WARMER_HALF_LIFE', 3600))
+WARMER_MAX_TRACKED = int(os.getenv('WARMER_MAX_TRACKED', 10000))
+WARMER_CITIES = os.getenv('WARMER_CITIES', '')
+
+
+def parse_city_list(raw):
+    """Virgülle ya da ';' ile ayrılmış şehir listesini çözümle"""
+    separator = ';' if ';' in raw else ','
+    return [city.strip() for city in raw.split(separator) if len(city.strip()) >= 2]
+
+
+class CacheWarmer:
+    """Sık istenen şehirleri arka planda önceden yenileyen ısıtıcı
+
+    `fetch(city, cache_key)` upstream'den veriyi alıp önbelleğe yazan
+    çağrıdır; `make_key(city)` şehrin güncel kanonik anahtarını döndürür.
+    """
+
+    def __init__(self, cache, fetch, make_key, negative_cache=None, static_cities=(),
+                 top_n=WARMER_TOP_N, interval=WARMER_INTERVAL, lead=WARMER_LEAD,
+                 budget=WARMER_BUDGET, half_life=WARMER_HALF_LIFE,
+                 max_tracked=WARMER_MAX_TRACKED):
+        self.cache = cache
+        self.fetch = fetch
+        self.make_key = make_key
+        self.negative_cache = negative_cache
+        self.static_cities = list(static_cities)
+        self.top_n = top_n
+        self.interval = interval
+        self.lead = lead
+        self.budget = budget
+        self.half_life = half_life
+        self.max_tracked = max_tracked
+
+        # anahtar -> [skor, son istenen yazım]
+        self._scores = {}
+        self._lock = threading.Lock()
+        self._last_decay = time.monotonic()
+        self._stop = threading.Event()
+        self._thread = None
+
+        # Dakikalık upstream bütçesi için token kovası
+        self._tokens = float(budget)
+        self._last_refill = time.monotonic()
+
+        self.cycles = 0
+        self.refreshes = 0
+        self.failures = 0
+        self.budget_skips = 0
+
+    def record(self, cache_key, city):
+        """Bir isteği şehrin sıklık skoruna ekle"""
+        with self._lock:
+            entry = self._scores.get(cache_key)
+            if entry is None:
+                self._scores[cache_key] = [1.0, city]
+                if len(self._scores) > self.max_tracked:
+                    self._prune()
+            else:
+                entry[0] += 1.0
+                entry[1] = city
+
+    def _prune(self):
+        """En düşük skorlu anahtarları at (kilit tutulurken çağrılır)"""
+        keep = int(self.max_tracked * 0.9)
+        ranked = sorted(self._scores.items(), key=lambda item: item[1][0], reverse=True)
+        self._scores = dict(ranked[:keep])
+
+    def _decay(self):
+        """Skorları yarılanma süresine göre sönümle; eski trafik zamanla unutulur"""
+        now = time.monotonic()
+        factor = 0.5 ** ((now - self._last_decay) / self.half_life) if self.half_life > 0 else 1.0
+        self._last_decay = now
+        with self._lock:
+            for key in list(self._scores):
+                entry = self._scores[key]
+                entry[0] *= factor
+                if entry[0] < 0.01:
+                    del self._scores[key]
+
+    def hot_cities(self):
+        """En yüksek skorlu ilk top_n şehri (anahtar, yazım, skor) olarak döndür"""
+        with self._lock:
+            ranked = sorted(self._scores.items(), key=lambda item: item[1][0], reverse=True)
+        return [(key, city, score) for key, (score, city) in ranked[:self.top_n]]
+
+    def _take_token(self):
+        """Bütçeden bir upstream çağrısı düş; bütçe bittiyse False"""
+        now = time.monotonic()
+        self._tokens = min(float(self.budget),
+                           self._tokens + (now - self._last_refill) * self.budget / 60.0)
+        self._last_refill = now
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    def _needs_refresh(self, cache_key):
+        if self.negative_cache is not None and self.negative_cache.get(cache_key) is not None:
+            return False
+        entry = self.cache.get_entry(cache_key)
+        if entry is None or not entry.fresh:
+            return True
+        return self.cache.ttl - entry.age <= self.lead
+
+    def _due(self):
+        """Sabit listeden ve popüler şehirlerden yenilenmesi gerekenleri bütçe içinde sırayla ver"""
+        self._decay()
+        self.cycles += 1
+
+        candidates = []
+        seen = set()
+        for city in self.static_cities:
+            candidates.append((self.make_key(city), city))
+        # Anahtar yeniden hesaplanır; takma adı sonradan öğrenilen yazımlar kanonik kayda düşer
+        candidates.extend((self.make_key(city), city) for _, city, _ in self.hot_cities())
+
+        for cache_key, city in candidates:
+            if self._stop.is_set():
+                break
+            if cache_key in seen:
+                continue
+            seen.add(cache_key)
+            if not self._needs_refresh(cache_key):
+                continue
+            if not self._take_token():
+                self.budget_skips += 1
+                break
+            yield city, cache_key
+
+    def run_once(self):
+        """Sabit listeyi ve popüler şehirleri kontrol et; süresi yaklaşanları yenile"""
+        refreshed = 0
+        for city, cache_key in self._due():
+            try:
+                self.fetch(city, cache_key)
+                self.refreshes += 1
+                refreshed += 1
+            except Exception:
+                # Yenilenemeyen kayıt normal istek yolunda (SWR) ele alınır
+                self.failures += 1
+        return refreshed
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception:
+                pass
+            self._stop.wait(self.interval)
+
+    def start(self):
+        """Isıtıcı iş parçacığını başlat (ilk tur sabit listeyi hemen ısıtır)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='weather-warmer', daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self, timeout=5):
+        """Isıtıcıyı durdur ve devam eden turun bitmesini bekle"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def stats(self):
+        """Isıtıcı sayaçlarını ve en popüler şehirleri döndür"""
+        with self._lock:
+            tracked = len(self._scores)
+        return {
+            'running': self.running(),
+            'tracked': tracked,
+            'static_cities': len(self.static_cities),
+            'top_n': self.top_n,
+            'interval': self.interval,
+            'lead': self.lead,
+            'budget_per_minute': self.budget,
+            'cycles': self.cycles,
+            'refreshes': self.refreshes,
+            'failures': self.failures,
+            'budget_skips': self.budget_skips,
+            'hot': [{'key': key, 'score': round(score, 2)} for key, _, score in self.hot_cities()[:10]]
+        }
@@ -0,0 +1,170 @@
+"""
+OpenWeather istemcisi için devre kesici (circuit breaker).
+
+OpenWeather kesintisinde her istek zaman aşımına kadar (10 saniyeye
+kadar) bir iş parçacığını bekletir; iş parçacıkları tükenince /health ve
+Swagger UI bile yanıt veremez. Devre kesici upstream hatalarını sayar:
+
+- closed:    çağrılar normal gönderilir; art arda CIRCUIT_FAILURE_THRESHOLD
+             hata ya da son CIRCUIT_WINDOW çağrıda CIRCUIT_FAILURE_RATIO
+             oranında hata olursa devre açılır.
+- open:      CIRCUIT_RESET_TIMEOUT saniye boyunca çağrılar upstream'e hiç
+             gitmeden CircuitOpenError ile reddedilir (çağıran önbellekteki
+             veriyi sunar ya da hızlıca 503 döner).
+- half_open: süre dolunca en fazla CIRCUIT_HALF_OPEN_MAX_CALLS deneme
+             çağrısına izin verilir; başarılı olursa devre kapanır,
+             başarısız olursa yeniden açılır.
+
+Hata sayılanlar: zaman aşımı, bağlantı hatası ve 5xx yanıtlar. 4xx
+yanıtlar (404, 401, 429) upstream'in ayakta olduğunu gösterir.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+
+import requests
+
+# Devre kesici konfigürasyonu (ortam değişkenlerinden)
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv('CIRCUIT_FAILURE_THRESHOLD', 5))
+CIRCUIT_FAILURE_RATIO = float(os.getenv('CIRCUIT_FAILURE_RATIO', 0.5))
+CIRCUIT_WINDOW = int(os.getenv('CIRCUIT_WINDOW', 20))
+CIRCUIT_RESET_TIMEOUT = float(os.getenv('CIRCUIT_RESET_TIMEOUT', 30))
+CIRCUIT_HALF_OPEN_MAX_CALLS = int(os.getenv('CIRCUIT_HALF_OPEN_MAX_CALLS', 1))
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Devre açık olduğu için upstream çağrısı gönderilmedi
+
+    ConnectionError alt sınıfıdır; bu hatayı ayrıca ele almayan kod yolları
+    onu mevcut bağlantı hatası (503) eşlemesiyle karşılar.
+    """
+
+    def __init__(self, retry_after):
+        super().__init__(f"OpenWeather devresi açık, {retry_after:.1f}s sonra tekrar denenecek")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """closed / open / half_open durumlu, thread-safe devre kesici"""
+
+    def __init__(self, failure_threshold=CIRCUIT_FAILURE_THRESHOLD, failure_ratio=CIRCUIT_FAILURE_RATIO,
+                 window=CIRCUIT_WINDOW, reset_timeout=CIRCUIT_RESET_TIMEOUT,
+                 half_open_max_calls=CIRCUIT_HALF_OPEN_MAX_CALLS):
+        self.failure_threshold = failure_threshold
+        self.failure_ratio = failure_ratio
+        self.window = window
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._consecutive_failures = 0
+        self._outcomes = deque(maxlen=window)
+        self._trials = 0
+
+        self.opened = 0
+        self.rejected = 0
+        self.failures = 0
+        self.successes = 0
+
+    @property
+    def state(self):
+        with self._lock:
+            self._maybe_half_open(time.monotonic())
+            return self._state
+
+    def _maybe_half_open(self, now):
+        """Açık kalma süresi dolduysa half_open'a geç (kilit tutulurken çağrılır)"""
+        if self._state == OPEN and now - self._opened_at >= self.reset_timeout:
+            self._state = HALF_OPEN
+            self._trials = 0
+
+    def _open(self, now):
+        self._state = OPEN
+        self._opened_at = now
+        self._trials = 0
+        self.opened += 1
+
+    def before_call(self):
+        """Çağrıya izin ver ya da devre açıksa CircuitOpenError yükselt"""
+        with self._lock:
+            now = time.monotonic()
+            self._maybe_half_open(now)
+            if self._state == CLOSED:
+                return
+            if self._state == HALF_OPEN and self._trials < self.half_open_max_calls:
+                self._trials += 1
+                return
+            self.rejected += 1
+            if self._state == OPEN:
+                retry_after = self.reset_timeout - (now - self._opened_at)
+            else:
+                # Deneme çağrısı sürüyor; sonucu kısa sürede belli olur
+                retry_after = 1.0
+            raise CircuitOpenError(max(retry_after, 0.0))
+
+    def release(self):
+        """Gönderilmeyen çağrının half_open deneme hakkını geri ver"""
+        with self._lock:
+            if self._state == HALF_OPEN and self._trials > 0:
+                self._trials -= 1
+
+    def record_success(self):
+        with self._lock:
+            self.successes += 1
+            self._consecutive_failures = 0
+            self._outcomes.append(False)
+            if self._state == HALF_OPEN:
+                self._state = CLOSED
+                self._outcomes.clear()
+
+    def record_failure(self):
+        with self._lock:
+            now = time.monotonic()
+            self.failures += 1
+            self._consecutive_failures += 1
+            self._outcomes.append(True)
+            if self._state == HALF_OPEN:
+                self._open(now)
+            elif self._state == CLOSED and self._should_open():
+                self._open(now)
+
+    def _should_open(self):
+        if self._consecutive_failures >= self.failure_threshold:
+            return True
+        if len(self._outcomes) < self.window:
+            return False
+        return sum(self._outcomes) / len(self._outcomes) >= self.failure_ratio
+
+    def stats(self):
+        """Devre durumunu ve sayaçlarını döndür"""
+        with self._lock:
+            now = time.monotonic()
+            self._maybe_half_open(now)
+            recent = len(self._outcomes)
+            return {
+                'state': self._state,
+                'consecutive_failures': self._consecutive_failures,
+                'recent_failure_ratio': round(sum(self._outcomes) / recent, 4) if recent else 0.0,
+                'retry_after': round(max(0.0, self.reset_timeout - (now - self._opened_at)), 1)
+                if self._state == OPEN else 0.0,
+                'opened': self.opened,
+                'rejected': self.rejected,
+                'failures': self.failures,
+                'successes': self.successes,
+                'failure_threshold': self.failure_threshold,
+                'failure_ratio': self.failure_ratio,
+                'window': self.window,
+                'reset_timeout': self.reset_timeout
+            }
+
+
+# OpenWeather çağrılarını koruyan paylaşılan devre kesici
+upstream_breaker = CircuitBreaker()
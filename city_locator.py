@@ -0,0 +1,193 @@
+"""
+Koordinatları bilinen en yakın şehre eşleyen bellek içi uzamsal dizin.
+
+GPS koordinatıyla gelen istemciler için her (lat, lon) çifti ayrı bir
+upstream çağrısı ve ayrı bir önbellek kaydı olmamalıdır. Şehirler enlem ve
+boylamda GEO_CELL_DEGREES genişliğinde bir ızgaraya yerleştirilir; sorgu
+koordinatı ve komşu hücrelerdeki şehirler arasından GEO_MAX_DISTANCE_KM
+içindeki en yakını seçilir ve istek o şehrin ("İsim,ÜLKE") önbellek kaydını
+paylaşır.
+
+Şehirler iki kaynaktan öğrenilir: CITY_ID_FILE ile verilen OpenWeather
+city.list.json dosyası ve upstream yanıtlarındaki `coord` alanı. Yakınında
+bilinen şehir olmayan koordinatlar ızgara hücresine yuvarlanır; hücre
+merkezi için yapılan tek upstream çağrısının döndürdüğü şehir hücreye
+bağlanır ve aynı hücreden gelen sonraki istekler de ona yönlenir.
+
+Koordinatlar ve ID'ler tipli dizilerde (array) tutulur; yüz binlerce şehir
+birkaç MB yer kaplar.
+"""
+
+import json
+import logging
+import math
+import os
+import threading
+from array import array
+
+from city_resolver import CITY_ID_FILE
+
+# Uzamsal dizin konfigürasyonu (ortam değişkenlerinden)
+GEO_CELL_DEGREES = float(os.getenv('GEO_CELL_DEGREES', 0.1))
+GEO_MAX_DISTANCE_KM = float(os.getenv('GEO_MAX_DISTANCE_KM', 10))
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """İki koordinat arasındaki büyük daire mesafesi (km)"""
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = (math.sin((lat2 - lat1) / 2) ** 2
+         + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def city_label(name, country):
+    """Şehrin sorgu biçimi ('İsim,ÜLKE'); önbellek anahtarı bundan türetilir"""
+    return f"{name},{country}" if country else name
+
+
+class CityLocator:
+    """Izgara tabanlı en yakın şehir dizini"""
+
+    def __init__(self, cell_degrees=GEO_CELL_DEGREES, max_distance_km=GEO_MAX_DISTANCE_KM):
+        self.cell_degrees = cell_degrees
+        self.max_distance_km = max_distance_km
+        self._lon_cells = max(1, round(360 / cell_degrees))
+
+        # Şehir dizini: sıra numarası -> koordinat, ID ve sorgu biçimi
+        self._lats = array('d')
+        self._lons = array('d')
+        self._ids = array('q')
+        self._labels = []
+        # ID ya da sorgu biçimi -> sıra numarası (aynı şehir iki kez eklenmez)
+        self._known = {}
+        # hücre -> hücredeki şehirlerin sıra numaraları
+        self._cells = {}
+        # Yakınında şehir olmayan hücre -> upstream'in bu hücre için döndürdüğü şehir
+        self._cell_cities = {}
+        self._lock = threading.Lock()
+
+        self.city_hits = 0
+        self.cell_hits = 0
+        self.misses = 0
+
+    def cell(self, lat, lon):
+        """Koordinatın ızgara hücresi (enlem, boylam indeksleri)"""
+        i = math.floor((lat + 90) / self.cell_degrees)
+        j = math.floor((lon + 180) / self.cell_degrees) % self._lon_cells
+        return i, j
+
+    def cell_center(self, cell):
+        """Hücre merkezinin koordinatı (upstream sorgusu için 4 basamağa yuvarlanır)"""
+        i, j = cell
+        lat = min(90.0, -90 + (i + 0.5) * self.cell_degrees)
+        lon = -180 + (j + 0.5) * self.cell_degrees
+        return round(lat, 4), round(lon, 4)
+
+    def add(self, name, country, lat, lon, city_id=0):
+        """Şehri dizine ekle; zaten biliniyorsa mevcut sıra numarasını döndür"""
+        if not name or lat is None or lon is None:
+            return None
+        label = city_label(name, country)
+        with self._lock:
+            index = self._known.get(city_id) if city_id else self._known.get(label)
+            if index is not None:
+                return index
+            index = len(self._labels)
+            self._lats.append(float(lat))
+            self._lons.append(float(lon))
+            self._ids.append(int(city_id or 0))
+            self._labels.append(label)
+            self._known[city_id or label] = index
+            self._cells.setdefault(self.cell(lat, lon), array('l')).append(index)
+            return index
+
+    def learn_response(self, data, cell=None):
+        """OpenWeather yanıtındaki şehri dizine ekle; `cell` verilirse hücreye bağla
+
+        Şehrin sorgu biçimini döndürür; yanıt isimsizse (örn. açık deniz) None.
+        """
+        coord = data.get('coord') or {}
+        index = self.add(data.get('name'), (data.get('sys') or {}).get('country'),
+                         coord.get('lat'), coord.get('lon'), data.get('id'))
+        if index is None:
+            return None
+        if cell is not None:
+            with self._lock:
+                self._cell_cities[cell] = index
+        return self._labels[index]
+
+    def load_city_list(self, path):
+        """OpenWeather city.list.json dosyasındaki şehirleri yükle; yüklenen sayıyı döndür"""
+        with open(path, encoding='utf-8') as f:
+            cities = json.load(f)
+
+        loaded = 0
+        for city in cities:
+            coord = city.get('coord') or {}
+            if self.add(city.get('name'), city.get('country'), coord.get('lat'), coord.get('lon'),
+                        city.get('id')) is not None:
+                loaded += 1
+        return loaded
+
+    def nearest(self, lat, lon):
+        """Koordinata en yakın bilinen şehrin sorgu biçimi; yoksa None
+
+        Önce GEO_MAX_DISTANCE_KM içindeki en yakın şehir, o yoksa hücreye
+        daha önce bağlanmış şehir aranır.
+        """
+        i, j = self.cell(lat, lon)
+        lat_span = math.ceil(self.max_distance_km / KM_PER_DEGREE / self.cell_degrees)
+        lon_km = KM_PER_DEGREE * max(math.cos(math.radians(lat)), 1e-6)
+        lon_span = min(self._lon_cells // 2, math.ceil(self.max_distance_km / lon_km / self.cell_degrees))
+
+        best, best_distance = None, self.max_distance_km
+        with self._lock:
+            for di in range(-lat_span, lat_span + 1):
+                for dj in range(-lon_span, lon_span + 1):
+                    for index in self._cells.get((i + di, (j + dj) % self._lon_cells), ()):
+                        distance = haversine_km(lat, lon, self._lats[index], self._lons[index])
+                        if distance <= best_distance:
+                            best, best_distance = index, distance
+            if best is not None:
+                self.city_hits += 1
+                return self._labels[best]
+            index = self._cell_cities.get((i, j))
+            if index is not None:
+                self.cell_hits += 1
+                return self._labels[index]
+            self.misses += 1
+            return None
+
+    def stats(self):
+        """Dizin boyutu ve eşleme sayaçları"""
+        with self._lock:
+            return {
+                'cities': len(self._labels),
+                'cells': len(self._cells),
+                'linked_cells': len(self._cell_cities),
+                'cell_degrees': self.cell_degrees,
+                'max_distance_km': self.max_distance_km,
+                'city_hits': self.city_hits,
+                'cell_hits': self.cell_hits,
+                'misses': self.misses
+            }
+
+
+# Uygulamalar tarafından paylaşılan dizin
+city_locator = CityLocator()
+
+if CITY_ID_FILE and os.path.exists(CITY_ID_FILE):
+    city_locator.load_city_list(CITY_ID_FILE)
+elif CITY_ID_FILE:
+    logger.warning("CITY_ID_FILE bulunamadı: %s", CITY_ID_FILE)
+
+# Dizin boşsa her yeni bölgenin ilk koordinat sorgusu upstream'e gider ve hücre
+# merkezine göre eşlenir; üretimde CITY_ID_FILE ile city.list.json verilmelidir
+if not city_locator.stats()['cities']:
+    logger.warning("Koordinat dizini boş; en yakın şehir eşlemesi için CITY_ID_FILE ile "
+                   "OpenWeather city.list.json dosyasını verin")
@@ -0,0 +1,114 @@
+"""
+Şehir isimleri için Unicode duyarlı normalizasyon ve takma ad (alias) dizini.
+
+"İstanbul", "istanbul", "ISTANBUL", "Istanbul " ve "Istanbul,TR" gibi
+yazımların hepsi aynı önbellek anahtarına inmelidir. Normalizasyon:
+- Türkçe noktalı/noktasız I harflerini (İ, I, ı) 'i' harfine indirir,
+- aksanları (ş, ğ, ç, ö, ü ...) atar ve casefold uygular,
+- boşlukları sadeleştirir,
+- isteğe bağlı iki harfli ülke ekini (",TR") ayırır.
+
+AliasIndex ise upstream yanıtlarındaki `name` ve `sys.country` alanlarından
+her sorgunun kanonik kimliğini ("istanbul,tr") öğrenir; önbellek ve istek
+birleştirme katmanları bu kanonik kimliği anahtar olarak kullanır.
+"""
+
+import os
+import threading
+import unicodedata
+from collections import OrderedDict
+
+ALIAS_MAX_ENTRIES = int(os.getenv('ALIAS_MAX_ENTRIES', 20000))
+
+# Türkçe I harfleri: plain lower() 'I' -> 'i' yapar ama 'İ' -> 'i̇' üretir
+_TURKISH_I = str.maketrans({'İ': 'i', 'I': 'i', 'ı': 'i'})
+
+
+def fold_name(text):
+    """Şehir ismini Türkçe duyarlı, aksansız ve küçük harfli biçime indir"""
+    text = unicodedata.normalize('NFC', text).translate(_TURKISH_I)
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return ' '.join(text.casefold().split())
+
+
+def split_country(query):
+    """'İsim,ÜLKE' sorgusunu (isim, ülke_kodu) olarak ayır
+
+    Ülke eki yoksa ya da iki harfli bir kod değilse ülke kodu None olur.
+    """
+    name, sep, suffix = query.rpartition(',')
+    suffix = suffix.strip()
+    if sep and len(suffix) == 2 and suffix.isalpha() and name.strip():
+        return name.strip(), suffix.upper()
+    return query.strip(), None
+
+
+def normalize_city(query):
+    """Sorguyu normalize edilmiş anahtar biçimine getir (örn: 'istanbul,tr')"""
+    name, country = split_country(query)
+    name = fold_name(name)
+    if country:
+        return f"{name},{country.lower()}"
+    return name
+
+
+class AliasIndex:
+    """Normalize edilmiş sorgu -> kanonik şehir kimliği eşlemesi (LRU sınırlı)"""
+
+    def __init__(self, max_entries=ALIAS_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._aliases = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def canonical(self, query):
+        """Sorgunun kanonik kimliğini döndür; henüz öğrenilmediyse normalize hali"""
+        key = normalize_city(query)
+        with self._lock:
+            canonical = self._aliases.get(key)
+            if canonical is None:
+                self.misses += 1
+                return key
+            self._aliases.move_to_end(key)
+            self.hits += 1
+            return canonical
+
+    def learn(self, query, data):
+        """Upstream yanıtından sorgunun kanonik kimliğini öğren"""
+        name = data.get('name')
+        country = (data.get('sys') or {}).get('country')
+        if not name:
+            return None
+        canonical = normalize_city(f"{name},{country}" if country else name)
+
+        with self._lock:
+            self._put(normalize_city(query), canonical)
+            # Yalın isim başka bir ülkeye eşlenmemişse o da kanonik kimliğe gitsin
+            bare = fold_name(name)
+            if bare not in self._aliases:
+                self._put(bare, canonical)
+        return canonical
+
+    def stats(self):
+        """Dizin sayaçlarını döndür"""
+        with self._lock:
+            return {
+                'entries': len(self._aliases),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+    def _put(self, key, canonical):
+        if key == canonical:
+            return
+        self._aliases[key] = canonical
+        self._aliases.move_to_end(key)
+        while len(self._aliases) > self.max_entries:
+            self._aliases.popitem(last=False)
+
+
+# Uygulamalar tarafından paylaşılan takma ad dizini
+alias_index = AliasIndex()
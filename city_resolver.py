@@ -0,0 +1,84 @@
+"""
+Şehir isimlerini OpenWeather şehir ID'lerine eşleyen çözümleyici.
+
+OpenWeather'ın /group endpoint'i tek çağrıda en fazla 20 şehir ID'si kabul
+eder. ID'ler iki kaynaktan öğrenilir: tekil /weather yanıtlarındaki `id`
+alanı ve isteğe bağlı olarak CITY_ID_FILE ile verilen OpenWeather
+city.list.json dosyası. Eşleme uzun ömürlü bir TTL önbelleğinde tutulur.
+"""
+
+import json
+import os
+
+from city_names import alias_index
+from weather_cache import TTLCache
+
+# Çözümleyici konfigürasyonu (ortam değişkenlerinden)
+CITY_ID_TTL = float(os.getenv('CITY_ID_TTL', 30 * 24 * 3600))
+CITY_ID_MAX_ENTRIES = int(os.getenv('CITY_ID_MAX_ENTRIES', 50000))
+CITY_ID_FILE = os.getenv('CITY_ID_FILE')
+
+# OpenWeather /group çağrısı başına en fazla şehir ID'si
+GROUP_MAX_IDS = 20
+
+
+def chunked(items, size=GROUP_MAX_IDS):
+    """Listeyi en fazla `size` elemanlı parçalara böl"""
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+class CityIdResolver:
+    """Kanonik şehir kimliği -> OpenWeather şehir ID'si eşlemesi"""
+
+    def __init__(self, ttl=CITY_ID_TTL, max_entries=CITY_ID_MAX_ENTRIES):
+        self._ids = TTLCache(ttl=ttl, max_entries=max_entries,
+                             max_bytes=max_entries * 64, sizeof=lambda value: 8)
+
+    def resolve(self, city):
+        """Şehrin bilinen ID'sini döndür; bilinmiyorsa None"""
+        return self._ids.get(alias_index.canonical(city))
+
+    def learn(self, city, city_id, ttl=None):
+        """Şehir ismi ile ID arasındaki eşlemeyi kaydet"""
+        if city and city_id:
+            self._ids.set(alias_index.canonical(city), int(city_id), ttl=ttl)
+
+    def learn_response(self, query, data):
+        """OpenWeather yanıtından sorgunun kanonik kimliği için ID öğren"""
+        self.learn(query, data.get('id'))
+
+    def load_city_list(self, path):
+        """OpenWeather city.list.json dosyasından eşlemeleri yükle
+
+        Aynı isimde birden fazla şehir varsa ilk kayıt kullanılır; ülke
+        koduyla (`isim,ülke`) verilen eşlemeler her zaman eklenir.
+        Yüklenen kayıt sayısını döndürür.
+        """
+        with open(path, encoding='utf-8') as f:
+            cities = json.load(f)
+
+        loaded = 0
+        for city in cities:
+            name = city.get('name')
+            city_id = city.get('id')
+            if not name or not city_id:
+                continue
+            if self.resolve(name) is None:
+                self.learn(name, city_id, ttl=float('inf'))
+            country = city.get('country')
+            if country:
+                self.learn(f"{name},{country}", city_id, ttl=float('inf'))
+            loaded += 1
+        return loaded
+
+    def stats(self):
+        """Eşleme önbelleği sayaçlarını döndür"""
+        return self._ids.stats()
+
+
+# Uygulamalar tarafından paylaşılan çözümleyici
+city_resolver = CityIdResolver()
+
+if CITY_ID_FILE and os.path.exists(CITY_ID_FILE):
+    city_resolver.load_city_list(CITY_ID_FILE)
@@ -0,0 +1,139 @@
+"""
+API yanıtları için gzip/brotli sıkıştırma.
+
+Toplu sorgu ve benzeri yanıtlar tekrar eden Türkçe mesajlarla dolu büyük
+JSON'lardır ve iyi sıkışır. İstemcinin Accept-Encoding başlığına göre br
+(brotli paketi kuruluysa) ya da gzip seçilir.
+
+Tekil şehir yanıtlarının sıkıştırılmış varyantları yanıt önbelleğe girerken
+bir kez, en yüksek seviyede üretilip sonuçla birlikte byte olarak saklanır
+(`_encoded` özel alanı); sıkıştırma her istekte değil, her upstream
+yenilemesinde bir kez yapılır. Gövdeden kısa olan her varyant saklanır
+(~410 byte'lık tekil yanıtlar da dahil). Her istekte üretilen yanıtlar
+(toplu sorgu, istatistikler, metrikler) COMPRESSION_LEVEL ile sıkıştırılır;
+COMPRESSION_MIN_SIZE byte'tan küçük olanlar sıkıştırılmaz.
+
+Sıkıştırılmış yanıtın güçlü ETag'i kodlamaya göre ayrışır ("...-gzip");
+koşullu istekler her iki biçimi de tanır.
+"""
+
+import base64
+import gzip
+import os
+
+from werkzeug.http import parse_accept_header
+
+from serialization import serialized_body
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Sıkıştırma konfigürasyonu (ortam değişkenlerinden)
+COMPRESSION_ENABLED = os.getenv('COMPRESSION_ENABLED', 'True').lower() == 'true'
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', 512))
+COMPRESSION_LEVEL = int(os.getenv('COMPRESSION_LEVEL', 6))
+
+# Desteklenen kodlamalar (eşit kalitede tercih sırasıyla)
+ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+# Önceden sıkıştırılan varyantlar bir kez üretildiği için en yüksek seviye kullanılır
+PRECOMPRESS_LEVELS = {'br': 11, 'gzip': 9}
+
+# Sıkıştırılan içerik türleri
+COMPRESSIBLE_TYPES = frozenset(['application/json', 'text/plain'])
+
+# Sonuç sözlüğünde sıkıştırılmış varyantları tutan özel alan
+VARIANTS_FIELD = '_encoded'
+
+
+def negotiate(accept_encoding):
+    """Accept-Encoding başlığına göre kullanılacak kodlama; sıkıştırılmayacaksa None"""
+    if not COMPRESSION_ENABLED or not accept_encoding:
+        return None
+    accept = parse_accept_header(accept_encoding)
+    best, best_quality = None, 0
+    for encoding in ENCODINGS:
+        quality = accept.quality(encoding)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(data, encoding, level=COMPRESSION_LEVEL):
+    if encoding == 'br':
+        return brotli.compress(data, quality=min(level, 11))
+    # mtime=0: aynı gövde her seferinde aynı byte'lara sıkışır
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def precompress(result):
+    """Sonucun serileştirilmiş gövdesinin gövdeden kısa kalan varyantlarını sonuca ekle
+
+    Sıkıştırma bir kez yapıldığı için boyut eşiği uygulanmaz; sıkıştırmanın
+    kazandırmadığı kodlamalar saklanmaz ve o istekler sıkıştırılmadan döner.
+    """
+    body = serialized_body(result)
+    if not COMPRESSION_ENABLED or body is None:
+        return result
+    variants = {}
+    for encoding in ENCODINGS:
+        variant = compress(body, encoding, PRECOMPRESS_LEVELS[encoding])
+        if len(variant) < len(body):
+            variants[encoding] = variant
+    if variants:
+        result[VARIANTS_FIELD] = variants
+    return result
+
+
+def precompressed(result, encoding):
+    """Sonuç için önceden sıkıştırılmış varyant (byte); yoksa None"""
+    variants = result.get(VARIANTS_FIELD) if isinstance(result, dict) else None
+    variant = variants.get(encoding) if variants else None
+    if isinstance(variant, str):
+        # Varyantları base64 metni olarak saklayan eski sürümlerin paylaşılan önbellek kayıtları
+        return base64.b64decode(variant)
+    return variant
+
+
+def variant_etag(etag, encoding):
+    """Kodlamaya özgü güçlü ETag ('"abc"' -> '"abc-gzip"')"""
+    return f'{etag[:-1]}-{encoding}"' if etag.endswith('"') else etag
+
+
+def add_vary(headers):
+    vary = headers.get('Vary')
+    if not vary:
+        headers['Vary'] = 'Accept-Encoding'
+    elif 'accept-encoding' not in vary.lower():
+        headers['Vary'] = f"{vary}, Accept-Encoding"
+
+
+def encode_body(data, encoding, headers, result=None):
+    """Gövdeyi seçilen kodlamayla sıkıştır; Vary, Content-Encoding ve ETag başlıklarını güncelle
+
+    `result` verilirse ve önceden sıkıştırılmış varyantı varsa o kullanılır.
+    Sıkıştırılmayan gövde olduğu gibi döner.
+    """
+    add_vary(headers)
+    if encoding is None:
+        return data
+    variant = precompressed(result, encoding) if result is not None else None
+    if variant is None:
+        # Eşik yalnızca her istekte yapılan sıkıştırmaya uygulanır
+        if len(data) < COMPRESSION_MIN_SIZE:
+            return data
+        variant = compress(data, encoding)
+    headers['Content-Encoding'] = encoding
+    if headers.get('ETag'):
+        headers['ETag'] = variant_etag(headers['ETag'], encoding)
+    return variant
+
+
+def encode_not_modified(encoding, headers, result):
+    """304 yanıtında ETag'i istemcinin elindeki (sıkıştırılmış) varyantla eşleştir"""
+    add_vary(headers)
+    variants = result.get(VARIANTS_FIELD) or {}
+    if encoding in variants and headers.get('ETag'):
+        headers['ETag'] = variant_etag(headers['ETag'], encoding)
@@ -0,0 +1,75 @@
+"""
+Hava durumu yanıtları için koşullu istekler (ETag / Last-Modified / 304).
+
+OpenWeather verisi yaklaşık 10 dakikada bir değişir (`dt` gözlem zamanı);
+birkaç saniyede bir sorgulayan istemciler her seferinde aynı JSON'u indirir.
+Yanıt oluşturulurken gözlem zamanı ve serileştirilmiş gövdeden türetilen
+güçlü bir ETag sonuca özel (`_` ile başlayan, API çıktısına girmeyen)
+alanlar olarak eklenir; endpoint'ler bunlardan ETag, Last-Modified ve
+Cache-Control başlıklarını üretir ve If-None-Match / If-Modified-Since
+eşleşirse gövdesiz 304 döner.
+
+Cache-Control max-age, kaydın sunucu önbelleğinde taze kalacağı süredir:
+sunucu bu süre dolmadan daha yeni veri getirmeyeceği için CDN'ler ve
+tarayıcılar aynı süre boyunca yanıtı kendileri sunabilir.
+"""
+
+import zlib
+from email.utils import formatdate
+
+from werkzeug.http import parse_date, parse_etags
+
+from weather_cache import CACHE_TTL
+from serialization import BODY_FIELD
+from compression import ENCODINGS, variant_etag
+
+# Sonuç sözlüğündeki özel alanlar (marshal edilmez, async modda yanıttan çıkarılır)
+OBSERVED_AT_FIELD = '_observed_at'
+ETAG_FIELD = '_etag'
+
+
+def stamp(result, observed_at, body):
+    """Sonuca gözlem zamanını, serileştirilmiş gövdeyi ve gövdeden türetilen güçlü ETag'i ekle"""
+    result[OBSERVED_AT_FIELD] = observed_at
+    result[ETAG_FIELD] = f'"{int(observed_at or 0):x}-{zlib.crc32(body):08x}"'
+    result[BODY_FIELD] = body
+    return result
+
+
+def public(result):
+    """Sonucun özel alanlar çıkarılmış, API'de dönen biçimi"""
+    return {key: value for key, value in result.items() if not key.startswith('_')}
+
+
+def cache_control(status, age):
+    """Önbellek durumuna göre Cache-Control değeri (bayat kayıt yeniden doğrulanmalı)"""
+    if status == 'STALE':
+        return 'public, max-age=0, must-revalidate'
+    return f"public, max-age={max(0, int(CACHE_TTL - age))}"
+
+
+def validator_headers(result, status, age):
+    """Sonuç için ETag, Last-Modified ve Cache-Control başlıkları (eski kayıtlarda boş)"""
+    headers = {}
+    if result.get(ETAG_FIELD):
+        headers['ETag'] = result[ETAG_FIELD]
+    if result.get(OBSERVED_AT_FIELD):
+        headers['Last-Modified'] = formatdate(result[OBSERVED_AT_FIELD], usegmt=True)
+    if headers:
+        headers['Cache-Control'] = cache_control(status, age)
+    return headers
+
+
+def not_modified(result, if_none_match=None, if_modified_since=None):
+    """İstemcinin elindeki kopya hâlâ geçerli mi (RFC 9110: If-None-Match önceliklidir)"""
+    if if_none_match:
+        etag = result.get(ETAG_FIELD)
+        if not etag:
+            return False
+        etags = parse_etags(if_none_match)
+        # If-None-Match zayıf karşılaştırma kullanır; sıkıştırılmış varyantların ETag'leri de geçerlidir
+        candidates = [etag] + [variant_etag(etag, encoding) for encoding in ENCODINGS]
+        return etags.star_tag or any(etags.contains_weak(candidate.strip('"')) for candidate in candidates)
+    observed_at = result.get(OBSERVED_AT_FIELD)
+    since = parse_date(if_modified_since) if if_modified_since else None
+    return bool(observed_at and since and int(observed_at) <= since.timestamp())
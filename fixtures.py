@@ -0,0 +1,221 @@
+"""
+Upstream yanıtları için kayıt (record) ve tekrar oynatma (replay) fikstürleri.
+
+Performans değişikliklerini gerçek OpenWeather'a karşı ölçmek yavaştır,
+kota harcar ve her seferinde farklı sonuç verir. UPSTREAM_FIXTURE_MODE ile:
+
+- record: upstream'e giden her istek/yanıt çifti (appid parametresi
+  çıkarılarak) UPSTREAM_FIXTURE_FILE dosyasına yazılır,
+- replay: yanıtlar ağa çıkmadan bellekteki kayıtlardan sunulur; kayıttaki
+  süre UPSTREAM_REPLAY_SPEED ile ölçeklenerek beklenir (1 = orijinal hız,
+  10 = on kat hızlı, 0 = beklemeden).
+
+Dosya biçimi satır başına bir JSON kaydıdır (.gz uzantısında gzip ile
+sıkıştırılır):
+
+    {"k": "weather?lang=tr&q=Istanbul&units=metric", "s": 200, "b": "...",
+     "h": {"Content-Type": "..."}, "t": 0.182, "at": 12.5}
+
+`t` yanıt süresi, `at` kaydın başlangıcından itibaren isteğin gönderildiği
+andır (trafik izlerinin zamanlamasıyla tekrar oynatılması için). Zaman
+aşımı ve bağlantı hataları `"x": "timeout"` / `"x": "connection"` olarak
+kaydedilir ve aynı şekilde tekrar üretilir. Aynı anahtar birden çok kez
+kaydedildiyse yanıtlar kayıt sırasıyla (sonunda başa dönerek) sunulur.
+
+Tekrar oynatma requests taşıma adaptörü düzeyinde yapılır; kayıt istemcide,
+yeniden denemeler bittikten sonraki sonuçla tutulur. Devre kesici, kota,
+hedge ve metrikler her iki modda da normal çalışır.
+"""
+
+import atexit
+import gzip
+import json
+import os
+import threading
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+# Fikstür konfigürasyonu (ortam değişkenlerinden)
+UPSTREAM_FIXTURE_MODE = os.getenv('UPSTREAM_FIXTURE_MODE', 'off').lower()
+UPSTREAM_FIXTURE_FILE = os.getenv('UPSTREAM_FIXTURE_FILE', 'upstream_fixtures.jsonl.gz')
+UPSTREAM_REPLAY_SPEED = float(os.getenv('UPSTREAM_REPLAY_SPEED', 1))
+
+# Kayda hiçbir zaman yazılmayan sorgu parametreleri
+REDACTED_PARAMS = frozenset(['appid'])
+
+# Kayıtta tutulan yanıt başlıkları
+RECORDED_HEADERS = ('Content-Type', 'Retry-After')
+
+
+def fixture_key(endpoint, params):
+    """Endpoint ve (gizli parametreleri çıkarılmış) sıralı sorgudan kayıt anahtarı"""
+    items = params.items() if isinstance(params, dict) else params or ()
+    query = sorted((str(k), str(v)) for k, v in items if k not in REDACTED_PARAMS)
+    return f"{endpoint.strip('/')}?{urlencode(query)}"
+
+
+def key_for_url(url):
+    """Tam upstream URL'sinden kayıt anahtarı (endpoint yolun son parçasıdır)"""
+    parts = urlsplit(url)
+    return fixture_key(parts.path.rsplit('/', 1)[-1], parse_qsl(parts.query, keep_blank_values=True))
+
+
+def _open(path, mode):
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+class FixtureRecorder:
+    """Upstream istek/yanıt çiftlerini fikstür dosyasına yazan kaydedici
+
+    Dosya açık tutulur ve her kayıttan sonra diske aktarılır; süreç
+    sinyalle sonlandırılsa bile (gzip kapanış bloğu eksik kalsa da) o ana
+    kadarki kayıtlar okunabilir. Aynı dosyaya tek bir süreç yazmalıdır.
+    """
+
+    mode = 'record'
+
+    def __init__(self, path=UPSTREAM_FIXTURE_FILE):
+        self.path = path
+        self._started = time.monotonic()
+        self._lock = threading.Lock()
+        self._file = None
+        self.recorded = 0
+        atexit.register(self.close)
+
+    def record(self, key, started, elapsed, status=None, body=None, headers=None, error=None):
+        entry = {'k': key, 't': round(elapsed, 4), 'at': round(started - self._started, 4)}
+        if error is not None:
+            entry['x'] = error
+        else:
+            entry['s'] = status
+            entry['b'] = body
+            entry['h'] = {name: headers[name] for name in RECORDED_HEADERS if name in headers}
+        line = json.dumps(entry, ensure_ascii=False, separators=(',', ':')) + '\n'
+        with self._lock:
+            if self._file is None:
+                self._file = _open(self.path, 'a')
+            self._file.write(line)
+            self._file.flush()
+            self.recorded += 1
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def stats(self):
+        with self._lock:
+            return {'mode': self.mode, 'file': self.path, 'recorded': self.recorded}
+
+
+class FixtureStore:
+    """Fikstür dosyasını belleğe yükleyip yanıtları kayıt sırasıyla sunan depo"""
+
+    mode = 'replay'
+
+    def __init__(self, path=UPSTREAM_FIXTURE_FILE, speed=UPSTREAM_REPLAY_SPEED):
+        self.path = path
+        self.speed = speed
+        self._entries = {}
+        self._cursors = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if os.path.exists(path):
+            self._load(path)
+
+    def _load(self, path):
+        with _open(path, 'r') as f:
+            try:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._entries.setdefault(entry['k'], []).append(entry)
+            except (EOFError, ValueError):
+                # Kaydedici sinyalle sonlandıysa dosyanın sonu yarım kalmış olabilir
+                pass
+
+    def __len__(self):
+        return sum(len(entries) for entries in self._entries.values())
+
+    def lookup(self, key):
+        """Anahtar için sıradaki kaydı döndür; kayıt yoksa None"""
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                self.misses += 1
+                return None
+            cursor = self._cursors.get(key, 0)
+            self._cursors[key] = (cursor + 1) % len(entries)
+            self.hits += 1
+            return entries[cursor]
+
+    def delay(self, entry):
+        """Kaydın hıza göre ölçeklenmiş yanıt süresi"""
+        return entry['t'] / self.speed if self.speed > 0 else 0.0
+
+    def stats(self):
+        with self._lock:
+            return {'mode': self.mode, 'file': self.path, 'fixtures': len(self), 'keys': len(self._entries),
+                    'speed': self.speed, 'hits': self.hits, 'misses': self.misses}
+
+
+class ReplayAdapter(BaseAdapter):
+    """Yanıtları ağa çıkmadan fikstür deposundan sunan requests adaptörü"""
+
+    def __init__(self, store):
+        super().__init__()
+        self.store = store
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        key = key_for_url(request.url)
+        entry = self.store.lookup(key)
+        if entry is None:
+            raise requests.exceptions.ConnectionError(f"Kayıtlı upstream yanıtı yok: {key}", request=request)
+
+        delay = self.store.delay(entry)
+        read_timeout = timeout[1] if isinstance(timeout, tuple) else timeout
+        if read_timeout is not None and delay > read_timeout:
+            time.sleep(read_timeout)
+            raise requests.exceptions.ReadTimeout(f"Kayıtlı yanıt {delay:.2f}s sürüyor", request=request)
+        if delay:
+            time.sleep(delay)
+
+        error = entry.get('x')
+        if error == 'timeout':
+            raise requests.exceptions.ReadTimeout('Kayıtlı zaman aşımı', request=request)
+        if error is not None:
+            raise requests.exceptions.ConnectionError('Kayıtlı bağlantı hatası', request=request)
+
+        response = requests.Response()
+        response.status_code = entry['s']
+        response.headers = CaseInsensitiveDict(entry.get('h', {}))
+        response._content = entry['b'].encode('utf-8')
+        response.encoding = 'utf-8'
+        response.url = request.url
+        response.request = request
+        response.reason = 'OK' if entry['s'] == 200 else 'Replayed'
+        return response
+
+    def close(self):
+        pass
+
+
+def create_fixtures(mode=UPSTREAM_FIXTURE_MODE, path=UPSTREAM_FIXTURE_FILE):
+    """Konfigürasyona göre kaydedici, tekrar oynatma deposu ya da None döndür"""
+    if mode == 'record':
+        return FixtureRecorder(path)
+    if mode == 'replay':
+        return FixtureStore(path)
+    return None
+
+
+# Tüm upstream istemcilerinin paylaştığı kayıt/tekrar oynatma deposu (kapalıysa None)
+upstream_fixtures = create_fixtures()
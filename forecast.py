@@ -0,0 +1,173 @@
+"""
+5 günlük / 3 saatlik hava tahmini serilerinin sütunlu (columnar) saklanması.
+
+OpenWeather /forecast yanıtı şehir başına 40 noktalık, iç içe sözlüklerden
+oluşan ~15 KB'lık bir listedir. Önbellekte bunun yerine her alan için tipli
+bir dizi (array) tutulur: zaman damgaları 'q', sıcaklıklar 'f' (float32),
+nem ve yağış olasılığı 'B' (byte). Açıklama ve ikon gibi tekrarlayan
+metinler sözlükle kodlanır; sütunda yalnızca şehre özgü tablo indeksi
+tutulur. 40 noktalık bir seri yaklaşık 1 KB yer kaplar, binlerce şehir
+önbelleğe sığar.
+
+İstekler zaman penceresini (start, end, hours) zaman sütununda ikili arama
+ile bulur ve yalnızca seçilen alanları (fields) pencere içinde satıra
+çevirir; tam yanıt hiçbir zaman yeniden oluşturulmaz.
+"""
+
+import base64
+import os
+from array import array
+from bisect import bisect_left
+
+from weather_cache import create_cache, SHARED_CACHE
+
+# Tahmin önbelleği konfigürasyonu (OpenWeather tahminleri 3 saatte bir güncellenir)
+FORECAST_CACHE_TTL = float(os.getenv('FORECAST_CACHE_TTL', 1800))
+FORECAST_CACHE_MAX_ENTRIES = int(os.getenv('FORECAST_CACHE_MAX_ENTRIES', 5000))
+FORECAST_CACHE_MAX_BYTES = int(os.getenv('FORECAST_CACHE_MAX_BYTES', 10 * 1024 * 1024))
+FORECAST_CACHE_HARD_TTL = float(os.getenv('FORECAST_CACHE_HARD_TTL', 3 * 3600))
+
+# Sayısal sütunlar: alan adı -> (tip kodu, OpenWeather liste öğesinden değer)
+NUMERIC_COLUMNS = {
+    'temperature': ('f', lambda item: item['main']['temp']),
+    'feels_like': ('f', lambda item: item['main']['feels_like']),
+    'humidity': ('B', lambda item: item['main']['humidity']),
+    'wind_speed_kmh': ('f', lambda item: item['wind']['speed'] * 3.6),  # m/s'den km/h'ye çevir
+    'precipitation_chance': ('B', lambda item: round(item.get('pop', 0) * 100)),
+}
+
+# Sözlükle kodlanan metin sütunları: alan adı -> OpenWeather liste öğesinden değer
+TEXT_COLUMNS = {
+    'description': lambda item: item['weather'][0]['description'].title(),
+    'icon': lambda item: item['weather'][0]['icon'],
+}
+
+FORECAST_FIELDS = ('time',) + tuple(NUMERIC_COLUMNS) + tuple(TEXT_COLUMNS)
+
+
+class ForecastSeries:
+    """Bir şehrin tahmin serisi: zaman sütunu ve alan başına tipli diziler"""
+
+    __slots__ = ('city', 'country', 'times', 'columns', 'labels')
+
+    def __init__(self, city, country, times, columns, labels):
+        self.city = city
+        self.country = country
+        self.times = times
+        self.columns = columns
+        self.labels = labels
+
+    @classmethod
+    def from_response(cls, data):
+        """OpenWeather /forecast yanıtından seriyi oluştur (noktalar zamana göre sıralanır)"""
+        items = sorted(data['list'], key=lambda item: item['dt'])
+        city = data.get('city') or {}
+
+        columns = {name: array(typecode, (round(value(item)) if typecode == 'B' else value(item)
+                                          for item in items))
+                   for name, (typecode, value) in NUMERIC_COLUMNS.items()}
+        labels = {}
+        for name, value in TEXT_COLUMNS.items():
+            table = {}
+            columns[name] = array('B', (table.setdefault(value(item), len(table)) for item in items))
+            labels[name] = tuple(table)
+        return cls(city.get('name'), city.get('country'), array('q', (item['dt'] for item in items)),
+                   columns, labels)
+
+    def __len__(self):
+        return len(self.times)
+
+    @property
+    def nbytes(self):
+        """Serinin önbellekte kapladığı yaklaşık boyut (byte)"""
+        size = self.times.itemsize * len(self.times)
+        size += sum(column.itemsize * len(column) for column in self.columns.values())
+        size += sum(len(label) for table in self.labels.values() for label in table)
+        return size + len(self.city or '') + 64
+
+    def window(self, start=None, end=None):
+        """[start, end) zaman penceresindeki noktaların indeks aralığı"""
+        lo = 0 if start is None else bisect_left(self.times, start)
+        hi = len(self.times) if end is None else bisect_left(self.times, end)
+        return lo, max(lo, hi)
+
+    def column(self, name, lo, hi):
+        """Alanın pencere içindeki değerleri (yalnızca bu dilim listeye çevrilir)"""
+        if name == 'time':
+            return self.times[lo:hi].tolist()
+        values = self.columns[name][lo:hi]
+        if name in self.labels:
+            table = self.labels[name]
+            return [table[i] for i in values]
+        if values.typecode == 'f':
+            return [round(value, 1) for value in values]
+        return values.tolist()
+
+    def rows(self, lo, hi, fields=FORECAST_FIELDS):
+        """Pencere içindeki noktaları yalnızca seçilen alanlarla satır sözlüklerine çevir"""
+        return [dict(zip(fields, values))
+                for values in zip(*(self.column(name, lo, hi) for name in fields))]
+
+    def to_dict(self):
+        """Paylaşılan (JSON) önbellek backend'leri için dizileri base64 olarak kodla"""
+        return {
+            'city': self.city,
+            'country': self.country,
+            'times': base64.b64encode(self.times.tobytes()).decode('ascii'),
+            'columns': {name: [column.typecode, base64.b64encode(column.tobytes()).decode('ascii')]
+                        for name, column in self.columns.items()},
+            'labels': {name: list(table) for name, table in self.labels.items()}
+        }
+
+    @classmethod
+    def from_dict(cls, value):
+        """to_dict çıktısından seriyi geri oluştur"""
+        def decode(typecode, encoded):
+            column = array(typecode)
+            column.frombytes(base64.b64decode(encoded))
+            return column
+
+        return cls(value['city'], value['country'], decode('q', value['times']),
+                   {name: decode(typecode, encoded) for name, (typecode, encoded) in value['columns'].items()},
+                   {name: tuple(table) for name, table in value['labels'].items()})
+
+
+def city_summary(data):
+    """/forecast yanıtındaki şehir bilgisini /weather yanıtı biçiminde döndür
+
+    Takma ad dizini, şehir ID çözümleyici ve koordinat dizini tahmin
+    yanıtlarından da öğrenir.
+    """
+    city = data.get('city') or {}
+    return {'id': city.get('id'), 'name': city.get('name'), 'sys': {'country': city.get('country')},
+            'coord': city.get('coord')}
+
+
+def parse_fields(raw):
+    """Virgülle ayrılmış alan listesini doğrula; 'time' her zaman ilk alandır"""
+    if not raw:
+        return FORECAST_FIELDS
+    fields = ['time']
+    for name in raw.split(','):
+        name = name.strip()
+        if name not in FORECAST_FIELDS:
+            raise ValueError(name)
+        if name not in fields:
+            fields.append(name)
+    return tuple(fields)
+
+
+def store_value(series):
+    """Seriyi önbellek backend'ine uygun biçime çevir (süreç içi önbellekte nesnenin kendisi)"""
+    return series.to_dict() if SHARED_CACHE else series
+
+
+def load_value(value):
+    """Önbellekten okunan değeri seriye çevir"""
+    return ForecastSeries.from_dict(value) if isinstance(value, dict) else value
+
+
+# Tahmin serileri hava durumu kayıtlarını tahliye etmesin diye ayrı önbellekte tutulur
+forecast_cache = create_cache('forecast', ttl=FORECAST_CACHE_TTL, max_entries=FORECAST_CACHE_MAX_ENTRIES,
+                              max_bytes=FORECAST_CACHE_MAX_BYTES, max_age=FORECAST_CACHE_HARD_TTL,
+                              sizeof=lambda value: value.nbytes)
@@ -0,0 +1,196 @@
+"""
+Upstream gecikme dağılımı, uyarlanabilir zaman aşımı ve hedged istekler.
+
+Sabit 10 saniyelik okuma zaman aşımı OpenWeather'ın normal gecikmesinin çok
+üzerindedir; tek bir yavaş bağlantı p99'u belirler. HedgePolicy son
+UPSTREAM_LATENCY_WINDOW çağrının gecikmesini tutar ve:
+
+- okuma zaman aşımını gözlenen p99 * UPSTREAM_TIMEOUT_MULTIPLIER olarak
+  türetir (UPSTREAM_MIN_READ_TIMEOUT ile UPSTREAM_READ_TIMEOUT arasında),
+- ilk deneme gözlenen p95'i (UPSTREAM_HEDGE_PERCENTILE) aştığında ikinci
+  bir "hedged" istek gönderilmesine izin verir; önce gelen yanıt kullanılır.
+
+Hedged istekler bir bütçeyle sınırlıdır: her istek bütçeye
+UPSTREAM_HEDGE_BUDGET kadar (örn. 0.05 = %5) token ekler, her hedge bir
+token harcar. Böylece kota kullanımı en fazla bu oranda artar.
+
+Çağrı başına gecikme (latency) ve çağıranın gördüğü etkin gecikme
+(effective_latency) ayrı histogramlarda raporlanır; hedge'in etkisi ikisi
+karşılaştırılarak görülür.
+"""
+
+import os
+import threading
+from collections import deque
+
+# Gecikme ve hedge konfigürasyonu (ortam değişkenlerinden)
+UPSTREAM_ADAPTIVE_TIMEOUT = os.getenv('UPSTREAM_ADAPTIVE_TIMEOUT', 'True').lower() == 'true'
+UPSTREAM_TIMEOUT_MULTIPLIER = float(os.getenv('UPSTREAM_TIMEOUT_MULTIPLIER', 3))
+UPSTREAM_MIN_READ_TIMEOUT = float(os.getenv('UPSTREAM_MIN_READ_TIMEOUT', 1))
+UPSTREAM_LATENCY_WINDOW = int(os.getenv('UPSTREAM_LATENCY_WINDOW', 500))
+UPSTREAM_LATENCY_MIN_SAMPLES = int(os.getenv('UPSTREAM_LATENCY_MIN_SAMPLES', 20))
+UPSTREAM_HEDGE = os.getenv('UPSTREAM_HEDGE', 'True').lower() == 'true'
+UPSTREAM_HEDGE_PERCENTILE = float(os.getenv('UPSTREAM_HEDGE_PERCENTILE', 95))
+UPSTREAM_HEDGE_BUDGET = float(os.getenv('UPSTREAM_HEDGE_BUDGET', 0.05))
+UPSTREAM_HEDGE_MAX_BURST = float(os.getenv('UPSTREAM_HEDGE_MAX_BURST', 10))
+
+# Histogram sınırları (saniye); son kova sınırsızdır
+LATENCY_BUCKETS = (0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Yüzdelikler her bu kadar yeni örnekte bir yeniden hesaplanır
+_RECOMPUTE_EVERY = 10
+
+
+class LatencyTracker:
+    """Son N gecikmenin kayan penceresi ve kümülatif histogram"""
+
+    def __init__(self, window=UPSTREAM_LATENCY_WINDOW, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._counts = [0] * (len(buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._sorted = []
+        self._dirty = 0
+
+    def record(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+            self._sum += seconds
+            self._count += 1
+            for index, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    self._counts[index] += 1
+                    break
+            else:
+                self._counts[-1] += 1
+            self._dirty += 1
+
+    def __len__(self):
+        return len(self._samples)
+
+    def percentile(self, pct):
+        """Penceredeki gecikmelerin yüzdelik değeri; örnek yoksa None"""
+        with self._lock:
+            if not self._samples:
+                return None
+            if self._dirty >= _RECOMPUTE_EVERY or len(self._sorted) != len(self._samples):
+                self._sorted = sorted(self._samples)
+                self._dirty = 0
+            values = self._sorted
+        index = min(len(values) - 1, max(0, int(round(pct / 100 * len(values))) - 1))
+        return values[index]
+
+    def histogram(self):
+        """Kümülatif olmayan kova sayıları ({'<=0.1': n, ..., '>10.0': n})"""
+        with self._lock:
+            counts = list(self._counts)
+        labels = [f"<={bound}" for bound in self.buckets] + [f">{self.buckets[-1]}"]
+        return dict(zip(labels, counts))
+
+    def stats(self):
+        p50, p95, p99 = (self.percentile(p) for p in (50, 95, 99))
+        with self._lock:
+            count, total = self._count, self._sum
+        return {
+            'count': count,
+            'mean_ms': round(total / count * 1000, 1) if count else None,
+            'p50_ms': round(p50 * 1000, 1) if p50 is not None else None,
+            'p95_ms': round(p95 * 1000, 1) if p95 is not None else None,
+            'p99_ms': round(p99 * 1000, 1) if p99 is not None else None,
+            'histogram': self.histogram()
+        }
+
+
+class HedgePolicy:
+    """Gecikme dağılımından zaman aşımı ve hedge kararlarını türeten politika"""
+
+    def __init__(self, read_timeout, adaptive=UPSTREAM_ADAPTIVE_TIMEOUT, multiplier=UPSTREAM_TIMEOUT_MULTIPLIER,
+                 min_read_timeout=UPSTREAM_MIN_READ_TIMEOUT, min_samples=UPSTREAM_LATENCY_MIN_SAMPLES,
+                 hedge=UPSTREAM_HEDGE, hedge_percentile=UPSTREAM_HEDGE_PERCENTILE,
+                 hedge_budget=UPSTREAM_HEDGE_BUDGET, max_burst=UPSTREAM_HEDGE_MAX_BURST,
+                 window=UPSTREAM_LATENCY_WINDOW):
+        self.max_read_timeout = read_timeout
+        self.adaptive = adaptive
+        self.multiplier = multiplier
+        self.min_read_timeout = min(min_read_timeout, read_timeout)
+        self.min_samples = min_samples
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.hedge_budget = hedge_budget
+        self.max_burst = max_burst
+
+        self.latency = LatencyTracker(window)
+        self.effective_latency = LatencyTracker(window)
+
+        self._lock = threading.Lock()
+        self._tokens = 0.0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.budget_skips = 0
+
+    def read_timeout(self):
+        """Gözlenen p99'dan türetilen okuma zaman aşımı (yeterli örnek yoksa sabit değer)"""
+        if not self.adaptive or len(self.latency) < self.min_samples:
+            return self.max_read_timeout
+        p99 = self.latency.percentile(99)
+        return min(self.max_read_timeout, max(self.min_read_timeout, p99 * self.multiplier))
+
+    def hedge_delay(self):
+        """Hedge için beklenecek süre; hedge yapılmayacaksa None
+
+        Her çağrı bütçeye hedge_budget kadar token ekler.
+        """
+        if not self.hedge:
+            return None
+        with self._lock:
+            self._tokens = min(self.max_burst, self._tokens + self.hedge_budget)
+            has_budget = self._tokens >= 1
+        if len(self.latency) < self.min_samples:
+            return None
+        if not has_budget:
+            with self._lock:
+                self.budget_skips += 1
+            return None
+        return self.latency.percentile(self.hedge_percentile)
+
+    def take_hedge(self):
+        """Hedge için bütçeden bir token düş; bütçe yoksa False"""
+        with self._lock:
+            if self._tokens < 1:
+                self.budget_skips += 1
+                return False
+            self._tokens -= 1
+            self.hedges += 1
+            return True
+
+    def refund_hedge(self):
+        """Kota ya da devre kesici izin vermediği için gönderilmeyen hedge'in token'ını geri ver"""
+        with self._lock:
+            self._tokens = min(self.max_burst, self._tokens + 1)
+            self.hedges -= 1
+
+    def record_hedge_win(self):
+        with self._lock:
+            self.hedge_wins += 1
+
+    def stats(self):
+        with self._lock:
+            counters = {
+                'hedging': self.hedge,
+                'hedges': self.hedges,
+                'hedge_wins': self.hedge_wins,
+                'hedge_budget': self.hedge_budget,
+                'hedge_tokens': round(self._tokens, 2),
+                'budget_skips': self.budget_skips
+            }
+        delay = self.latency.percentile(self.hedge_percentile) if len(self.latency) >= self.min_samples else None
+        counters.update({
+            'adaptive_timeout': self.adaptive,
+            'read_timeout': round(self.read_timeout(), 3),
+            'hedge_after_ms': round(delay * 1000, 1) if delay is not None and self.hedge else None,
+            'latency': self.latency.stats(),
+            'effective_latency': self.effective_latency.stats()
+        })
+        return counters
@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+"""
+Trafik izi (trace) tabanlı yük testi.
+
+test_swagger.py tek tek istekleri doğrular; bu script ise gerçek trafiğe
+benzeyen bir istek akışını servise uygular. Akış iki kaynaktan gelir:
+
+- --trace: (timestamp, city, route) kayıtlarından oluşan JSONL/CSV dosyası
+  (.gz olabilir). UPSTREAM_FIXTURE_MODE=record ile kaydedilen upstream
+  fikstür dosyaları da kabul edilir (`at` ve `k` alanlarından).
+- parametrik model: Zipf dağılımlı şehir karışımı, Poisson gelişler,
+  periyodik trafik patlamaları ve belirli oranda yazım hataları.
+
+İstekler open-loop gönderilir: her istek izdeki zamanında (--speed ile
+ölçeklenerek) gönderilir, önceki isteklerin bitmesi beklenmez ve gecikme
+isteğin planlanan zamanından itibaren ölçülür. Böylece yavaşlayan servis
+yük üreticisini de yavaşlatıp kuyrukta bekleme süresini gizleyemez
+(coordinated omission).
+
+Rapor: route başına ve toplam p50/p95/p99, hata oranları, planlanan
+zamandan sapma (yük üreticisinin yetişip yetişmediği) ve upstream çağrı
+çoğalması (upstream çağrısı / istemci isteği).
+
+Örnek:
+    # Çalışan servise (varsayılan test_swagger.py adresi) 60 sn Zipf yükü
+    python load_test.py --duration 60 --rate 50 --cities 200 --typo-rate 0.02
+
+    # Yerel stub ile uygulamayı kendisi başlatır; üretilen izi kaydeder
+    python load_test.py --target async --rate 500 --burst-every 10 --burst-factor 5 --save-trace trace.jsonl
+
+    # Kaydedilmiş izi 4 kat hızlı tekrar oynat
+    python load_test.py --url http://localhost:5001 --trace trace.jsonl --speed 4 --output run.json
+"""
+
+import argparse
+import asyncio
+import bisect
+import csv
+import gzip
+import json
+import os
+import random
+import sys
+import time
+from collections import namedtuple
+from datetime import datetime, timezone
+from urllib.parse import parse_qs, quote, urlsplit
+from urllib.request import urlopen
+
+from benchmark import (ROOT, TARGETS, free_port, wait_for_port, start_process, percentile, summarize,
+                       http_get, _git_commit)
+
+# --url verilmezse yük uygulanacak servis (test_*.py imaja girmediği için burada tanımlı)
+LOAD_TEST_URL = os.getenv('LOAD_TEST_URL', f"http://localhost:{os.getenv('PORT', 5001)}")
+
+# İz kaydı: `at` izin başından itibaren saniye, `route` ROUTES anahtarlarından biri
+TraceRecord = namedtuple('TraceRecord', ['at', 'city', 'route'])
+
+# Route isimleri -> istek yolu şablonları
+ROUTES = {
+    'query': '/api/v1/weather?city={city}',
+    'path': '/api/v1/weather/{city}',
+    'batch': '/api/v1/weather/batch?cities={city}',
+    'legacy': '/weather?city={city}',
+}
+
+# Parametrik modelin kullandığı popüler şehirler (sıklık sırasıyla)
+DEFAULT_CITIES = [
+    'Istanbul', 'Ankara', 'Izmir', 'Bursa', 'Antalya', 'Adana', 'Konya', 'Gaziantep', 'Kayseri',
+    'Mersin', 'Eskisehir', 'Diyarbakir', 'Samsun', 'Denizli', 'Sanliurfa', 'Trabzon', 'Malatya',
+    'Erzurum', 'Van', 'Mugla', 'Bodrum', 'Canakkale', 'Edirne', 'Rize', 'Sinop',
+    'London', 'Paris', 'Berlin', 'Madrid', 'Rome', 'Amsterdam', 'Vienna', 'Athens', 'Moscow',
+    'New York', 'Tokyo', 'Dubai', 'Cairo', 'Baku', 'Tbilisi', 'Sofia', 'Bucharest', 'Prague',
+]
+
+
+def _open(path):
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8')
+    return open(path, encoding='utf-8', newline='')
+
+
+def _timestamp(value):
+    """Saniye (sayı) ya da ISO 8601 zaman damgasını saniyeye çevir"""
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(str(value).replace('Z', '+00:00')).timestamp()
+
+
+def _record(row):
+    if 'k' in row:
+        # Upstream fikstür kaydı: anahtar "weather?lang=tr&q=Istanbul&units=metric"
+        city = parse_qs(row['k'].partition('?')[2]).get('q', [''])[0]
+        return TraceRecord(float(row['at']), city, 'query')
+    at = row.get('timestamp', row.get('at'))
+    return TraceRecord(_timestamp(at), row['city'], row.get('route') or 'query')
+
+
+def load_trace(path):
+    """İz dosyasını oku; kayıtları zamana göre sıralayıp izin başına göre kaydır"""
+    rows = []
+    with _open(path) as f:
+        try:
+            if path.endswith(('.csv', '.csv.gz')):
+                rows.extend(csv.DictReader(f))
+            else:
+                rows.extend(json.loads(line) for line in f if line.strip())
+        except EOFError:
+            # Sinyalle sonlanan kaydedicinin gzip dosyası yarım kalmış olabilir
+            pass
+    records = sorted((_record(row) for row in rows if row.get('city') or row.get('k')),
+                     key=lambda record: record.at)
+    if not records:
+        return []
+    start = records[0].at
+    return [record._replace(at=record.at - start) for record in records]
+
+
+def save_trace(records, path):
+    """İzi JSONL olarak yaz (sonradan --trace ile tekrar oynatmak için)"""
+    with (gzip.open(path, 'wt', encoding='utf-8') if path.endswith('.gz')
+          else open(path, 'w', encoding='utf-8')) as f:
+        for record in records:
+            f.write(json.dumps({'timestamp': round(record.at, 4), 'city': record.city, 'route': record.route},
+                               ensure_ascii=False) + '\n')
+
+
+def typo(name, rng):
+    """Şehir ismine kullanıcıların yaptığı türden bir yazım farkı ekle"""
+    kind = rng.randrange(4)
+    if kind == 0:
+        return name.upper()
+    if kind == 1:
+        return f" {name.lower()} "
+    if len(name) < 3:
+        return name + name[-1]
+    index = rng.randrange(1, len(name) - 1)
+    if kind == 2:
+        # İki harfin yer değiştirmesi (upstream'de çoğunlukla 404)
+        return name[:index] + name[index + 1] + name[index] + name[index + 2:]
+    # Harf eksikliği
+    return name[:index] + name[index + 1:]
+
+
+def zipf_trace(duration, rate, cities, zipf_s=1.1, burst_every=0.0, burst_length=1.0, burst_factor=1.0,
+               typo_rate=0.0, routes=('query',), seed=0):
+    """Zipf şehir karışımı, Poisson gelişler ve periyodik patlamalarla iz üret
+
+    Sıradaki i. şehrin seçilme olasılığı 1 / i**zipf_s ile orantılıdır.
+    burst_every > 0 ise her burst_every saniyenin ilk burst_length saniyesinde
+    geliş hızı burst_factor katına çıkar.
+    """
+    rng = random.Random(seed)
+    cumulative = []
+    total = 0.0
+    for rank in range(1, len(cities) + 1):
+        total += 1 / rank ** zipf_s
+        cumulative.append(total)
+    peak = rate * max(1.0, burst_factor)
+
+    records = []
+    at = 0.0
+    while True:
+        # Tepe hızında Poisson gelişler, anlık hıza göre seyreltilir (thinning)
+        at += rng.expovariate(peak)
+        if at >= duration:
+            return records
+        current = rate
+        if burst_every and at % burst_every < burst_length:
+            current = rate * burst_factor
+        if rng.random() * peak > current:
+            continue
+        city = cities[min(len(cities) - 1, bisect.bisect_left(cumulative, rng.random() * total))]
+        if typo_rate and rng.random() < typo_rate:
+            city = typo(city, rng)
+        records.append(TraceRecord(at, city, rng.choice(routes)))
+
+
+def model_cities(count):
+    """Modelin şehir listesi; popüler şehirlerden fazlası uzun kuyruk olarak üretilir"""
+    cities = DEFAULT_CITIES[:count]
+    cities += [f"Town-{i}" for i in range(count - len(cities))]
+    return cities
+
+
+def request_path(record):
+    template = ROUTES.get(record.route)
+    if template is None:
+        raise ValueError(f"Bilinmeyen route: {record.route}")
+    return template.format(city=quote(record.city, safe=','))
+
+
+async def run_open_loop(base_url, records, speed=1.0, max_connections=1000):
+    """İzi open-loop uygula; route -> (gecikmeler, durum kodları) ve gönderim sapmalarını döndür
+
+    Gecikme isteğin planlanan gönderim anından ölçülür. Bağlantı sınırına
+    takılan istekler bağlantı beklerken de süreleri işlemeye devam eder.
+    """
+    url = urlsplit(base_url)
+    idle = []
+    limit = asyncio.Semaphore(max_connections)
+    results = {}
+    lags = []
+
+    async def send(record, path, scheduled):
+        async with limit:
+            lags.append(time.perf_counter() - scheduled)
+            conn = idle.pop() if idle else None
+            try:
+                status, conn = await http_get(conn, url.hostname, url.port, path)
+            except (OSError, ValueError, asyncio.IncompleteReadError):
+                status, conn = 0, None
+            if conn is not None:
+                idle.append(conn)
+        latencies, statuses = results.setdefault(record.route, ([], []))
+        latencies.append(time.perf_counter() - scheduled)
+        statuses.append(status)
+
+    tasks = []
+    started = time.perf_counter()
+    for record in records:
+        scheduled = started + (record.at / speed if speed > 0 else 0.0)
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.ensure_future(send(record, request_path(record), scheduled)))
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+    for _, writer in idle:
+        writer.close()
+    return results, sorted(lags), elapsed
+
+
+def service_stats(base_url):
+    """Servisin istatistiklerini oku (/api/v1/stats, yoksa app.py'nin /stats'ı); okunamazsa None"""
+    for path in ('/api/v1/stats', '/stats'):
+        try:
+            with urlopen(f"{base_url}{path}", timeout=10) as response:
+                return json.load(response)
+        except (OSError, ValueError):
+            continue
+    return None
+
+
+def stub_requests(stub_url):
+    url = urlsplit(stub_url)
+    with urlopen(f"{url.scheme}://{url.netloc}/__stub/stats", timeout=10) as response:
+        return json.load(response)['requests']
+
+
+def _upstream_calls(stats):
+    upstream = (stats or {}).get('upstream') or {}
+    if 'requests' not in upstream:
+        return None
+    return upstream['requests'] + upstream.get('retries', 0)
+
+
+def _counter(stats, section, name):
+    return ((stats or {}).get(section) or {}).get(name, 0)
+
+
+def build_report(results, lags, elapsed, before, after, upstream_calls):
+    """Route başına ve toplam özet, gönderim sapması ve upstream çoğalması"""
+    routes = {route: summarize(latencies, statuses, elapsed) for route, (latencies, statuses) in results.items()}
+    total = summarize([value for latencies, _ in results.values() for value in latencies],
+                      [value for _, statuses in results.values() for value in statuses], elapsed)
+    for summary in list(routes.values()) + [total]:
+        summary['error_rate'] = round(summary['errors'] / summary['requests'], 4) if summary['requests'] else 0.0
+
+    report = {'total': total, 'routes': routes,
+              'send_lag_ms': {'p50': round(percentile(lags, 50) * 1000, 1),
+                              'p99': round(percentile(lags, 99) * 1000, 1),
+                              'max': round(lags[-1] * 1000, 1) if lags else 0.0}}
+    if upstream_calls is not None:
+        report['upstream_calls'] = upstream_calls
+        report['amplification'] = round(upstream_calls / total['requests'], 4) if total['requests'] else 0.0
+    if before is not None and after is not None:
+        report['service'] = {
+            'cache_hits': _counter(after, 'cache', 'hits') - _counter(before, 'cache', 'hits'),
+            'cache_stale_hits': _counter(after, 'cache', 'stale_hits') - _counter(before, 'cache', 'stale_hits'),
+            'cache_misses': _counter(after, 'cache', 'misses') - _counter(before, 'cache', 'misses'),
+            'coalesced': _counter(after, 'coalescing', 'coalesced') - _counter(before, 'coalescing', 'coalesced'),
+        }
+    return report
+
+
+def run(base_url, records, speed, max_connections, stub_url=None):
+    """İzi uygula ve öncesi/sonrası sayaçlarla raporu oluştur"""
+    before = service_stats(base_url)
+    stub_before = stub_requests(stub_url) if stub_url else None
+    results, lags, elapsed = asyncio.run(run_open_loop(base_url, records, speed, max_connections))
+    after = service_stats(base_url)
+
+    if stub_url:
+        upstream_calls = stub_requests(stub_url) - stub_before
+    else:
+        calls_before, calls_after = _upstream_calls(before), _upstream_calls(after)
+        upstream_calls = calls_after - calls_before if None not in (calls_before, calls_after) else None
+    return build_report(results, lags, elapsed, before, after, upstream_calls)
+
+
+def run_against_target(target, records, speed, max_connections, latency, error_rate):
+    """Yerel stub ve uygulamayı ayrı süreçlerde başlatıp izi uygula"""
+    stub_port = free_port()
+    stub = start_process([sys.executable, os.path.join(ROOT, 'stub_openweather.py'), '--port', str(stub_port),
+                          '--latency', str(latency), '--error-rate', str(error_rate)], dict(os.environ))
+    try:
+        wait_for_port(stub_port)
+        stub_url = f"http://127.0.0.1:{stub_port}/data/2.5"
+        port = free_port()
+        env = dict(os.environ, PORT=str(port), OPENWEATHER_BASE_URL=stub_url, FLASK_DEBUG='False',
+                   OPENWEATHER_API_KEY=os.getenv('OPENWEATHER_API_KEY', 'load-test'),
+                   UPSTREAM_QUOTA_PER_MINUTE='0', WARMER_ENABLED='False')
+        app = start_process(TARGETS[target], env)
+        try:
+            wait_for_port(port)
+            return run(f"http://127.0.0.1:{port}", records, speed, max_connections, stub_url)
+        finally:
+            app.terminate()
+            app.wait(timeout=10)
+    finally:
+        stub.terminate()
+        stub.wait(timeout=10)
+
+
+def print_report(report):
+    print(f"{'route':<8} {'istek':>7} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>9} {'hata %':>7}  durumlar")
+    rows = sorted(report['routes'].items()) + [('toplam', report['total'])]
+    for route, summary in rows:
+        print(f"{route:<8} {summary['requests']:>7} {summary['throughput_rps']:>8} {summary['p50_ms']:>8} "
+              f"{summary['p95_ms']:>8} {summary['p99_ms']:>9} {summary['error_rate'] * 100:>7.2f}  "
+              f"{summary['statuses']}")
+    lag = report['send_lag_ms']
+    print(f"\n⏱️ Planlanan zamandan sapma: p50 {lag['p50']}ms, p99 {lag['p99']}ms, en fazla {lag['max']}ms")
+    if 'amplification' in report:
+        print(f"📡 Upstream çağrısı: {report['upstream_calls']} (istek başına {report['amplification']})")
+    if 'service' in report:
+        service = report['service']
+        print(f"🗄️ Önbellek: {service['cache_hits']} hit, {service['cache_stale_hits']} bayat, "
+              f"{service['cache_misses']} miss, {service['coalesced']} birleştirilen istek")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Trafik izi tabanlı open-loop yük testi')
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--url', default=LOAD_TEST_URL, help='Yük uygulanacak çalışan servis (LOAD_TEST_URL)')
+    source.add_argument('--target', choices=sorted(TARGETS),
+                        help='Uygulamayı yerel OpenWeather stub\'ıyla kendisi başlat')
+    parser.add_argument('--trace', help='(timestamp, city, route) kayıtlarından oluşan JSONL/CSV iz dosyası')
+    parser.add_argument('--speed', type=float, default=1.0, help='Tekrar oynatma hız çarpanı (0 = beklemeden)')
+    parser.add_argument('--duration', type=float, default=30.0, help='Model: iz süresi (saniye)')
+    parser.add_argument('--rate', type=float, default=20.0, help='Model: saniyedeki ortalama istek')
+    parser.add_argument('--cities', type=int, default=100, help='Model: farklı şehir sayısı')
+    parser.add_argument('--zipf', type=float, default=1.1, help='Model: Zipf üssü (büyüdükçe daha çarpık)')
+    parser.add_argument('--burst-every', type=float, default=0.0, help='Model: patlamalar arası süre (0 = yok)')
+    parser.add_argument('--burst-length', type=float, default=1.0, help='Model: patlama süresi (saniye)')
+    parser.add_argument('--burst-factor', type=float, default=5.0, help='Model: patlamada hız çarpanı')
+    parser.add_argument('--typo-rate', type=float, default=0.0, help='Model: yazım hatalı istek oranı')
+    parser.add_argument('--routes', default='query,path', help=f"Model: virgülle ayrılmış route'lar ({', '.join(ROUTES)})")
+    parser.add_argument('--seed', type=int, default=0, help='Model rastgelelik tohumu')
+    parser.add_argument('--max-connections', type=int, default=1000, help='Açık bağlantı sınırı')
+    parser.add_argument('--latency', type=float, default=0.2, help='--target: stub upstream gecikmesi (saniye)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='--target: stub\'ın 5xx döndürdüğü oran')
+    parser.add_argument('--save-trace', help='Uygulanan izin yazılacağı JSONL dosyası')
+    parser.add_argument('--output', help='Raporun yazılacağı JSON dosyası')
+    args = parser.parse_args()
+
+    if args.trace:
+        records = load_trace(args.trace)
+    else:
+        routes = tuple(route.strip() for route in args.routes.split(',') if route.strip())
+        unknown = set(routes) - set(ROUTES)
+        if unknown:
+            parser.error(f"Bilinmeyen route: {', '.join(sorted(unknown))}")
+        records = zipf_trace(args.duration, args.rate, model_cities(args.cities), args.zipf, args.burst_every,
+                             args.burst_length, args.burst_factor, args.typo_rate, routes, args.seed)
+    if not records:
+        parser.error('İzde istek yok')
+    if args.save_trace:
+        save_trace(records, args.save_trace)
+
+    span = records[-1].at / args.speed if args.speed > 0 else 0.0
+    print(f"🚦 {len(records)} istek, {len({record.city for record in records})} farklı şehir, "
+          f"~{span:.1f}s (hız x{args.speed:g}) -> {args.target or args.url}\n")
+    if args.target:
+        report = run_against_target(args.target, records, args.speed, args.max_connections,
+                                    args.latency, args.error_rate)
+    else:
+        report = run(args.url.rstrip('/'), records, args.speed, args.max_connections)
+    print_report(report)
+
+    if args.output:
+        report['meta'] = {
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'commit': _git_commit(),
+            'args': vars(args)
+        }
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 Rapor kaydedildi: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
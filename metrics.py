@@ -0,0 +1,330 @@
+"""
+Prometheus metin formatında servis metrikleri (/metrics).
+
+İstek yolunda kilit tutulmaz: her iş parçacığı kendi sayaç parçasına
+(shard) yazar, parçalar yalnızca /metrics okunurken birleştirilir. Biten
+iş parçacıklarının parçaları ara sıra tek bir "emekli" parçada toplanır;
+threaded Flask her istek için yeni iş parçacığı açsa da bellek büyümez.
+
+Toplanan seriler:
+
+- weather_api_http_request_duration_seconds{route,method,status}
+  (histogram; _count route/durum başına istek sayısıdır)
+- weather_api_http_requests_in_flight{route}
+- weather_api_upstream_request_duration_seconds{endpoint}
+- weather_api_upstream_responses_total{endpoint,status}
+- weather_api_cache_lookups_total{result}  (hit / miss / stale)
+- weather_api_geo_lookups_total{result}  (city / cell)
+
+Birden fazla worker süreci (gunicorn) varsa METRICS_MULTIPROC_DIR ile
+paylaşılan bir dizin verilir: her süreç anlık görüntüsünü
+METRICS_FLUSH_INTERVAL saniyede bir bu dizine yazar ve /metrics'i yanıtlayan
+süreç tüm dosyaları toplar. Sonlanan süreçlerin sayaçları korunur,
+anlık değerleri (gauge) atılır. Devre kesici, kabul kontrolü ve kota gibi
+/metrics okunurken hesaplanan değerler yanıtlayan sürecin değerleridir.
+"""
+
+import atexit
+import json
+import os
+import threading
+
+from hedging import LATENCY_BUCKETS
+
+# Metrik konfigürasyonu (ortam değişkenlerinden)
+METRICS_PREFIX = os.getenv('METRICS_PREFIX', 'weather_api')
+METRICS_MULTIPROC_DIR = os.getenv('METRICS_MULTIPROC_DIR', '')
+METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', 5))
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+COUNTER = 'counter'
+GAUGE = 'gauge'
+HISTOGRAM = 'histogram'
+
+# Biten iş parçacıklarının parçaları her bu kadar yeni parçada bir birleştirilir
+_COMPACT_EVERY = 64
+
+
+class _Shard:
+    """Tek bir iş parçacığının yazdığı sayaçlar"""
+
+    __slots__ = ('counters', 'gauges', 'histograms')
+
+    def __init__(self):
+        self.counters = {}
+        self.gauges = {}
+        # anahtar -> [kova sayıları..., taşma, toplam, adet]
+        self.histograms = {}
+
+    def merge(self, other):
+        # Sahibi iş parçacığı yeni etiket ekledikçe sözlük büyür; üzerinde doğrudan
+        # gezinmek "dictionary changed size" hatası verir. list(d.items()) GIL altında
+        # tek adımda kopyalanır, yazma yolu kilitsiz kalır.
+        for key, value in list(other.counters.items()):
+            self.counters[key] = self.counters.get(key, 0) + value
+        for key, value in list(other.gauges.items()):
+            self.gauges[key] = self.gauges.get(key, 0) + value
+        for key, values in list(other.histograms.items()):
+            mine = self.histograms.get(key)
+            if mine is None:
+                self.histograms[key] = list(values)
+            else:
+                for index, value in enumerate(values):
+                    mine[index] += value
+
+
+def _labels(labels):
+    return tuple(sorted(labels.items()))
+
+
+class MetricsRegistry:
+    """İş parçacığı parçalı, çok süreçli toplamayı destekleyen metrik kaydı"""
+
+    def __init__(self, prefix=METRICS_PREFIX, buckets=LATENCY_BUCKETS,
+                 multiproc_dir=METRICS_MULTIPROC_DIR, flush_interval=METRICS_FLUSH_INTERVAL):
+        self.prefix = prefix
+        self.buckets = buckets
+        self.multiproc_dir = multiproc_dir
+        self.flush_interval = flush_interval
+
+        self._local = threading.local()
+        self._shards = []
+        self._retired = _Shard()
+        self._shards_lock = threading.Lock()
+        self._registered = 0
+
+        self._help = {}
+        self._collectors = {}
+        self._flusher = None
+        self._stop = threading.Event()
+
+    def describe(self, name, kind, help_text):
+        """Seriyi türü ve açıklamasıyla tanımla"""
+        self._help[name] = (kind, help_text)
+
+    def register_collector(self, key, collect):
+        """/metrics okunurken çağrılacak fonksiyonu `key` adıyla ekle (aynı ad yenisiyle değişir)
+
+        `collect()` (ad, tür, açıklama, etiketler, değer) demetleri üretir.
+        """
+        self._collectors[key] = collect
+
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = _Shard()
+            with self._shards_lock:
+                self._shards.append((threading.current_thread(), shard))
+                self._registered += 1
+                if self._registered % _COMPACT_EVERY == 0:
+                    self._compact()
+        return shard
+
+    def _compact(self):
+        """Biten iş parçacıklarının parçalarını emekli parçaya taşı (kilit tutulurken çağrılır)"""
+        alive = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                alive.append((thread, shard))
+            else:
+                self._retired.merge(shard)
+        self._shards = alive
+
+    def inc(self, name, value=1, **labels):
+        counters = self._shard().counters
+        key = (name, _labels(labels))
+        counters[key] = counters.get(key, 0) + value
+
+    def gauge_add(self, name, delta, **labels):
+        gauges = self._shard().gauges
+        key = (name, _labels(labels))
+        gauges[key] = gauges.get(key, 0) + delta
+
+    def observe(self, name, seconds, **labels):
+        histograms = self._shard().histograms
+        key = (name, _labels(labels))
+        values = histograms.get(key)
+        if values is None:
+            values = histograms[key] = [0] * (len(self.buckets) + 3)
+        for index, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                values[index] += 1
+                break
+        else:
+            values[len(self.buckets)] += 1
+        values[-2] += seconds
+        values[-1] += 1
+
+    def snapshot(self):
+        """Bu sürecin tüm parçalarını tek bir parçada birleştir"""
+        total = _Shard()
+        with self._shards_lock:
+            self._compact()
+            total.merge(self._retired)
+            shards = [shard for _, shard in self._shards]
+        for shard in shards:
+            total.merge(shard)
+        return total
+
+    # Çok süreçli toplama
+
+    def _path(self, pid):
+        return os.path.join(self.multiproc_dir, f"metrics-{pid}.json")
+
+    def flush(self):
+        """Bu sürecin anlık görüntüsünü paylaşılan dizine yaz"""
+        if not self.multiproc_dir:
+            return
+        shard = self.snapshot()
+        data = {kind: [[name, list(labels), value] for (name, labels), value in getattr(shard, kind).items()]
+                for kind in ('counters', 'gauges', 'histograms')}
+        path = self._path(os.getpid())
+        tmp = f"{path}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+
+    def _load(self, path):
+        with open(path) as f:
+            data = json.load(f)
+        shard = _Shard()
+        for kind in ('counters', 'gauges', 'histograms'):
+            target = getattr(shard, kind)
+            for name, labels, value in data.get(kind, []):
+                target[(name, tuple(tuple(pair) for pair in labels))] = value
+        return shard
+
+    def _aggregate(self):
+        """Bu süreç ve (varsa) diğer worker'ların dosyalarından toplam görüntü"""
+        total = self.snapshot()
+        if not self.multiproc_dir:
+            return total
+        own = os.getpid()
+        for filename in os.listdir(self.multiproc_dir):
+            if not (filename.startswith('metrics-') and filename.endswith('.json')):
+                continue
+            try:
+                pid = int(filename[len('metrics-'):-len('.json')])
+            except ValueError:
+                continue
+            if pid == own:
+                continue
+            try:
+                shard = self._load(os.path.join(self.multiproc_dir, filename))
+            except (OSError, ValueError):
+                continue
+            if not _pid_alive(pid):
+                shard.gauges.clear()
+            total.merge(shard)
+        return total
+
+    def start(self):
+        """Çok süreçli modda periyodik yazmayı başlat"""
+        if not self.multiproc_dir or self._flusher is not None:
+            return
+        os.makedirs(self.multiproc_dir, exist_ok=True)
+        self._flusher = threading.Thread(target=self._run, name='metrics-flush', daemon=True)
+        self._flusher.start()
+        atexit.register(self.stop)
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except OSError:
+                pass
+
+    def stop(self):
+        self._stop.set()
+        try:
+            self.flush()
+        except OSError:
+            pass
+
+    # Prometheus metin formatı
+
+    def render(self):
+        """Tüm serileri Prometheus metin formatında döndür"""
+        total = self._aggregate()
+        series = {}
+        for (name, labels), value in total.counters.items():
+            series.setdefault(name, []).append((labels, value))
+        for (name, labels), value in total.gauges.items():
+            series.setdefault(name, []).append((labels, value))
+        for (name, labels), values in total.histograms.items():
+            series.setdefault(name, []).append((labels, values))
+
+        collected = {}
+        for collect in list(self._collectors.values()):
+            try:
+                for name, kind, help_text, labels, value in collect():
+                    self._help.setdefault(name, (kind, help_text))
+                    collected.setdefault(name, []).append((_labels(labels), value))
+            except Exception:
+                # Bozuk bir toplayıcı tüm metrik çıktısını engellememeli
+                continue
+        for name, samples in collected.items():
+            series.setdefault(name, []).extend(samples)
+
+        lines = []
+        for name in sorted(series):
+            kind, help_text = self._help.get(name, (GAUGE, name))
+            full = f"{self.prefix}_{name}"
+            lines.append(f"# HELP {full} {help_text}")
+            lines.append(f"# TYPE {full} {kind}")
+            for labels, value in sorted(series[name], key=lambda sample: sample[0]):
+                if kind == HISTOGRAM:
+                    lines.extend(self._render_histogram(full, labels, value))
+                else:
+                    lines.append(f"{full}{_format_labels(labels)} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+    def _render_histogram(self, full, labels, values):
+        cumulative = 0
+        for index, bound in enumerate(self.buckets):
+            cumulative += values[index]
+            yield f"{full}_bucket{_format_labels(labels + (('le', str(float(bound))),))} {cumulative}"
+        yield f"{full}_bucket{_format_labels(labels + (('le', '+Inf'),))} {values[-1]}"
+        yield f"{full}_sum{_format_labels(labels)} {_format_value(values[-2])}"
+        yield f"{full}_count{_format_labels(labels)} {values[-1]}"
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels) + '}'
+
+
+def _format_value(value):
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    if isinstance(value, float):
+        return repr(round(value, 6))
+    return str(value)
+
+
+# Uygulamaların paylaştığı metrik kaydı
+metrics = MetricsRegistry()
+metrics.describe('http_request_duration_seconds', HISTOGRAM,
+                 'HTTP isteklerinin süresi (route, method ve durum koduna göre)')
+metrics.describe('http_requests_in_flight', GAUGE, 'İşlenmekte olan HTTP istekleri')
+metrics.describe('upstream_request_duration_seconds', HISTOGRAM, 'OpenWeather çağrılarının süresi')
+metrics.describe('upstream_responses_total', COUNTER, 'OpenWeather yanıtları (durum kodu ya da hata türü)')
+metrics.describe('cache_lookups_total', COUNTER, 'Hava durumu önbellek sorguları (hit / miss / stale)')
+metrics.describe('geo_lookups_total', COUNTER, 'Koordinat sorguları (en yakın şehir / ızgara hücresi)')
+metrics.start()
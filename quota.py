@@ -0,0 +1,204 @@
+"""
+OpenWeather çağrıları için dakikalık ve günlük kota (token bucket).
+
+OpenWeather planı dakika ve gün başına çağrı sayısını sınırlar; sınır
+aşıldığında 429 döner. UpstreamQuota her upstream çağrısından önce bir
+token harcar ve bütçe yoksa çağrıyı beklemeden QuotaExceededError ile
+reddeder. Çağıran taraf bu durumda önbellekteki (bayat) veriyi sunar ya da
+hızlıca 503 döner.
+
+Arka plan trafiği (ısıtıcı, SWR yenilemesi) kullanıcı isteklerinin
+gerisinde kalır: arka plan çağrıları her kovanın QUOTA_BACKGROUND_RESERVE
+oranındaki kısmına dokunamaz; bu pay yalnızca kullanıcı isteklerine
+ayrılır.
+
+Kova durumu varsayılan olarak süreç içinde tutulur. WEATHER_CACHE_BACKEND
+sqlite ise (ya da UPSTREAM_QUOTA_BACKEND=sqlite) durum önbellekle aynı
+SQLite dosyasında tutulur ve aynı makinedeki tüm worker'lar tek bir
+bütçeyi paylaşır.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+import requests
+
+from weather_cache import CACHE_BACKEND
+
+# Kota konfigürasyonu (ortam değişkenlerinden, 0 = sınırsız)
+QUOTA_PER_MINUTE = int(os.getenv('UPSTREAM_QUOTA_PER_MINUTE', 60))
+QUOTA_PER_DAY = int(os.getenv('UPSTREAM_QUOTA_PER_DAY', 0))
+QUOTA_BACKGROUND_RESERVE = float(os.getenv('UPSTREAM_QUOTA_BACKGROUND_RESERVE', 0.5))
+QUOTA_BACKEND = os.getenv('UPSTREAM_QUOTA_BACKEND', 'sqlite' if CACHE_BACKEND == 'sqlite' else 'memory').lower()
+
+
+class QuotaExceededError(requests.exceptions.RequestException):
+    """Upstream çağrısı kota bütçesini aşacağı için gönderilmedi"""
+
+    def __init__(self, retry_after, bucket=None):
+        super().__init__(f"Upstream kotası aşıldı ({bucket}), {retry_after:.1f}s sonra tekrar deneyin")
+        self.retry_after = retry_after
+        self.bucket = bucket
+
+
+class MemoryQuotaStore:
+    """Kova durumunu süreç içinde tutan depo"""
+
+    backend = 'memory'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._states = {}
+
+    def transact(self, fn):
+        """fn(durumlar, şimdi) çağrısını kilit altında çalıştır ve sonucunu döndür"""
+        with self._lock:
+            return fn(self._states, time.monotonic())
+
+
+class SQLiteQuotaStore:
+    """Kova durumunu worker'lar arasında paylaşılan SQLite dosyasında tutan depo"""
+
+    backend = 'sqlite'
+
+    def __init__(self, path=None):
+        if path is None:
+            from cache_backends import SQLITE_PATH
+            path = SQLITE_PATH
+        self.path = path
+        self._local = threading.local()
+        self._connect().execute('''
+            CREATE TABLE IF NOT EXISTS quota_buckets (
+                name TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        ''')
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA busy_timeout=5000')
+            self._local.conn = conn
+        return conn
+
+    def transact(self, fn):
+        """fn(durumlar, şimdi) çağrısını süreçler arası yazma kilidiyle çalıştır"""
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            states = {name: (tokens, updated_at) for name, tokens, updated_at
+                      in conn.execute('SELECT name, tokens, updated_at FROM quota_buckets')}
+            result = fn(states, time.time())
+            conn.executemany('INSERT OR REPLACE INTO quota_buckets (name, tokens, updated_at) VALUES (?, ?, ?)',
+                             [(name, tokens, updated_at) for name, (tokens, updated_at) in states.items()])
+            conn.execute('COMMIT')
+            return result
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+
+class UpstreamQuota:
+    """Dakikalık/günlük token bucket'larla upstream çağrı bütçesi"""
+
+    def __init__(self, per_minute=QUOTA_PER_MINUTE, per_day=QUOTA_PER_DAY,
+                 background_reserve=QUOTA_BACKGROUND_RESERVE, store=None):
+        # (kova adı, kapasite, dolum süresi saniye); 0 kapasiteli kovalar devre dışıdır
+        self.buckets = [(name, capacity, period) for name, capacity, period in
+                        (('minute', per_minute, 60), ('day', per_day, 86400)) if capacity > 0]
+        self.background_reserve = background_reserve
+        self.store = store or MemoryQuotaStore()
+
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.rejected = 0
+        self.background_rejected = 0
+        self.throttled = 0
+
+    def _refill(self, states, now):
+        """Kovaları geçen süreye göre doldur ve güncel token sayılarını döndür"""
+        levels = {}
+        for name, capacity, period in self.buckets:
+            tokens, updated_at = states.get(name, (capacity, now))
+            levels[name] = min(capacity, tokens + max(0.0, now - updated_at) * capacity / period)
+            states[name] = (levels[name], now)
+        return levels
+
+    def acquire(self, background=False):
+        """Bir upstream çağrısı için token al; bütçe yoksa QuotaExceededError
+
+        Bekleme yapılmaz: çağrı ya hemen izin alır ya da hemen reddedilir.
+        """
+        if not self.buckets:
+            return
+
+        def take(states, now):
+            levels = self._refill(states, now)
+            for name, capacity, period in self.buckets:
+                needed = 1 + (capacity * self.background_reserve if background else 0)
+                if levels[name] < needed:
+                    return name, (needed - levels[name]) * period / capacity
+            for name, _, _ in self.buckets:
+                states[name] = (levels[name] - 1, now)
+            return None, 0.0
+
+        bucket, retry_after = self.store.transact(take)
+        with self._lock:
+            if bucket is None:
+                self.allowed += 1
+            elif background:
+                self.background_rejected += 1
+            else:
+                self.rejected += 1
+        if bucket is not None:
+            raise QuotaExceededError(retry_after, bucket)
+
+    def penalize(self, retry_after=None):
+        """Upstream 429 döndüğünde dakikalık kovayı boşalt
+
+        OpenWeather sayacımızdan önce sınıra ulaştıysa (başka istemciler,
+        saat kayması) yeni token birikene kadar çağrı gönderilmez.
+        """
+        with self._lock:
+            self.throttled += 1
+
+        def drain(states, now):
+            self._refill(states, now)
+            for name, capacity, period in self.buckets:
+                if name == 'minute':
+                    # Retry-After süresi boyunca dolum olmaması için token borçlandırılır
+                    debt = float(retry_after) * capacity / period if retry_after else 0.0
+                    states[name] = (-debt, now)
+
+        self.store.transact(drain)
+
+    def stats(self):
+        """Kota sayaçlarını ve kovalardaki güncel token sayılarını döndür"""
+        levels = self.store.transact(self._refill) if self.buckets else {}
+        with self._lock:
+            return {
+                'backend': self.store.backend,
+                'buckets': {name: {'capacity': capacity, 'period': period,
+                                   'tokens': round(levels[name], 2)}
+                            for name, capacity, period in self.buckets},
+                'background_reserve': self.background_reserve,
+                'allowed': self.allowed,
+                'rejected': self.rejected,
+                'background_rejected': self.background_rejected,
+                'throttled': self.throttled
+            }
+
+
+def create_quota(backend=QUOTA_BACKEND):
+    """Konfigürasyona göre kota deposunu seçip UpstreamQuota oluştur"""
+    store = SQLiteQuotaStore() if backend == 'sqlite' else MemoryQuotaStore()
+    return UpstreamQuota(store=store)
+
+
+# Tüm upstream istemcilerinin paylaştığı kota
+upstream_quota = create_quota()
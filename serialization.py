@@ -0,0 +1,49 @@
+"""
+Hava durumu yanıtlarının önceden serileştirilmesi (hızlı yol).
+
+Her başarılı yanıtın `weather_response` modeline göre marshal edilip JSON'a
+çevrilmesi, önbellekten sunulan isteklerde en büyük CPU maliyetidir. Yanıt
+upstream'den geldiğinde bir kez doğrulanıp (marshal) serileştirilir ve
+sonuçla birlikte önbelleğe yazılır; tekil şehir endpoint'leri bu gövdeyi
+doğrudan döndürür.
+
+Varsayılan kodlayıcı flask-restx ile aynı çıktıyı üreten standart `json`
+modülüdür. JSON_ENCODER=orjson ile (paket kuruluysa) daha hızlı orjson
+kullanılır; çıktı aynı veriyi taşır ancak boşluksuz ve UTF-8 karakterlidir.
+"""
+
+import json
+import os
+
+# Serileştirme konfigürasyonu (ortam değişkenlerinden)
+JSON_ENCODER = os.getenv('JSON_ENCODER', 'json').lower()
+
+if JSON_ENCODER == 'orjson':
+    try:
+        import orjson
+    except ImportError:
+        raise RuntimeError("JSON_ENCODER=orjson için 'orjson' paketi gerekli: pip install orjson")
+
+# Sonuç sözlüğünde önceden serileştirilmiş gövdeyi tutan özel alan
+BODY_FIELD = '_body'
+
+
+def dumps(data):
+    """Veriyi flask-restx çıktısı gibi (sonunda satır sonuyla) UTF-8 JSON byte dizisine çevir
+
+    Gövde byte olarak tutulur ve her istekte yeniden kodlanmadan gönderilir;
+    paylaşılan (JSON) önbellek backend'leri byte alanlarını yazarken kendisi
+    base64'e çevirir.
+    """
+    if JSON_ENCODER == 'orjson':
+        return orjson.dumps(data) + b'\n'
+    return (json.dumps(data) + '\n').encode('utf-8')
+
+
+def serialized_body(result):
+    """Sonucun önceden serileştirilmiş gövdesi (byte); eski kayıtlarda None"""
+    body = result.get(BODY_FIELD) if isinstance(result, dict) else None
+    if isinstance(body, str):
+        # Gövdeyi metin olarak saklayan eski sürümlerin paylaşılan önbellek kayıtları
+        return body.encode('utf-8')
+    return body or None
@@ -0,0 +1,87 @@
+"""
+Aynı anahtar için eşzamanlı çağrıları tek bir çağrıda birleştiren
+single-flight katmanı.
+
+Önbellek süresi dolduğu anda aynı şehir için gelen onlarca istek tek bir
+OpenWeather çağrısı yapar; diğer istekler bu çağrının sonucunu (ya da
+hatasını) bekleyip paylaşır.
+"""
+
+import threading
+
+
+class _Call:
+    """Devam eden tek bir çağrının durumu"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Anahtar bazında çağrı birleştirme (request coalescing)"""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.executions = 0
+        self.coalesced = 0
+        self.errors = 0
+
+    def do(self, key, fn):
+        """fn() fonksiyonunu anahtar başına aynı anda en fazla bir kez çalıştır
+
+        Çağrı sürerken aynı anahtarla gelenler sonucu bekler ve aynı değeri
+        alır. fn() hata fırlatırsa bekleyen herkese aynı hata fırlatılır.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.coalesced += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.executions += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            with self._lock:
+                self.errors += 1
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.result
+
+    def in_flight(self):
+        """Şu anda devam eden çağrı sayısı"""
+        with self._lock:
+            return len(self._calls)
+
+    def stats(self):
+        """Birleştirme sayaçlarını döndür"""
+        with self._lock:
+            return {
+                'in_flight': len(self._calls),
+                'executions': self.executions,
+                'coalesced': self.coalesced,
+                'errors': self.errors
+            }
+
+
+# Uygulamalar tarafından paylaşılan single-flight katmanı
+weather_singleflight = SingleFlight()
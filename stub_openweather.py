@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Yerel OpenWeather stub sunucusu (benchmark ve çevrimdışı testler için).
+
+/data/2.5/weather (q ya da lat/lon ile), /data/2.5/forecast ve
+/data/2.5/group endpoint'lerini gerçek API ile aynı biçimde yanıtlar; yanıtlar sabit bir gecikmeyle gönderilir, isteğe bağlı
+olarak isteklerin bir kısmı çok daha yavaş yanıtlanır (uzun kuyruk) ya da
+hata koduyla (--error-rate, --error-status) yanıtlanır. Şehir yanıtları
+varsayılan olarak isimden deterministik üretilir; --payloads ile verilen
+JSON dosyasındaki ({"istanbul": {...}, ...}) kayıtlar gerçek yanıt örnekleri
+olarak kullanılabilir. asyncio tabanlıdır, bu yüzden binlerce eşzamanlı
+bağlantıyı tek süreçte kaldırır.
+
+Çalışırken ayarlar /__stub/config?error_rate=1&latency=0.5 ile değiştirilir,
+sayaçlar /__stub/stats adresinden okunur (benchmark'ın hata senaryosu).
+
+Kullanım:
+    python stub_openweather.py --port 8081 --latency 0.2
+    python stub_openweather.py --latency 0.05 --slow-ratio 0.05 --slow-latency 2
+    python stub_openweather.py --error-rate 0.1 --error-status 502 --payloads fixtures.json
+    OPENWEATHER_BASE_URL=http://127.0.0.1:8081/data/2.5 python app_swagger_fixed.py
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import zlib
+from urllib.parse import parse_qs, urlsplit
+
+
+def city_payload(name, city_id=None, coord=None):
+    """Şehir ismi için deterministik, gerçek API biçiminde hava durumu verisi"""
+    seed = zlib.crc32(name.lower().encode('utf-8'))
+    if coord is None:
+        # Türkiye sınırları içinde isimden türetilen konum
+        coord = {'lat': 36 + (seed % 600) / 100, 'lon': 26 + (seed // 600 % 1900) / 100}
+    return {
+        'coord': coord,
+        'id': city_id or 100000 + seed % 900000,
+        'name': name,
+        'dt': 1700000000,
+        'sys': {'country': 'TR'},
+        'main': {'temp': 10 + seed % 20 + 0.4, 'feels_like': 9 + seed % 20 + 0.2, 'humidity': 40 + seed % 50},
+        'wind': {'speed': (seed % 100) / 10},
+        'weather': [{'description': 'parçalı az bulutlu', 'icon': '03d'}]
+    }
+
+
+def forecast_payload(name, points=40, step=3 * 3600):
+    """Şehir için deterministik 5 günlük / 3 saatlik tahmin yanıtı"""
+    current = city_payload(name)
+    seed = zlib.crc32(name.lower().encode('utf-8'))
+    descriptions = (('açık', '01d'), ('parçalı az bulutlu', '03d'), ('hafif yağmur', '10d'))
+    items = []
+    for i in range(points):
+        # Gün içinde sıcaklık dalgalanır; açıklama birkaç noktada bir değişir
+        swing = (i % 8 - 4) if i % 8 < 4 else (4 - i % 8)
+        description, icon = descriptions[(seed + i // 4) % len(descriptions)]
+        items.append({
+            'dt': current['dt'] + i * step,
+            'main': {'temp': current['main']['temp'] + swing, 'feels_like': current['main']['feels_like'] + swing,
+                     'humidity': current['main']['humidity']},
+            'wind': {'speed': current['wind']['speed']},
+            'weather': [{'description': description, 'icon': icon}],
+            'pop': (seed + i) % 11 / 10
+        })
+    return {
+        'cod': '200',
+        'cnt': points,
+        'list': items,
+        'city': {'id': current['id'], 'name': name, 'country': current['sys']['country'], 'coord': current['coord']}
+    }
+
+
+def load_payloads(path):
+    """Şehir ismi -> yanıt eşlemesi içeren JSON dosyasını oku (anahtarlar küçük harfe çevrilir)"""
+    with open(path, encoding='utf-8') as f:
+        return {name.lower(): payload for name, payload in json.load(f).items()}
+
+
+class StubOpenWeather:
+    """Gecikmesi ve hata oranı ayarlanabilir, asyncio tabanlı OpenWeather stub'ı"""
+
+    # /__stub/config ile değiştirilebilen ayarlar ve türleri
+    SETTINGS = {'latency': float, 'slow_ratio': float, 'slow_latency': float,
+                'error_rate': float, 'error_status': int}
+
+    def __init__(self, host='127.0.0.1', port=8081, latency=0.2, slow_ratio=0.0, slow_latency=2.0,
+                 error_rate=0.0, error_status=500, payloads=None, seed=0):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.slow_ratio = slow_ratio
+        self.slow_latency = slow_latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.payloads = payloads or {}
+        self._random = random.Random(seed)
+        self.requests = 0
+        self.errors = 0
+        self._ids = {}
+        self._server = None
+
+    def payload_for(self, name, city_id=None):
+        """Şehir için fixture yanıtını, yoksa üretilmiş yanıtı döndür"""
+        data = self.payloads.get(name.lower())
+        return data if data is not None else city_payload(name, city_id)
+
+    def location_payload(self, lat, lon):
+        """Koordinat sorgusu için (durum kodu, gövde); konum adı koordinattan türetilir"""
+        try:
+            lat, lon = round(float(lat), 2), round(float(lon), 2)
+        except ValueError:
+            return 400, {'cod': '400', 'message': 'wrong latitude'}
+        data = city_payload(f"Konum {lat:.1f} {lon:.1f}", coord={'lat': lat, 'lon': lon})
+        self._ids[data['id']] = data['name']
+        return 200, data
+
+    def config(self, params):
+        """Çalışan stub'ın ayarlarını güncelle ve güncel ayarları döndür"""
+        for name, convert in self.SETTINGS.items():
+            if name in params:
+                setattr(self, name, convert(params[name]))
+        return {name: getattr(self, name) for name in self.SETTINGS}
+
+    def respond(self, path, query):
+        """İstek yoluna göre (durum kodu, gövde) döndür"""
+        params = {k: v[0] for k, v in parse_qs(query).items()}
+        if path == '/__stub/config':
+            return 200, self.config(params)
+        if path == '/__stub/stats':
+            return 200, {'requests': self.requests, 'errors': self.errors}
+
+        if self.error_rate and self._random.random() < self.error_rate:
+            self.errors += 1
+            return self.error_status, {'cod': str(self.error_status), 'message': 'Internal error'}
+        if path.endswith('/weather'):
+            if 'lat' in params and 'lon' in params:
+                return self.location_payload(params['lat'], params['lon'])
+            name = params.get('q', '').split(',')[0].strip()
+            if not name:
+                return 400, {'cod': '400', 'message': 'Nothing to geocode'}
+            data = self.payload_for(name)
+            self._ids[data.get('id')] = name
+            return 200, data
+        if path.endswith('/forecast'):
+            name = params.get('q', '').split(',')[0].strip()
+            if not name:
+                return 400, {'cod': '400', 'message': 'Nothing to geocode'}
+            return 200, forecast_payload(name)
+        if path.endswith('/group'):
+            ids = [int(i) for i in params.get('id', '').split(',') if i.strip().isdigit()]
+            items = [self.payload_for(self._ids[i], i) for i in ids if i in self._ids]
+            return 200, {'cnt': len(items), 'list': items}
+        return 404, {'cod': '404', 'message': 'Internal error'}
+
+    async def handle(self, reader, writer):
+        """Keep-alive destekli basit HTTP/1.1 bağlantı işleyicisi"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                _, target, _ = request_line.decode('latin-1').split(' ', 2)
+                url = urlsplit(target)
+                if not url.path.startswith('/__stub/'):
+                    self.requests += 1
+                    delay = self.latency
+                    if self.slow_ratio and self._random.random() < self.slow_ratio:
+                        delay = self.slow_latency
+                    if delay:
+                        await asyncio.sleep(delay)
+
+                status, body = self.respond(url.path, url.query)
+                payload = json.dumps(body).encode('utf-8')
+                writer.write(
+                    f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+                    f"Content-Type: application/json; charset=utf-8\r\n"
+                    f"Content-Length: {len(payload)}\r\n\r\n".encode('latin-1') + payload)
+                await writer.drain()
+                if headers.get('connection', '').lower() == 'close':
+                    break
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self):
+        self._server = await asyncio.start_server(self.handle, self.host, self.port, backlog=4096)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def serve_forever(self):
+        await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    @property
+    def base_url(self):
+        return f"http://{self.host}:{self.port}/data/2.5"
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Yerel OpenWeather stub sunucusu')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--latency', type=float, default=0.2, help='Yanıt gecikmesi (saniye)')
+    parser.add_argument('--slow-ratio', type=float, default=0.0, help='Yavaş yanıtlanacak isteklerin oranı')
+    parser.add_argument('--slow-latency', type=float, default=2.0, help='Yavaş yanıt gecikmesi (saniye)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Hata koduyla yanıtlanacak isteklerin oranı')
+    parser.add_argument('--error-status', type=int, default=500, help='Hata yanıtlarının durum kodu')
+    parser.add_argument('--payloads', help='Şehir ismi -> OpenWeather yanıtı eşlemesi içeren JSON dosyası')
+    parser.add_argument('--seed', type=int, default=0, help='Yavaş/hatalı istek seçimi için rastgelelik tohumu')
+    args = parser.parse_args()
+
+    stub = StubOpenWeather(args.host, args.port, args.latency, args.slow_ratio, args.slow_latency,
+                           args.error_rate, args.error_status,
+                           load_payloads(args.payloads) if args.payloads else None, args.seed)
+    print(f"🧪 OpenWeather stub'ı: {stub.base_url} (gecikme {args.latency}s, "
+          f"%{args.slow_ratio * 100:g} istek {args.slow_latency}s, %{args.error_rate * 100:g} hata "
+          f"{args.error_status})")
+    asyncio.run(stub.serve_forever())
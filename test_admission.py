@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Kabul kontrolü (admission control) birim testleri
+"""
+
+import asyncio
+import os
+import threading
+
+import pytest
+
+os.environ.setdefault('OPENWEATHER_API_KEY', 'test-key')
+
+from admission import AdmissionController, AdmissionRejected
+from app_async import AsyncAdmissionController
+
+
+def test_admits_up_to_max_in_flight_then_rejects_background():
+    admission = AdmissionController(max_in_flight=2, max_queue=0, queue_timeout=0)
+    admission.acquire()
+    admission.acquire()
+
+    with pytest.raises(AdmissionRejected) as error:
+        admission.acquire(background=True)
+    assert error.value.reason == 'background'
+    with pytest.raises(AdmissionRejected) as error:
+        admission.acquire()
+    assert error.value.reason == 'queue_full'
+    assert error.value.retry_after >= 1
+
+
+def test_queued_request_times_out():
+    admission = AdmissionController(max_in_flight=1, max_queue=5, queue_timeout=0.05)
+    admission.acquire()
+
+    with pytest.raises(AdmissionRejected) as error:
+        admission.acquire()
+    assert error.value.reason == 'queue_timeout'
+    assert admission.stats()['queued'] == 0
+
+
+def test_release_wakes_queued_request():
+    admission = AdmissionController(max_in_flight=1, max_queue=5, queue_timeout=5)
+    admission.acquire()
+    admitted = threading.Event()
+
+    def waiter():
+        admission.acquire()
+        admitted.set()
+
+    thread = threading.Thread(target=waiter)
+    thread.start()
+    assert not admitted.wait(0.05)
+    admission.release(0.01)
+    assert admitted.wait(2)
+    thread.join()
+    assert (admission.in_flight, admission.waited, admission.admitted) == (1, 1, 2)
+
+
+def test_slot_releases_on_error():
+    admission = AdmissionController(max_in_flight=1)
+    with pytest.raises(ValueError):
+        with admission.slot():
+            raise ValueError('upstream')
+    assert admission.in_flight == 0
+
+
+def test_retry_after_scales_with_queue():
+    admission = AdmissionController(max_in_flight=2)
+    admission._avg_hold = 1.5
+    admission.queued = 5
+    assert admission.retry_after() == 5
+
+
+def test_async_release_hands_slot_to_waiter():
+    async def scenario():
+        admission = AsyncAdmissionController(max_in_flight=1, max_queue=5, queue_timeout=5)
+        await admission.acquire()
+        waiter = asyncio.ensure_future(admission.acquire())
+        await asyncio.sleep(0)
+        assert admission.queued == 1
+
+        admission.release(0.01)
+        await waiter
+        # Slot boşaltılmadan devredildi
+        assert (admission.in_flight, admission.queued) == (1, 0)
+
+    asyncio.run(scenario())
+
+
+def test_async_cancelled_waiter_leaves_queue():
+    async def scenario():
+        admission = AsyncAdmissionController(max_in_flight=1, max_queue=5, queue_timeout=5)
+        await admission.acquire()
+        waiter = asyncio.ensure_future(admission.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+        admission.release(0.01)
+        assert (admission.in_flight, admission.queued) == (0, 0)
+
+    asyncio.run(scenario())
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Basit Flask uygulaması (app.py) hata yanıtı testleri
+"""
+
+import os
+
+import pytest
+
+os.environ.setdefault('OPENWEATHER_API_KEY', 'test-key')
+
+import app as app_module
+from weather_service import WeatherError, INVALID_KEY_MESSAGE, CIRCUIT_MESSAGE
+
+
+@pytest.fixture
+def client():
+    return app_module.app.test_client()
+
+
+def failing_service(monkeypatch, error):
+    def get(city):
+        raise error
+    monkeypatch.setattr(app_module.weather_service, 'get', get)
+
+
+def test_invalid_api_key_keeps_401(client, monkeypatch):
+    failing_service(monkeypatch, WeatherError(500, INVALID_KEY_MESSAGE))
+
+    response = client.get('/weather?city=Ankara')
+
+    assert response.status_code == 401
+    assert response.get_json() == {'error': INVALID_KEY_MESSAGE}
+
+
+def test_unavailable_upstream_sends_retry_after(client, monkeypatch):
+    failing_service(monkeypatch, WeatherError(503, CIRCUIT_MESSAGE, retry_after=12.3))
+
+    response = client.get('/weather/Ankara')
+
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '13'
+    assert response.get_json() == {'error': CIRCUIT_MESSAGE}
+
+
+def test_other_errors_keep_status_without_retry_after(client, monkeypatch):
+    failing_service(monkeypatch, WeatherError(504, 'zaman aşımı'))
+
+    response = client.get('/weather?city=Ankara')
+
+    assert response.status_code == 504
+    assert 'Retry-After' not in response.headers
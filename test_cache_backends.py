@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Paylaşılan önbellek backend'leri birim testleri
+"""
+
+from cache_backends import SQLiteCache, RedisCache
+
+
+class FakeRedis:
+    """set/get/delete destekleyen sözlük tabanlı redis stand-in'i"""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, px=None):
+        self.data[key] = value
+
+    def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+
+RESULT = {
+    'city': 'Istanbul',
+    '_body': b'{"city": "Istanbul"}\n',
+    '_encoded': {'gzip': b'\x1f\x8b\x08\x00\xff'}
+}
+
+
+def test_sqlite_round_trips_byte_fields(tmp_path):
+    cache = SQLiteCache(path=str(tmp_path / 'cache.sqlite3'), ttl=60)
+    cache.set('istanbul', RESULT)
+
+    assert cache.get('istanbul') == RESULT
+
+
+def test_redis_round_trips_byte_fields():
+    client = FakeRedis()
+    cache = RedisCache(ttl=60, client=client)
+    cache.set('istanbul', RESULT)
+
+    # Sunucuda JSON metni olarak durur, okurken byte'a döner
+    assert isinstance(client.data['weather:istanbul'], str)
+    assert cache.get('istanbul') == RESULT
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Önbellek ısıtıcısı birim testleri
+"""
+
+import asyncio
+import os
+import subprocess
+import sys
+
+os.environ.setdefault('OPENWEATHER_API_KEY', 'test-key')
+
+from app_async import AsyncCacheWarmer
+from cache_warmer import CacheWarmer
+
+
+class EmptyCache:
+    """Hiç kaydı olmayan önbellek; her şehir yenilenmeye adaydır"""
+    ttl = 600
+
+    def get_entry(self, key):
+        return None
+
+
+def make_key(city):
+    return city.lower()
+
+
+def test_sync_warmer_refreshes_static_cities_within_budget():
+    fetched = []
+    warmer = CacheWarmer(EmptyCache(), lambda city, key: fetched.append(key), make_key,
+                         static_cities=['Istanbul', 'Ankara', 'Izmir'], budget=2)
+
+    assert warmer.run_once() == 2
+    assert fetched == ['istanbul', 'ankara']
+    assert (warmer.refreshes, warmer.budget_skips) == (2, 1)
+
+
+def test_async_warmer_awaits_service_refreshes():
+    fetched = []
+
+    async def fetch(city, key):
+        await asyncio.sleep(0)
+        fetched.append(key)
+        if city == 'Ankara':
+            raise RuntimeError('upstream hatası')
+
+    warmer = AsyncCacheWarmer(EmptyCache(), fetch, make_key, static_cities=['Istanbul', 'Ankara'])
+    warmer.record('paris', 'Paris')
+
+    assert asyncio.run(warmer.run_once()) == 2
+    assert fetched == ['istanbul', 'ankara', 'paris']
+    assert (warmer.refreshes, warmer.failures) == (2, 1)
+
+
+def test_async_warmer_runs_on_event_loop_until_stopped():
+    fetched = []
+
+    async def fetch(city, key):
+        fetched.append(key)
+
+    warmer = AsyncCacheWarmer(EmptyCache(), fetch, make_key, static_cities=['Istanbul'], interval=3600)
+
+    async def scenario():
+        warmer.start()
+        await asyncio.sleep(0.01)
+        assert warmer.stats()['running']
+        await warmer.stop()
+        assert not warmer.stats()['running']
+
+    asyncio.run(scenario())
+    assert fetched == ['istanbul']
+
+
+def test_importing_apps_does_not_start_warmer_thread():
+    # Isıtıcıyı içe aktarma değil, uygulamanın giriş noktası başlatır
+    code = ("import threading, app_async\n"
+            "assert not [t for t in threading.enumerate() if t.name == 'weather-warmer']\n"
+            "assert not app_async.cache_warmer.running()\n")
+    env = dict(os.environ, WARMER_ENABLED='True')
+    result = subprocess.run([sys.executable, '-c', code], env=env, capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+    assert result.returncode == 0, result.stderr
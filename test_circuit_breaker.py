@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Devre kesici durum geçişleri birim testleri
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+import circuit_breaker
+from circuit_breaker import CircuitBreaker, CircuitOpenError, CLOSED, OPEN, HALF_OPEN
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """circuit_breaker modülünün gördüğü zamanı test ilerletir"""
+    now = [1000.0]
+    monkeypatch.setattr(circuit_breaker, 'time', SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+def test_consecutive_failures_open_the_circuit(clock):
+    breaker = CircuitBreaker(failure_threshold=3, window=100, reset_timeout=30)
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == CLOSED
+
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    clock[0] += 10
+    with pytest.raises(CircuitOpenError) as error:
+        breaker.before_call()
+    assert error.value.retry_after == pytest.approx(20)
+    assert (breaker.opened, breaker.rejected) == (1, 1)
+
+
+def test_failure_ratio_over_window_opens_the_circuit(clock):
+    breaker = CircuitBreaker(failure_threshold=100, failure_ratio=0.5, window=4)
+    for success in (True, False, True, False):
+        breaker.record_success() if success else breaker.record_failure()
+
+    assert breaker.state == OPEN
+
+
+def test_success_resets_consecutive_failures(clock):
+    breaker = CircuitBreaker(failure_threshold=2, window=100)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+
+    assert breaker.state == CLOSED
+
+
+def test_half_open_allows_limited_trials(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30, half_open_max_calls=2)
+    breaker.record_failure()
+    clock[0] += 30
+
+    assert breaker.state == HALF_OPEN
+    breaker.before_call()
+    breaker.before_call()
+    with pytest.raises(CircuitOpenError) as error:
+        breaker.before_call()
+    assert error.value.retry_after == 1.0
+
+
+def test_half_open_success_closes_and_failure_reopens(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock[0] += 30
+    breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+
+    breaker.record_failure()
+    clock[0] += 30
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.stats()['retry_after'] == 30
+
+
+def test_release_returns_half_open_trial(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30, half_open_max_calls=1)
+    breaker.record_failure()
+    clock[0] += 30
+    breaker.before_call()
+    breaker.release()
+
+    breaker.before_call()
+    assert breaker.state == HALF_OPEN
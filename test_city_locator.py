@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Uzamsal şehir dizini birim testleri
+"""
+
+import json
+
+import pytest
+
+from city_locator import CityLocator, haversine_km
+from tests_support import weather_data
+
+
+def test_haversine_km():
+    # İstanbul - Ankara kuş uçuşu yaklaşık 350 km
+    assert haversine_km(41.01, 28.98, 39.93, 32.86) == pytest.approx(350, abs=5)
+    assert haversine_km(41.0, 29.0, 41.0, 29.0) == 0
+
+
+def test_nearest_returns_closest_city_within_distance():
+    locator = CityLocator(cell_degrees=0.1, max_distance_km=10)
+    locator.learn_response(weather_data('Kadıköy', city_id=1, lat=40.99, lon=29.03))
+    locator.learn_response(weather_data('Üsküdar', city_id=2, lat=41.03, lon=29.02))
+
+    assert locator.nearest(40.995, 29.04) == 'Kadıköy,TR'
+    assert locator.nearest(41.04, 29.01) == 'Üsküdar,TR'
+    # 10 km'den uzak koordinat bilinen şehre eşlenmez
+    assert locator.nearest(41.3, 29.0) is None
+
+
+def test_nearest_searches_neighbouring_cells():
+    locator = CityLocator(cell_degrees=0.1, max_distance_km=10)
+    locator.learn_response(weather_data('Sınırköy', city_id=3, lat=40.001, lon=30.0))
+
+    assert locator.cell(40.001, 30.0) != locator.cell(39.999, 30.0)
+    assert locator.nearest(39.999, 30.0) == 'Sınırköy,TR'
+
+
+def test_nearest_wraps_around_antimeridian():
+    locator = CityLocator(cell_degrees=0.1, max_distance_km=10)
+    locator.learn_response(weather_data('Suva', city_id=4, lat=-18.1, lon=179.99, country='FJ'))
+
+    assert locator.nearest(-18.1, -179.99) == 'Suva,FJ'
+
+
+def test_learned_cell_redirects_to_returned_city():
+    locator = CityLocator(cell_degrees=0.1, max_distance_km=1)
+    cell = locator.cell(38.55, 27.05)
+    # Upstream hücre merkezi için 20 km ötedeki şehri döndürdü
+    assert locator.learn_response(weather_data('Uzakköy', city_id=5, lat=38.7, lon=27.2), cell) == 'Uzakköy,TR'
+
+    assert locator.nearest(38.51, 27.01) == 'Uzakköy,TR'
+    assert locator.nearest(38.65, 27.05) is None
+    assert locator.stats()['cell_hits'] == 1
+
+
+def test_learn_response_skips_unnamed_locations():
+    locator = CityLocator()
+    assert locator.learn_response({'id': 0, 'name': '', 'sys': {}, 'coord': {'lat': 0, 'lon': 0}}) is None
+    assert locator.stats()['cities'] == 0
+
+
+def test_same_city_is_indexed_once():
+    locator = CityLocator()
+    for _ in range(3):
+        locator.learn_response(weather_data('Tekköy', city_id=6, lat=37.0, lon=35.3))
+    assert locator.stats()['cities'] == 1
+
+
+def test_load_city_list(tmp_path):
+    path = tmp_path / 'city.list.json'
+    path.write_text(json.dumps([
+        {'id': 745044, 'name': 'Istanbul', 'country': 'TR', 'coord': {'lat': 41.01384, 'lon': 28.94966}},
+        {'id': 323786, 'name': 'Ankara', 'country': 'TR', 'coord': {'lat': 39.91987, 'lon': 32.85427}}
+    ]), encoding='utf-8')
+    locator = CityLocator()
+
+    assert locator.load_city_list(str(path)) == 2
+    assert locator.nearest(41.05, 28.99) == 'Istanbul,TR'
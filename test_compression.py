@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Yanıt sıkıştırma birim testleri
+"""
+
+import gzip
+
+from compression import (VARIANTS_FIELD, COMPRESSION_MIN_SIZE, negotiate, precompress, precompressed,
+                         encode_body, encode_not_modified, variant_etag)
+from weather_service import build_weather_response
+from tests_support import weather_data
+
+
+def test_negotiate_picks_supported_encoding():
+    assert negotiate('gzip, deflate') == 'gzip'
+    assert negotiate('identity') is None
+    assert negotiate('gzip;q=0') is None
+    assert negotiate(None) is None
+
+
+def test_single_city_body_below_threshold_is_precompressed_once():
+    result = build_weather_response(weather_data())
+    body = result['_body']
+    assert len(body) < COMPRESSION_MIN_SIZE
+
+    variant = precompressed(result, 'gzip')
+    assert isinstance(variant, bytes)
+    assert gzip.decompress(variant) == body
+
+    headers = {'ETag': result['_etag']}
+    assert encode_body(body, 'gzip', headers, result) is variant
+    assert headers == {'ETag': variant_etag(result['_etag'], 'gzip'), 'Content-Encoding': 'gzip',
+                       'Vary': 'Accept-Encoding'}
+
+
+def test_variants_that_do_not_shrink_the_body_are_not_stored():
+    result = precompress({'_body': b'{}\n'})
+    assert VARIANTS_FIELD not in result
+
+    headers = {}
+    assert encode_body(b'{}\n', 'gzip', headers, result) == b'{}\n'
+    assert 'Content-Encoding' not in headers
+
+
+def test_threshold_applies_to_per_request_bodies():
+    small, large = b'{"a": 1}\n', b'{"cities": [%s]}' % b', '.join([b'"Istanbul"'] * 100)
+
+    headers = {}
+    assert encode_body(small, 'gzip', headers) == small
+    assert headers == {'Vary': 'Accept-Encoding'}
+
+    headers = {}
+    assert gzip.decompress(encode_body(large, 'gzip', headers)) == large
+    assert headers['Content-Encoding'] == 'gzip'
+
+
+def test_legacy_base64_variants_are_still_served():
+    legacy = {VARIANTS_FIELD: {'gzip': 'H4sIAAAAAAAA/w=='}}
+    assert precompressed(legacy, 'gzip') == b'\x1f\x8b\x08\x00\x00\x00\x00\x00\x00\xff'
+
+
+def test_not_modified_etag_matches_compressed_variant():
+    result = build_weather_response(weather_data())
+    headers = {'ETag': result['_etag']}
+
+    encode_not_modified('gzip', headers, result)
+
+    assert headers['ETag'] == variant_etag(result['_etag'], 'gzip')
+    assert headers['Vary'] == 'Accept-Encoding'
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Koşullu istekler (ETag / Last-Modified / 304) birim testleri
+"""
+
+import os
+
+import pytest
+
+os.environ.setdefault('OPENWEATHER_API_KEY', 'test-key')
+os.environ.setdefault('WARMER_ENABLED', 'False')
+
+from conditional import ETAG_FIELD, OBSERVED_AT_FIELD, stamp, public, validator_headers, not_modified
+from compression import variant_etag
+from weather_service import build_weather_response
+from tests_support import weather_data
+
+OBSERVED_AT = 1700000000
+LAST_MODIFIED = 'Tue, 14 Nov 2023 22:13:20 GMT'
+
+
+def test_stamp_derives_strong_etag_from_observation_and_body():
+    first = stamp({'city': 'Istanbul'}, OBSERVED_AT, b'{"city": "Istanbul"}\n')
+    same = stamp({'city': 'Istanbul'}, OBSERVED_AT, b'{"city": "Istanbul"}\n')
+    other = stamp({'city': 'Istanbul'}, OBSERVED_AT, b'{"city": "Ankara"}\n')
+
+    assert first[ETAG_FIELD] == same[ETAG_FIELD] != other[ETAG_FIELD]
+    assert first[ETAG_FIELD].startswith('"6553f100-')
+    assert public(first) == {'city': 'Istanbul'}
+
+
+def test_validator_headers():
+    result = build_weather_response(weather_data())
+
+    assert validator_headers(result, 'HIT', 100) == {
+        'ETag': result[ETAG_FIELD],
+        'Last-Modified': LAST_MODIFIED,
+        'Cache-Control': 'public, max-age=200'
+    }
+    assert validator_headers(result, 'STALE', 900)['Cache-Control'] == 'public, max-age=0, must-revalidate'
+    assert validator_headers({'city': 'Eskiköy'}, 'HIT', 0) == {}
+
+
+@pytest.mark.parametrize('if_none_match, expected', [
+    ('"6553f100-00000000"', False),
+    ('*', True),
+])
+def test_if_none_match(if_none_match, expected):
+    result = build_weather_response(weather_data())
+    assert not_modified(result, if_none_match) is expected
+
+
+def test_if_none_match_accepts_weak_and_compressed_variants():
+    result = build_weather_response(weather_data())
+    etag = result[ETAG_FIELD]
+
+    assert not_modified(result, etag)
+    assert not_modified(result, f'"x", W/{etag}')
+    assert not_modified(result, variant_etag(etag, 'gzip'))
+
+
+def test_if_modified_since():
+    result = build_weather_response(weather_data())
+
+    assert not_modified(result, if_modified_since=LAST_MODIFIED)
+    assert not not_modified(result, if_modified_since='Tue, 14 Nov 2023 22:13:19 GMT')
+    # If-None-Match verildiğinde If-Modified-Since dikkate alınmaz
+    assert not not_modified(result, '"baska"', LAST_MODIFIED)
+    assert not not_modified({OBSERVED_AT_FIELD: None}, if_modified_since=LAST_MODIFIED)
+
+
+def test_weather_route_returns_304_for_matching_etag():
+    import app_swagger_fixed
+    from weather_cache import make_key
+
+    result = build_weather_response(weather_data('Koşulluköy'))
+    app_swagger_fixed.weather_service.cache.set(make_key('Koşulluköy'), result)
+    client = app_swagger_fixed.app.test_client()
+
+    response = client.get('/api/v1/weather/Koşulluköy', headers={'If-None-Match': result[ETAG_FIELD]})
+    assert response.status_code == 304
+    assert response.data == b''
+    assert response.headers['ETag'] == result[ETAG_FIELD]
+
+    response = client.get('/api/v1/weather/Koşulluköy')
+    assert response.status_code == 200
+    assert response.data == result['_body']
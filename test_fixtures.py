@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Upstream kayıt/tekrar oynatma fikstürleri birim testleri
+"""
+
+import pytest
+import requests
+
+from fixtures import FixtureRecorder, FixtureStore, fixture_key
+from upstream import OpenWeatherClient
+
+
+class Response:
+    def __init__(self, status_code, text):
+        self.status_code = status_code
+        self.text = text
+        self.headers = {'Content-Type': 'application/json', 'X-Cache-Key': 'kaydedilmez'}
+
+
+class Session:
+    """Sıradaki yanıtı (ya da istisnayı) döndüren sahte oturum"""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+
+    def get(self, url, params=None, timeout=None):
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    def close(self):
+        pass
+
+
+def test_fixture_key_drops_api_key_and_sorts_params():
+    assert fixture_key('/weather', {'units': 'metric', 'appid': 'gizli', 'q': 'Istanbul'}) == \
+        'weather?q=Istanbul&units=metric'
+
+
+def test_recorded_responses_replay_in_order(tmp_path):
+    path = str(tmp_path / 'fixtures.jsonl.gz')
+    recorder = FixtureRecorder(path)
+    client = OpenWeatherClient(quota=None, breaker=None, fixtures=recorder, max_retries=0)
+    client.session = Session(Response(200, '{"name": "Istanbul"}'), Response(404, '{"cod": "404"}'),
+                             requests.exceptions.ReadTimeout())
+    params = {'q': 'Istanbul', 'appid': 'gizli'}
+    client.get('weather', params=params)
+    client.get('weather', params=params)
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        client.get('weather', params=params)
+    recorder.close()
+    client.close()
+
+    store = FixtureStore(path, speed=0)
+    replay = OpenWeatherClient(quota=None, breaker=None, fixtures=store)
+    first = replay.get('weather', params=params)
+    assert (first.status_code, first.json()) == (200, {'name': 'Istanbul'})
+    assert first.headers == {'Content-Type': 'application/json'}
+    assert replay.get('weather', params=params).status_code == 404
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        replay.get('weather', params=params)
+    # Kayıtlar bitince başa dönülür; kayıtsız istek bağlantı hatası olur
+    assert replay.get('weather', params=params).status_code == 200
+    with pytest.raises(requests.exceptions.ConnectionError):
+        replay.get('weather', params={'q': 'Ankara'})
+    assert (store.hits, store.misses) == (4, 1)
+    replay.close()
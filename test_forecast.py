@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Sütunlu tahmin serisi birim testleri
+"""
+
+import json
+
+import pytest
+
+from forecast import ForecastSeries, FORECAST_FIELDS, parse_fields, city_summary
+from tests_support import forecast_data, FORECAST_START as START, FORECAST_STEP as STEP
+
+
+def test_from_response_stores_typed_columns():
+    series = ForecastSeries.from_response(forecast_data())
+
+    assert (series.city, series.country, len(series)) == ('Istanbul', 'TR', 40)
+    assert series.times.typecode == 'q'
+    assert list(series.times[:2]) == [START, START + STEP]
+    assert series.columns['temperature'].typecode == 'f'
+    assert series.columns['humidity'].typecode == 'B'
+    # Tekrarlayan metinler tabloda bir kez tutulur
+    assert series.labels['description'] == ('Açık', 'Hafif Yağmur')
+    assert series.nbytes < len(json.dumps(forecast_data())) / 4
+
+
+def test_rows_convert_units_and_round_floats():
+    series = ForecastSeries.from_response(forecast_data())
+
+    assert series.rows(1, 2) == [{
+        'time': START + STEP,
+        'temperature': 11.2,
+        'feels_like': 10.0,
+        'humidity': 51,
+        'wind_speed_kmh': 9.0,
+        'precipitation_chance': 37,
+        'description': 'Hafif Yağmur',
+        'icon': '10d'
+    }]
+
+
+def test_window_uses_half_open_interval():
+    series = ForecastSeries.from_response(forecast_data())
+
+    assert series.window() == (0, 40)
+    assert series.window(START + STEP, START + 3 * STEP) == (1, 3)
+    assert series.window(START + 1, None) == (1, 40)
+    assert series.window(START + 10 * STEP, START) == (10, 10)
+
+
+def test_rows_select_only_requested_fields():
+    series = ForecastSeries.from_response(forecast_data())
+
+    assert series.rows(0, 2, ('time', 'description')) == [
+        {'time': START, 'description': 'Açık'},
+        {'time': START + STEP, 'description': 'Hafif Yağmur'}
+    ]
+
+
+def test_dict_round_trip_for_shared_backends():
+    series = ForecastSeries.from_response(forecast_data())
+    restored = ForecastSeries.from_dict(json.loads(json.dumps(series.to_dict())))
+
+    assert restored.rows(0, 40) == series.rows(0, 40)
+
+
+def test_parse_fields():
+    assert parse_fields(None) == FORECAST_FIELDS
+    assert parse_fields('temperature, icon,temperature') == ('time', 'temperature', 'icon')
+    with pytest.raises(ValueError):
+        parse_fields('temperature,pressure')
+
+
+def test_city_summary_matches_weather_response_shape():
+    assert city_summary(forecast_data()) == {'id': 745044, 'name': 'Istanbul', 'sys': {'country': 'TR'},
+                                             'coord': {'lat': 41.01, 'lon': 28.95}}
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Gecikme dağılımı, uyarlanabilir zaman aşımı ve hedge bütçesi birim testleri
+"""
+
+import threading
+import time
+
+import pytest
+
+from hedging import LatencyTracker, HedgePolicy
+from upstream import OpenWeatherClient
+
+
+def policy_with_samples(samples=range(1, 101), **kwargs):
+    """Gecikmeleri milisaniye cinsinden verilen örneklerle doldurulmuş politika"""
+    policy = HedgePolicy(10, min_samples=20, **kwargs)
+    for ms in samples:
+        policy.latency.record(ms / 1000)
+    return policy
+
+
+def test_percentile_and_histogram():
+    tracker = LatencyTracker(window=100)
+    assert tracker.percentile(95) is None
+    for ms in range(1, 101):
+        tracker.record(ms / 1000)
+
+    assert tracker.percentile(50) == 0.05
+    assert tracker.percentile(95) == 0.095
+    assert tracker.histogram()['<=0.025'] == 25
+    assert tracker.stats()['count'] == 100
+
+
+def test_read_timeout_follows_p99_within_bounds():
+    assert HedgePolicy(10, min_samples=20).read_timeout() == 10
+    assert policy_with_samples(multiplier=3, min_read_timeout=0.1).read_timeout() == pytest.approx(0.297)
+    assert policy_with_samples(multiplier=3, min_read_timeout=1).read_timeout() == 1
+    assert policy_with_samples(adaptive=False).read_timeout() == 10
+
+
+def test_hedge_delay_waits_for_samples_and_budget():
+    assert HedgePolicy(10, min_samples=20, hedge_budget=1).hedge_delay() is None
+
+    policy = policy_with_samples(hedge_budget=0.5, hedge_percentile=95)
+    assert policy.hedge_delay() is None
+    assert policy.hedge_delay() == 0.095
+    assert policy.budget_skips == 1
+    assert policy_with_samples(hedge=False, hedge_budget=1).hedge_delay() is None
+
+
+def test_hedge_tokens_are_capped_and_refundable():
+    policy = policy_with_samples(hedge_budget=1, max_burst=2)
+    for _ in range(5):
+        policy.hedge_delay()
+
+    assert policy.take_hedge() and policy.take_hedge()
+    assert not policy.take_hedge()
+    policy.refund_hedge()
+    assert policy.take_hedge()
+    assert (policy.hedges, policy.budget_skips) == (2, 1)
+
+
+class Response:
+    def __init__(self, text):
+        self.status_code = 200
+        self.headers = {}
+        self.text = text
+
+
+def test_faster_hedge_wins():
+    client = OpenWeatherClient(quota=None, breaker=None, fixtures=None)
+    client.policy._tokens = 1
+    calls = []
+    release = threading.Event()
+
+    def send(endpoint, params, timeout, background):
+        calls.append(background)
+        if len(calls) == 1:
+            release.wait(5)
+            return Response('yavaş')
+        return Response('hızlı')
+
+    client._get_with_retries = send
+    started = time.monotonic()
+    assert client._send_hedged('weather', {}, (1, 1), 0.01).text == 'hızlı'
+    assert time.monotonic() - started < 1
+    # Hedge arka plan çağrısı olarak gönderilir
+    assert calls == [False, True]
+    assert client.policy.hedge_wins == 1
+    release.set()
+    client.close()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Metrik kaydı birim testleri
+"""
+
+import threading
+
+from metrics import MetricsRegistry, COUNTER
+
+
+def test_render_while_threads_add_new_series():
+    registry = MetricsRegistry(prefix='test', multiproc_dir='')
+    registry.describe('lookups_total', COUNTER, 'Sorgular')
+
+    def write(worker):
+        # Her yazma yeni bir etiket anahtarı ekler (parça sözlüğü büyür)
+        for city in range(20000):
+            registry.inc('lookups_total', worker=worker, city=city)
+            registry.observe('lookup_seconds', 0.01, worker=worker, city=city)
+
+    writers = [threading.Thread(target=write, args=(n,)) for n in range(4)]
+    for thread in writers:
+        thread.start()
+    renders = 0
+    while any(thread.is_alive() for thread in writers) or renders == 0:
+        assert registry.render().startswith('# HELP')
+        renders += 1
+    for thread in writers:
+        thread.join()
+
+    total = registry.snapshot()
+    assert sum(value for (name, _), value in total.counters.items() if name == 'lookups_total') == 80000
+
+
+def test_snapshot_sums_thread_shards():
+    registry = MetricsRegistry(prefix='test', multiproc_dir='')
+
+    def write():
+        for _ in range(100):
+            registry.inc('requests_total', route='/')
+
+    threads = [threading.Thread(target=write) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    registry.inc('requests_total', route='/')
+
+    assert registry.snapshot().counters[('requests_total', (('route', '/'),))] == 301
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Upstream kotası (token bucket) birim testleri
+"""
+
+import pytest
+
+from quota import UpstreamQuota, MemoryQuotaStore, SQLiteQuotaStore, QuotaExceededError
+
+
+class ClockStore(MemoryQuotaStore):
+    """Zamanı testin ilerlettiği süreç içi kota deposu"""
+
+    def __init__(self):
+        super().__init__()
+        self.now = 1000.0
+
+    def transact(self, fn):
+        with self._lock:
+            return fn(self._states, self.now)
+
+
+def test_minute_bucket_rejects_without_waiting():
+    quota = UpstreamQuota(per_minute=3, per_day=0, store=ClockStore())
+    for _ in range(3):
+        quota.acquire()
+
+    with pytest.raises(QuotaExceededError) as error:
+        quota.acquire()
+    assert error.value.bucket == 'minute'
+    assert error.value.retry_after == pytest.approx(20)
+    assert (quota.allowed, quota.rejected) == (3, 1)
+
+
+def test_tokens_refill_with_time():
+    store = ClockStore()
+    quota = UpstreamQuota(per_minute=3, per_day=0, store=store)
+    for _ in range(3):
+        quota.acquire()
+
+    store.now += 20
+    quota.acquire()
+    with pytest.raises(QuotaExceededError):
+        quota.acquire()
+
+
+def test_day_bucket_limits_across_minutes():
+    store = ClockStore()
+    quota = UpstreamQuota(per_minute=10, per_day=2, store=store)
+    quota.acquire()
+    store.now += 60
+    quota.acquire()
+    store.now += 60
+
+    with pytest.raises(QuotaExceededError) as error:
+        quota.acquire()
+    assert error.value.bucket == 'day'
+
+
+def test_background_calls_leave_reserve_for_users():
+    quota = UpstreamQuota(per_minute=4, per_day=0, background_reserve=0.5, store=ClockStore())
+    quota.acquire(background=True)
+    quota.acquire(background=True)
+
+    # Kalan 2 token yalnızca kullanıcı isteklerine ayrılmıştır
+    with pytest.raises(QuotaExceededError):
+        quota.acquire(background=True)
+    quota.acquire()
+    quota.acquire()
+    assert (quota.allowed, quota.background_rejected, quota.rejected) == (4, 1, 0)
+
+
+def test_penalize_blocks_calls_for_retry_after():
+    store = ClockStore()
+    quota = UpstreamQuota(per_minute=60, per_day=0, store=store)
+    quota.penalize(retry_after=30)
+
+    with pytest.raises(QuotaExceededError) as error:
+        quota.acquire()
+    assert error.value.retry_after == pytest.approx(31)
+    store.now += 31
+    quota.acquire()
+    assert quota.throttled == 1
+
+
+def test_zero_capacity_means_unlimited():
+    quota = UpstreamQuota(per_minute=0, per_day=0, store=ClockStore())
+    for _ in range(1000):
+        quota.acquire()
+    assert quota.stats()['buckets'] == {}
+
+
+def test_sqlite_store_shares_budget_between_workers(tmp_path):
+    path = str(tmp_path / 'quota.sqlite3')
+    first = UpstreamQuota(per_minute=2, per_day=0, store=SQLiteQuotaStore(path))
+    second = UpstreamQuota(per_minute=2, per_day=0, store=SQLiteQuotaStore(path))
+
+    first.acquire()
+    second.acquire()
+    with pytest.raises(QuotaExceededError):
+        first.acquire()
+    assert second.stats()['backend'] == 'sqlite'
+    assert second.stats()['buckets']['minute']['tokens'] < 1
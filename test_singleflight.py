@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Çağrı birleştirme (singleflight) birim testleri
+"""
+
+import asyncio
+import os
+import threading
+import time
+
+import pytest
+
+os.environ.setdefault('OPENWEATHER_API_KEY', 'test-key')
+
+from app_async import AsyncSingleFlight
+from singleflight import SingleFlight
+
+
+def run_concurrently(singleflight, fn, callers=4):
+    """Aynı anahtarla eşzamanlı çağrılar yap; lider fn içinde beklerken diğerleri katılır"""
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(call(singleflight, fn)))
+               for _ in range(callers)]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+
+def call(singleflight, fn):
+    try:
+        return singleflight.do('istanbul', fn)
+    except Exception as e:
+        return e
+
+
+def wait_for_waiters(singleflight, count, timeout=5):
+    deadline = time.monotonic() + timeout
+    while singleflight.stats()['coalesced'] < count and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+
+def test_concurrent_calls_share_one_execution():
+    singleflight = SingleFlight()
+    release = threading.Event()
+
+    def fetch():
+        release.wait(5)
+        return 'sonuç'
+
+    threads, results = run_concurrently(singleflight, fetch)
+    wait_for_waiters(singleflight, 3)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert results == ['sonuç'] * 4
+    assert singleflight.in_flight() == 0
+    assert (singleflight.executions, singleflight.coalesced) == (1, 3)
+
+
+def test_error_is_raised_to_every_waiter():
+    singleflight = SingleFlight()
+    release = threading.Event()
+
+    def fail():
+        release.wait(5)
+        raise ValueError('upstream')
+
+    threads, results = run_concurrently(singleflight, fail)
+    wait_for_waiters(singleflight, 3)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(results) == 4 and all(isinstance(result, ValueError) for result in results)
+    assert singleflight.errors == 1
+    # Hata kaydı tutulmaz; sonraki çağrı yeniden çalıştırır
+    assert singleflight.do('istanbul', lambda: 'yeni') == 'yeni'
+
+
+def test_cancelled_leader_does_not_cancel_waiting_followers():
+    async def scenario():
+        singleflight = AsyncSingleFlight()
+        release = asyncio.Event()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await release.wait()
+            return 'sonuç'
+
+        leader = asyncio.ensure_future(singleflight.do('istanbul', fetch))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(singleflight.do('istanbul', fetch))
+        await asyncio.sleep(0)
+
+        # Toplu sorgu süresi dolduğunda lider iptal edilir
+        leader.cancel()
+        await asyncio.sleep(0)
+        release.set()
+
+        assert await follower == 'sonuç'
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        assert calls == [1]
+        assert singleflight.stats()['in_flight'] == 0
+
+    asyncio.run(scenario())
+
+
+def test_errors_are_shared_and_counted_once():
+    async def scenario():
+        singleflight = AsyncSingleFlight()
+        release = asyncio.Event()
+
+        async def fail():
+            await release.wait()
+            raise ValueError('upstream')
+
+        waiters = [asyncio.ensure_future(singleflight.do('ankara', fail)) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*waiters, return_exceptions=True)
+
+        assert all(isinstance(result, ValueError) for result in results)
+        stats = singleflight.stats()
+        assert (stats['executions'], stats['coalesced'], stats['errors']) == (1, 2, 1)
+
+    asyncio.run(scenario())
@@ -125,6 +125,22 @@ def test_swagger_api():
     except Exception as e:
         print(f"❌ London testi bağlantı hatası: {e}\n")
     
+    # Test 9: Toplu sorgu
+    print("9️⃣ Toplu sorgu testi (Istanbul, Ankara, GeçersizŞehir)...")
+    try:
+        response = requests.get(f"{API_BASE}/weather/batch?cities=Istanbul,Ankara,GeçersizŞehirİsmi123")
+        if response.status_code == 200:
+            data = response.json()
+            print(f"✅ Toplu sorgu çalışıyor: {data['succeeded']} başarılı, {data['failed']} hatalı")
+            for error in data['errors']:
+                print(f"📄 {error['city']}: {error['error']}")
+            print()
+        else:
+            print(f"❌ Toplu sorgu testi hatası: {response.status_code}")
+            print(f"📄 Hata: {response.json()}\n")
+    except Exception as e:
+        print(f"❌ Toplu sorgu testi bağlantı hatası: {e}\n")
+
     print("🏁 Swagger API testleri tamamlandı!")
     print(f"📚 Swagger UI'yi tarayıcıda görüntülemek için: {BASE_URL}/swagger/")
 
@@ -179,6 +195,15 @@ def interactive_swagger_test():
         
         print()  # Boş satır
 
+def load_test_swagger_api(duration=30, rate=20):
+    """Zipf dağılımlı şehir karışımıyla kısa bir open-loop yük testi çalıştır"""
+    from load_test import zipf_trace, model_cities, run, print_report
+
+    print(f"🚦 {duration} sn boyunca saniyede ~{rate} istek (Zipf şehir karışımı, %2 yazım hatası)...\n")
+    records = zipf_trace(duration, rate, model_cities(50), typo_rate=0.02, routes=('query', 'path'))
+    print_report(run(BASE_URL, records, speed=1.0, max_connections=200))
+    print("\n💡 İz dosyası, patlamalar ve diğer seçenekler için: python load_test.py --help")
+
 def show_api_info():
     """API bilgilerini göster"""
     print("📚 Swagger UI'lı Hava Durumu API Bilgileri")
@@ -191,6 +216,7 @@ def show_api_info():
     print(f"   GET {API_BASE}/                     - Ana sayfa")
     print(f"   GET {API_BASE}/weather?city=<şehir> - Hava durumu (query)")
     print(f"   GET {API_BASE}/weather/<şehir>      - Hava durumu (path)")
+    print(f"   GET {API_BASE}/weather/batch?cities=<şehir1,şehir2> - Toplu hava durumu")
     print(f"   GET {BASE_URL}/swagger/             - API dokümantasyonu")
     print()
     print("💡 Örnek kullanım:")
@@ -205,8 +231,9 @@ if __name__ == "__main__":
     print("1. Otomatik testleri çalıştır")
     print("2. İnteraktif test modu")
     print("3. Sadece bilgileri göster")
+    print("4. Yük testi (trafik modeli)")
     
-    choice = input("\nSeçiminiz (1/2/3): ").strip()
+    choice = input("\nSeçiminiz (1/2/3/4): ").strip()
     
     if choice == "1":
         test_swagger_api()
@@ -214,5 +241,7 @@ if __name__ == "__main__":
         interactive_swagger_test()
     elif choice == "3":
         print("ℹ️ API bilgileri yukarıda gösterildi.")
+    elif choice == "4":
+        load_test_swagger_api()
     else:
         print("❌ Geçersiz seçim!")
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Upstream istemcisi birim testleri
+Devre kesici ve kota muhasebesi gerçek ağ bağlantısı olmadan, istek
+gönderen katman sahte bir denemeyle değiştirilerek test edilir.
+"""
+
+import asyncio
+import os
+import threading
+import time
+
+import pytest
+
+# app_async, Flask uygulamasının modellerini kullanır; uygulama API anahtarı olmadan başlamaz
+os.environ.setdefault('OPENWEATHER_API_KEY', 'test-key')
+
+from app_async import AsyncOpenWeatherClient
+from circuit_breaker import CircuitBreaker, CircuitOpenError, HALF_OPEN
+from quota import UpstreamQuota
+from upstream import OpenWeatherClient
+
+
+class FakeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.status = status_code
+        self.headers = {}
+
+    async def read(self):
+        return b'{}'
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakeSession:
+    """Sıradaki durum kodlarını döndüren, gönderilen istekleri sayan sahte oturum"""
+
+    def __init__(self, *statuses):
+        self.statuses = list(statuses)
+        self.sent = 0
+
+    def get(self, url, params=None, timeout=None):
+        self.sent += 1
+        return FakeResponse(self.statuses.pop(0))
+
+
+def sync_client(quota, *statuses):
+    client = OpenWeatherClient(max_retries=2, backoff=0, quota=quota, breaker=None, fixtures=None)
+    client.session = FakeSession(*statuses)
+    return client
+
+
+def async_client(quota, *statuses):
+    client = AsyncOpenWeatherClient(max_retries=2, backoff=0, quota=quota, breaker=None, fixtures=None)
+    client._session = FakeSession(*statuses)
+    return client
+
+
+def test_sync_retries_are_charged_to_quota():
+    quota = UpstreamQuota(per_minute=10, per_day=0)
+    client = sync_client(quota, 502, 503, 200)
+
+    assert client.get('weather', params={'q': 'Ankara'}).status_code == 200
+    assert client.session.sent == 3
+    assert quota.allowed == 3
+    assert client.retries == 2
+
+
+def test_sync_retry_stops_when_quota_is_exhausted():
+    quota = UpstreamQuota(per_minute=2, per_day=0)
+    client = sync_client(quota, 502, 502, 200)
+
+    assert client.get('weather', params={'q': 'Ankara'}).status_code == 502
+    assert client.session.sent == 2
+    assert quota.allowed == 2
+
+
+def test_hedged_primaries_do_not_queue_behind_admission_cap():
+    client = OpenWeatherClient(quota=None, breaker=None, fixtures=None, hedge_workers=1, max_in_flight=4)
+    started, release = [], threading.Event()
+
+    def get(url, params=None, timeout=None):
+        started.append(url)
+        release.wait(5)
+        return FakeResponse(200)
+
+    client.session.get = get
+    callers = [threading.Thread(target=client._send_hedged, args=('weather', {}, (1, 1), 10))
+               for _ in range(4)]
+    for caller in callers:
+        caller.start()
+    deadline = time.monotonic() + 2
+    while len(started) < 4 and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    # Kabul sınırı kadar birincil istek havuzda beklemeden upstream'e gider
+    assert len(started) == 4
+    release.set()
+    for caller in callers:
+        caller.join()
+    client.close()
+
+
+def test_async_retries_are_charged_to_quota():
+    quota = UpstreamQuota(per_minute=2, per_day=0)
+    client = async_client(quota, 502, 502, 200)
+
+    result = asyncio.run(client.get('weather', params={'q': 'Ankara'}))
+
+    assert result.status_code == 502
+    assert client.session.sent == 2
+    assert quota.allowed == 2
+
+
+def test_sync_hedge_refused_by_budget_keeps_quota_tokens():
+    quota = UpstreamQuota(per_minute=10, per_day=0)
+    client = OpenWeatherClient(quota=quota, breaker=None, fixtures=None)
+    sent = []
+
+    def slow(*args):
+        sent.append(args)
+        time.sleep(0.05)
+        return FakeResponse(200)
+
+    client._get_with_retries = slow
+    assert client._send_hedged('weather', {}, (1, 1), 0.01).status_code == 200
+    assert (len(sent), quota.allowed, client.policy.budget_skips) == (1, 0, 1)
+
+    # Bütçe izin verdiğinde hedge kotadan tek token alır
+    client.policy._tokens = 1
+    assert client._send_hedged('weather', {}, (1, 1), 0.01).status_code == 200
+    assert (len(sent), quota.allowed, client.policy.hedges) == (3, 1, 1)
+    client.close()
+
+
+def test_async_hedge_refused_by_budget_keeps_quota_tokens():
+    quota = UpstreamQuota(per_minute=10, per_day=0)
+    client = AsyncOpenWeatherClient(quota=quota, breaker=None, fixtures=None)
+    sent = []
+
+    async def slow(*args):
+        sent.append(args)
+        await asyncio.sleep(0.05)
+        return FakeResponse(200)
+
+    client._get_with_retries = slow
+    result = asyncio.run(client._send_hedged('weather', {}, None, 0.01))
+
+    assert result.status_code == 200
+    assert (len(sent), quota.allowed, client.policy.budget_skips) == (1, 0, 1)
+
+
+def half_open_breaker():
+    """Tek deneme çağrısına izin veren, half_open durumundaki devre kesici"""
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0, half_open_max_calls=1)
+    breaker.record_failure()
+    assert breaker.state == HALF_OPEN
+    return breaker
+
+
+def test_cancelled_half_open_probe_releases_trial():
+    breaker = half_open_breaker()
+    client = AsyncOpenWeatherClient(quota=None, breaker=breaker, fixtures=None)
+
+    async def hang(*args):
+        await asyncio.sleep(3600)
+
+    client._get_with_retries = hang
+
+    async def scenario():
+        probe = asyncio.ensure_future(client.get('weather', params={'q': 'Ankara'}))
+        await asyncio.sleep(0)
+        # Deneme sürerken ikinci çağrı reddedilir
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+
+    asyncio.run(scenario())
+
+    # İptal edilen deneme hakkını geri verdi; sonraki çağrı kabul edilir
+    breaker.before_call()
+    assert breaker.state == HALF_OPEN
+    assert client.in_flight == 0
+
+
+
+def broken_fixture(*args):
+    raise ValueError('bozuk fikstür kaydı')
+
+
+def test_sync_unexpected_error_in_half_open_probe_releases_trial():
+    breaker = half_open_breaker()
+    client = OpenWeatherClient(quota=None, breaker=breaker, fixtures=None)
+    client._get_with_retries = broken_fixture
+
+    with pytest.raises(ValueError):
+        client.get('weather', params={'q': 'Ankara'})
+
+    # Sonuç bildirmeyen deneme hakkını geri verdi; sonraki çağrı kabul edilir
+    breaker.before_call()
+    assert breaker.state == HALF_OPEN
+    assert client.in_flight == 0
+    client.close()
+
+
+def test_async_unexpected_error_in_half_open_probe_releases_trial():
+    breaker = half_open_breaker()
+    client = AsyncOpenWeatherClient(quota=None, breaker=breaker, fixtures=None)
+
+    async def broken(*args):
+        broken_fixture()
+
+    client._get_with_retries = broken
+    with pytest.raises(ValueError):
+        asyncio.run(client.get('weather', params={'q': 'Ankara'}))
+
+    breaker.before_call()
+    assert breaker.state == HALF_OPEN
+    assert client.in_flight == 0
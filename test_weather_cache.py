@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Süreç içi TTL önbelleği birim testleri
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+import weather_cache
+from weather_cache import TTLCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """weather_cache modülünün gördüğü zamanı test ilerletir"""
+    now = [1000.0]
+    monkeypatch.setattr(weather_cache, 'time', SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+def test_entry_expires_after_ttl(clock):
+    cache = TTLCache(ttl=60)
+    cache.set('istanbul', {'temp': 18})
+    assert cache.get('istanbul') == {'temp': 18}
+
+    clock[0] += 60
+    assert cache.get('istanbul') is None
+    assert cache.stats()['expirations'] == 1
+
+
+def test_stale_entry_is_kept_until_max_age(clock):
+    cache = TTLCache(ttl=60, max_age=300)
+    cache.set('istanbul', {'temp': 18})
+
+    clock[0] += 120
+    entry = cache.get_entry('istanbul')
+    assert (entry.value, entry.age, entry.fresh) == ({'temp': 18}, 120, False)
+    assert cache.get('istanbul') is None
+
+    clock[0] += 180
+    assert cache.get_entry('istanbul') is None
+
+
+def test_lru_eviction_by_entries_and_bytes(clock):
+    cache = TTLCache(ttl=60, max_entries=2, max_bytes=1000)
+    cache.set('a', 'x')
+    cache.set('b', 'x')
+    cache.get('a')
+    cache.set('c', 'x')
+
+    # En uzun süredir okunmayan kayıt tahliye edilir
+    assert cache.get('b') is None
+    assert cache.get('a') == cache.get('c') == 'x'
+
+    cache.set('big', 'y' * 996)
+    assert len(cache) == 1
+    assert cache.stats()['bytes'] <= 1000
+    assert cache.stats()['evictions'] == 3
+
+
+def test_oversized_and_zero_ttl_values_are_not_stored(clock):
+    cache = TTLCache(ttl=60, max_bytes=10)
+    cache.set('big', 'x' * 100)
+    cache.set('zero', 'x', ttl=0)
+    assert len(cache) == 0
+
+
+def test_byte_fields_are_sized_by_length():
+    small = weather_cache.approx_size({'_body': b'x' * 10})
+    large = weather_cache.approx_size({'_body': b'x' * 1000})
+    assert large - small == 990
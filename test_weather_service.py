@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Hava durumu servis hattı birim testleri
+Her aşama (temizleme, hata eşleme, dönüştürme, önbellek, upstream) canlı
+sunucu ve ağ bağlantısı olmadan, sahte upstream yanıtlarıyla test edilir.
+"""
+
+import json
+
+import pytest
+import requests
+
+from admission import AdmissionController, AdmissionRejected
+from circuit_breaker import CircuitOpenError
+from quota import QuotaExceededError
+from singleflight import SingleFlight
+from weather_cache import TTLCache, CacheEntry, make_key
+from serialization import BODY_FIELD
+from conditional import ETAG_FIELD, OBSERVED_AT_FIELD, public
+from city_locator import CityLocator
+from forecast import ForecastSeries, FORECAST_FIELDS
+from weather_service import (WeatherService, WeatherError, INVALID_CITY_MESSAGE, INVALID_COORDS_MESSAGE,
+                             QUOTA_MESSAGE, CIRCUIT_MESSAGE, OVERLOAD_MESSAGE, TIMEOUT_MESSAGE,
+                             CONNECTION_MESSAGE, INVALID_KEY_MESSAGE, clean_city, clean_coords, upstream_params,
+                             raise_for_status, map_exception, build_weather_response, not_found_message,
+                             clean_forecast_query, build_forecast_response)
+from tests_support import weather_data, forecast_data
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, data=None, headers=None):
+        self.status_code = status_code
+        self.data = data
+        self.headers = headers or {}
+
+    def json(self):
+        return self.data
+
+
+class FakeClient:
+    """Sıradaki yanıtı (ya da istisnayı) döndüren, çağrıları kaydeden sahte upstream istemcisi"""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    def get(self, endpoint, params=None, background=False):
+        self.calls.append((endpoint, params, background))
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+class FixedCache:
+    """Her anahtar için verilen kaydı döndüren önbellek (bayat kayıt senaryoları için)"""
+
+    def __init__(self, entry):
+        self.entry = entry
+        self.stored = {}
+
+    def get_entry(self, key):
+        return self.entry
+
+    def set(self, key, value, ttl=None):
+        self.stored[key] = value
+
+
+def make_service(client, cache=None, negative=None):
+    return WeatherService(api_key='test-key', client=client,
+                          cache=TTLCache(ttl=60) if cache is None else cache,
+                          negative=TTLCache(ttl=60) if negative is None else negative,
+                          singleflight=SingleFlight(),
+                          admission=AdmissionController(max_in_flight=4),
+                          locator=CityLocator(),
+                          forecasts=TTLCache(ttl=60))
+
+
+# Temizleme (normalizer)
+
+def test_clean_city_strips_whitespace():
+    assert clean_city('  Ankara ') == 'Ankara'
+
+
+@pytest.mark.parametrize('city', [None, '', ' ', 'A', ' x '])
+def test_clean_city_rejects_short_names(city):
+    with pytest.raises(WeatherError) as error:
+        clean_city(city)
+    assert error.value.status == 400
+    assert error.value.message == INVALID_CITY_MESSAGE
+
+
+def test_upstream_params_adds_units_and_language():
+    assert upstream_params('key', q='Izmir') == {'q': 'Izmir', 'appid': 'key', 'units': 'metric', 'lang': 'tr'}
+
+
+# Hata eşleyici
+
+def test_raise_for_status_accepts_success():
+    assert raise_for_status(FakeResponse(200), 'Ankara') is None
+
+
+@pytest.mark.parametrize('status, expected_status, expected_message', [
+    (404, 404, not_found_message('Ankara')),
+    (401, 500, INVALID_KEY_MESSAGE),
+    (502, 500, 'Hava durumu servisi hatası: 502'),
+])
+def test_raise_for_status_maps_upstream_errors(status, expected_status, expected_message):
+    with pytest.raises(WeatherError) as error:
+        raise_for_status(FakeResponse(status), 'Ankara')
+    assert (error.value.status, error.value.message) == (expected_status, expected_message)
+
+
+def test_raise_for_status_maps_rate_limit_to_quota_error():
+    with pytest.raises(WeatherError) as error:
+        raise_for_status(FakeResponse(429, headers={'Retry-After': '7'}), 'Ankara')
+    assert (error.value.status, error.value.message, error.value.retry_after) == (503, QUOTA_MESSAGE, 7.0)
+
+
+@pytest.mark.parametrize('exception, expected_status, expected_message, retry_after', [
+    (QuotaExceededError(3.0, 'user'), 503, QUOTA_MESSAGE, 3.0),
+    (CircuitOpenError(12.0), 503, CIRCUIT_MESSAGE, 12.0),
+    (AdmissionRejected(2, 'queue_full'), 503, OVERLOAD_MESSAGE, 2),
+    (requests.exceptions.ReadTimeout(), 504, TIMEOUT_MESSAGE, None),
+    (requests.exceptions.ConnectionError(), 503, CONNECTION_MESSAGE, None),
+    (KeyError('main'), 500, "Beklenmeyen bir hata oluştu: 'main'", None),
+])
+def test_map_exception(exception, expected_status, expected_message, retry_after):
+    error = map_exception(exception)
+    assert (error.status, error.message, error.retry_after) == (expected_status, expected_message, retry_after)
+
+
+def test_map_exception_keeps_weather_errors():
+    original = WeatherError(404, 'yok')
+    assert map_exception(original) is original
+
+
+# Dönüştürücü
+
+def test_build_weather_response():
+    result = build_weather_response(weather_data())
+    assert public(result) == {
+        'success': True,
+        'city': 'Servisköy',
+        'country': 'TR',
+        'message': ("Servisköy (TR)'da hava sıcaklığı 18°C (hissedilen 17°C), nem oranı %63, "
+                    "rüzgar hızı 18.5 km/h ve hava durumu: Parçalı Az Bulutlu."),
+        'details': {
+            'temperature': 18,
+            'feels_like': 17,
+            'humidity': 63,
+            'wind_speed_kmh': 18.5,
+            'description': 'Parçalı Az Bulutlu',
+            'icon': '03d'
+        }
+    }
+    # Önceden serileştirilmiş gövde API çıktısıyla aynı, ETag gözlem zamanını taşır
+    assert isinstance(result[BODY_FIELD], bytes)
+    assert json.loads(result[BODY_FIELD]) == public(result)
+    assert result[OBSERVED_AT_FIELD] == 1700000000
+    assert result[ETAG_FIELD].startswith('"6553f100-')
+
+
+def test_build_weather_response_rejects_incomplete_data():
+    data = weather_data()
+    del data['main']
+    with pytest.raises(KeyError):
+        build_weather_response(data)
+
+
+# Önbellek ve upstream aşamaları
+
+def test_service_fetches_once_then_serves_from_cache():
+    client = FakeClient(FakeResponse(200, weather_data('Önbellekköy')))
+    service = make_service(client)
+
+    first_info, second_info = {}, {}
+    first = service.get(' Önbellekköy ', first_info)
+    second = service.get('Önbellekköy', second_info)
+
+    assert second is first
+    assert len(client.calls) == 1
+    endpoint, params, background = client.calls[0]
+    assert (endpoint, params['q'], params['appid'], background) == ('weather', 'Önbellekköy', 'test-key', False)
+    assert first_info['status'] == 'MISS'
+    assert second_info['status'] == 'HIT'
+
+
+def test_service_caches_not_found_cities():
+    client = FakeClient(FakeResponse(404))
+    service = make_service(client)
+
+    for _ in range(2):
+        with pytest.raises(WeatherError) as error:
+            service.get('Yokköy')
+        assert error.value.status == 404
+        assert error.value.message == not_found_message('Yokköy')
+    assert len(client.calls) == 1
+
+
+def test_service_serves_stale_entry_on_upstream_failure():
+    stale = {'city': 'Bayatköy'}
+    client = FakeClient(requests.exceptions.ConnectionError())
+    service = make_service(client, cache=FixedCache(CacheEntry(stale, 3000.0, False)))
+
+    cache_info = {}
+    assert service.get('Bayatköy', cache_info) is stale
+    assert cache_info == {'status': 'STALE', 'age': 3000.0}
+
+
+def test_service_maps_upstream_failure_without_cache():
+    client = FakeClient(requests.exceptions.ConnectTimeout())
+    service = make_service(client)
+
+    with pytest.raises(WeatherError) as error:
+        service.get('Zamanköy')
+    assert (error.value.status, error.value.message) == (504, TIMEOUT_MESSAGE)
+
+
+def test_service_rejects_invalid_city_without_upstream_call():
+    client = FakeClient()
+    service = make_service(client)
+
+    with pytest.raises(WeatherError) as error:
+        service.get(' x ')
+    assert error.value.status == 400
+    assert client.calls == []
+
+
+def test_fetch_group_caches_found_cities():
+    client = FakeClient(FakeResponse(200, {'list': [weather_data('Grupköy', city_id=101)]}))
+    cache = TTLCache(ttl=60)
+    service = make_service(client, cache=cache)
+    chunk = [(make_key('Grupköy'), 'Grupköy', 101), (make_key('Eksikköy'), 'Eksikköy', 102)]
+
+    results = service.fetch_group(chunk)
+
+    assert list(results) == [make_key('Grupköy')]
+    assert cache.get(make_key('Grupköy')) is results[make_key('Grupköy')]
+    assert client.calls[0][1]['id'] == '101,102'
+
+
+# Koordinat sorguları
+
+def test_clean_coords():
+    assert clean_coords('41.01', 28.98) == (41.01, 28.98)
+
+
+@pytest.mark.parametrize('lat, lon', [(None, 29), ('abc', 29), (91, 29), (41, -180.5), ('nan', 29)])
+def test_clean_coords_rejects_invalid_values(lat, lon):
+    with pytest.raises(WeatherError) as error:
+        clean_coords(lat, lon)
+    assert (error.value.status, error.value.message) == (400, INVALID_COORDS_MESSAGE)
+
+
+def test_coords_near_known_city_share_its_cache_entry():
+    data = weather_data('Koordinatköy', lat=40.0, lon=30.0)
+    client = FakeClient(FakeResponse(200, data))
+    service = make_service(client)
+
+    by_name = service.get('Koordinatköy,TR')
+    cache_info = {}
+    assert service.get_by_coords(40.02, 30.03, cache_info) is by_name
+    assert cache_info['status'] == 'HIT'
+    assert len(client.calls) == 1
+
+
+def test_coords_without_known_city_fetch_cell_center_once():
+    data = weather_data('Hücreköy', lat=12.3, lon=45.6)
+    client = FakeClient(FakeResponse(200, data))
+    service = make_service(client)
+
+    first = service.get_by_coords(-30.01, -60.02)
+    second = service.get_by_coords(-30.04, -60.08)
+
+    assert second is first
+    assert len(client.calls) == 1
+    params = client.calls[0][1]
+    assert (params['lat'], params['lon']) == (-30.05, -60.05)
+    assert 'q' not in params
+
+
+# Hava tahmini
+
+def test_clean_forecast_query_defaults():
+    assert clean_forecast_query() == (FORECAST_FIELDS, None, None, None)
+    assert clean_forecast_query('humidity', '1700000000', '', '6') == (('time', 'humidity'), 1700000000, None, 6)
+
+
+@pytest.mark.parametrize('fields, start, end, hours', [
+    ('pressure', None, None, None),
+    (None, 'yarın', None, None),
+    (None, None, None, '0'),
+])
+def test_clean_forecast_query_rejects_invalid_values(fields, start, end, hours):
+    with pytest.raises(WeatherError) as error:
+        clean_forecast_query(fields, start, end, hours)
+    assert error.value.status == 400
+
+
+def test_service_caches_forecast_series():
+    client = FakeClient(FakeResponse(200, forecast_data('Tahminköy')))
+    service = make_service(client)
+
+    first_info, second_info = {}, {}
+    first = service.get_forecast('Tahminköy', first_info)
+    second = service.get_forecast('Tahminköy', second_info)
+
+    assert second is first
+    assert len(client.calls) == 1
+    assert client.calls[0][0] == 'forecast'
+    assert (first_info['status'], second_info['status']) == ('MISS', 'HIT')
+
+
+def test_service_shares_negative_cache_with_weather():
+    client = FakeClient(FakeResponse(404))
+    service = make_service(client)
+
+    with pytest.raises(WeatherError):
+        service.get('Yoktahminköy')
+    with pytest.raises(WeatherError) as error:
+        service.get_forecast('Yoktahminköy')
+    assert error.value.status == 404
+    assert len(client.calls) == 1
+
+
+def test_build_forecast_response_limits_window_by_hours():
+    series = ForecastSeries.from_response(forecast_data('Tahminköy'))
+
+    response = build_forecast_response(series, ('time', 'temperature'), start=1700000000 + 10800, hours=9)
+
+    assert response['count'] == 3
+    assert response['forecast'][0] == {'time': 1700000000 + 10800, 'temperature': 11.2}
+    assert (response['city'], response['country']) == ('Tahminköy', 'TR')
@@ -0,0 +1,42 @@
+"""
+Birim testlerinin paylaştığı OpenWeather yanıtı örnekleri.
+
+Testler `from tests_support import ...` ile kullanır; değerler sabittir, böylece
+beklenen çıktılar testlerde doğrudan yazılabilir.
+"""
+
+FORECAST_START = 1700000000
+FORECAST_STEP = 3 * 3600
+
+
+def weather_data(name='Servisköy', country='TR', city_id=None, lat=None, lon=None, temp=18.4):
+    """OpenWeather /weather yanıtı biçiminde örnek veri (id ve coord yalnızca verilirse eklenir)"""
+    data = {
+        'name': name,
+        'sys': {'country': country},
+        'dt': 1700000000,
+        'main': {'temp': temp, 'feels_like': 17.2, 'humidity': 63},
+        'wind': {'speed': 5.14},
+        'weather': [{'description': 'parçalı az bulutlu', 'icon': '03d'}]
+    }
+    if city_id is not None:
+        data['id'] = city_id
+    if lat is not None:
+        data['coord'] = {'lat': lat, 'lon': lon}
+    return data
+
+
+def forecast_data(name='Istanbul', points=40, city_id=745044, lat=41.01, lon=28.95):
+    """OpenWeather /forecast yanıtı biçiminde örnek veri (noktalar ters sırada)"""
+    items = [{
+        'dt': FORECAST_START + i * FORECAST_STEP,
+        'main': {'temp': 10.25 + i, 'feels_like': 9.0 + i, 'humidity': 50 + i % 10},
+        'wind': {'speed': 2.5},
+        'weather': [{'description': 'hafif yağmur' if i % 2 else 'açık', 'icon': '10d' if i % 2 else '01d'}],
+        'pop': 0.37
+    } for i in range(points)]
+    return {
+        'cod': '200',
+        'list': items[::-1],
+        'city': {'id': city_id, 'name': name, 'country': 'TR', 'coord': {'lat': lat, 'lon': lon}}
+    }
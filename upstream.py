@@ -0,0 +1,323 @@
+"""
+OpenWeather API için paylaşılan, thread-safe upstream istemcisi.
+
+Tüm uygulamalar OpenWeather'a bu istemci üzerinden gider. İstemci
+keep-alive bağlantı havuzu kullanan tek bir requests.Session tutar; böylece
+her istekte yeniden TCP (ve TLS) el sıkışması yapılmaz. Bağlantı ve okuma
+zaman aşımları ayrı ayrı ayarlanabilir, idempotent hatalar geri çekilmeli
+(backoff) ve sınırlı sayıda yeniden denenir. Her yeniden deneme gerçek bir
+OpenWeather isteği olduğu için kotadan ayrıca düşülür.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from quota import upstream_quota, QuotaExceededError
+from circuit_breaker import upstream_breaker, CircuitOpenError
+from hedging import HedgePolicy
+from metrics import metrics
+from fixtures import upstream_fixtures, fixture_key, ReplayAdapter
+from admission import ADMISSION_MAX_IN_FLIGHT
+
+# Upstream konfigürasyonu (ortam değişkenlerinden)
+OPENWEATHER_BASE_URL = os.getenv('OPENWEATHER_BASE_URL', "http://api.openweathermap.org/data/2.5")
+UPSTREAM_POOL_SIZE = int(os.getenv('UPSTREAM_POOL_SIZE', 10))
+UPSTREAM_KEEP_ALIVE = os.getenv('UPSTREAM_KEEP_ALIVE', 'True').lower() == 'true'
+UPSTREAM_CONNECT_TIMEOUT = float(os.getenv('UPSTREAM_CONNECT_TIMEOUT', 3.05))
+UPSTREAM_READ_TIMEOUT = float(os.getenv('UPSTREAM_READ_TIMEOUT', 10))
+UPSTREAM_MAX_RETRIES = int(os.getenv('UPSTREAM_MAX_RETRIES', 2))
+UPSTREAM_BACKOFF = float(os.getenv('UPSTREAM_BACKOFF', 0.3))
+# Hedge istekleri için ek thread sayısı; havuz kabul kontrolü sınırı kadar birincil
+# isteği de kuyruğa sokmadan taşır (yoksa hedge_after bekleme süresini ölçer)
+UPSTREAM_HEDGE_WORKERS = int(os.getenv('UPSTREAM_HEDGE_WORKERS', 32))
+
+# Yeniden denenecek geçici upstream hataları (429 kota için ayrıca ele alınır)
+RETRY_STATUSES = (500, 502, 503, 504)
+
+
+def parse_retry_after(value):
+    """Retry-After başlığını saniyeye çevir (yalnızca saniye biçimi desteklenir)"""
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+class OpenWeatherClient:
+    """Havuzlanmış keep-alive oturumu kullanan OpenWeather istemcisi"""
+
+    def __init__(self, base_url=OPENWEATHER_BASE_URL, pool_size=UPSTREAM_POOL_SIZE,
+                 keep_alive=UPSTREAM_KEEP_ALIVE, connect_timeout=UPSTREAM_CONNECT_TIMEOUT,
+                 read_timeout=UPSTREAM_READ_TIMEOUT, max_retries=UPSTREAM_MAX_RETRIES,
+                 backoff=UPSTREAM_BACKOFF, quota=upstream_quota, breaker=upstream_breaker,
+                 hedge_workers=UPSTREAM_HEDGE_WORKERS, max_in_flight=ADMISSION_MAX_IN_FLIGHT,
+                 fixtures=upstream_fixtures):
+        self.base_url = base_url.rstrip('/')
+        self.pool_size = pool_size
+        self.keep_alive = keep_alive
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.quota = quota
+        self.breaker = breaker
+        self.fixtures = fixtures
+        self.policy = HedgePolicy(read_timeout)
+        self._hedge_executor = ThreadPoolExecutor(max_workers=max_in_flight + hedge_workers,
+                                                  thread_name_prefix='upstream-hedge')
+
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.in_flight = 0
+
+        self.session = self._build_session()
+
+    def _build_session(self):
+        """Bağlantı havuzlu oturum oluştur
+
+        Yeniden denemeler adaptörde değil istemcide (_attempts) yapılır; böylece
+        her deneme kotadan düşülür. Tekrar oynatma modunda yanıtlar kayıttan
+        sunan adaptörle gönderilir.
+        """
+        if self.fixtures is not None and self.fixtures.mode == 'replay':
+            adapter = ReplayAdapter(self.fixtures)
+        else:
+            adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size,
+                                  max_retries=0, pool_block=False)
+        session = requests.Session()
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        session.headers['Connection'] = 'keep-alive' if self.keep_alive else 'close'
+        return session
+
+    def url_for(self, endpoint):
+        """Endpoint adından tam upstream URL'si oluştur"""
+        return f"{self.base_url}/{endpoint.lstrip('/')}"
+
+    def get(self, endpoint, params=None, timeout=None, background=False):
+        """OpenWeather endpoint'ine GET isteği gönder ve yanıtı döndür
+
+        requests kütüphanesinin Timeout/ConnectionError istisnaları çağırana
+        aynen iletilir; böylece mevcut hata eşlemeleri değişmeden çalışır.
+        Devre açıksa CircuitOpenError, kota bütçesi yoksa QuotaExceededError
+        istek gönderilmeden yükselir; `background` çağrıları kullanıcı
+        isteklerine ayrılan kota payını kullanamaz.
+
+        Okuma zaman aşımı gözlenen gecikme dağılımından türetilir. İstek
+        gözlenen p95'i aşarsa (hedge bütçesi izin veriyorsa) ikinci bir
+        istek gönderilir ve önce gelen yanıt kullanılır.
+        """
+        self._admit(background)
+        timeout = timeout or (self.timeout[0], self.policy.read_timeout())
+
+        started = time.monotonic()
+        hedge_after = self.policy.hedge_delay()
+        if hedge_after is None:
+            response = self._send(endpoint, params, timeout, background)
+        else:
+            response = self._send_hedged(endpoint, params, timeout, hedge_after, background)
+        self.policy.effective_latency.record(time.monotonic() - started)
+        return response
+
+    def _admit(self, background):
+        """Devre kesici ve kota kontrolü; izin yoksa istek gönderilmeden hata yükselir"""
+        if self.breaker is not None:
+            self.breaker.before_call()
+        if self.quota is not None:
+            try:
+                self.quota.acquire(background=background)
+            except QuotaExceededError:
+                if self.breaker is not None:
+                    self.breaker.release()
+                raise
+
+    def _send(self, endpoint, params, timeout, background=False):
+        """Tek bir upstream çağrısı (yeniden denemeleriyle) gönder ve sonucu kaydet"""
+        with self._lock:
+            self.requests += 1
+            self.in_flight += 1
+        try:
+            response = self._get_with_retries(endpoint, params, timeout, background)
+        except requests.exceptions.RequestException:
+            self._record_error()
+            raise
+        except BaseException:
+            # Beklenmeyen hata (adaptör, fikstür, kod çözme) sonuç bildirmez; half_open
+            # deneme hakkı geri verilmezse devre bir daha çağrıya izin vermez
+            if self.breaker is not None:
+                self.breaker.release()
+            raise
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+        if self.breaker is not None:
+            if response.status_code >= 500:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+        if response.status_code == 429 and self.quota is not None:
+            self.quota.penalize(parse_retry_after(response.headers.get('Retry-After')))
+        return response
+
+    def _get_with_retries(self, endpoint, params, timeout, background):
+        """Yeniden denemeli isteği gönder; kayıt modunda son sonucu fikstüre yaz"""
+        if self.fixtures is None or self.fixtures.mode != 'record':
+            return self._attempts(endpoint, params, timeout, background)
+
+        key = fixture_key(endpoint, params)
+        started = time.monotonic()
+        try:
+            response = self._attempts(endpoint, params, timeout, background)
+        except requests.exceptions.Timeout:
+            self.fixtures.record(key, started, time.monotonic() - started, error='timeout')
+            raise
+        except requests.exceptions.ConnectionError:
+            self.fixtures.record(key, started, time.monotonic() - started, error='connection')
+            raise
+        self.fixtures.record(key, started, time.monotonic() - started, response.status_code,
+                             response.text, response.headers)
+        return response
+
+    def _attempts(self, endpoint, params, timeout, background):
+        """Geçici hatalarda backoff ile yeniden dene (tekrar oynatmada yeniden deneme yapılmaz)
+
+        Her yeniden deneme kotadan ayrıca düşülür; bütçe yoksa son sonuç
+        (ya da hata) olduğu gibi döndürülür.
+        """
+        replay = self.fixtures is not None and self.fixtures.mode == 'replay'
+        max_retries = 0 if replay else self.max_retries
+        for attempt in range(max_retries + 1):
+            try:
+                response = self._attempt(endpoint, params, timeout)
+            except (requests.exceptions.Timeout, requests.exceptions.ConnectionError):
+                if attempt == max_retries or not self._admit_retry(background):
+                    raise
+            else:
+                if (response.status_code not in RETRY_STATUSES or attempt == max_retries
+                        or not self._admit_retry(background)):
+                    return response
+            with self._lock:
+                self.retries += 1
+            time.sleep(self.backoff * (2 ** attempt))
+
+    def _admit_retry(self, background):
+        """Yeniden deneme için kotadan token al; bütçe yoksa False"""
+        if self.quota is None:
+            return True
+        try:
+            self.quota.acquire(background=background)
+        except QuotaExceededError:
+            return False
+        return True
+
+    def _attempt(self, endpoint, params, timeout):
+        """Tek bir HTTP isteği gönder; gecikmeyi ve sonucu metriklere yaz"""
+        started = time.monotonic()
+        status = 'error'
+        try:
+            response = self.session.get(self.url_for(endpoint), params=params, timeout=timeout)
+            status = response.status_code
+            return response
+        except requests.exceptions.Timeout:
+            status = 'timeout'
+            raise
+        finally:
+            elapsed = time.monotonic() - started
+            self.policy.latency.record(elapsed)
+            metrics.observe('upstream_request_duration_seconds', elapsed, endpoint=endpoint)
+            metrics.inc('upstream_responses_total', endpoint=endpoint, status=status)
+
+    def _record_error(self):
+        with self._lock:
+            self.errors += 1
+        if self.breaker is not None:
+            self.breaker.record_failure()
+
+    def _send_hedged(self, endpoint, params, timeout, hedge_after, background=False):
+        """İlk deneme hedge_after saniyede bitmezse ikinci bir istek gönder"""
+        primary = self._hedge_executor.submit(self._send, endpoint, params, timeout, background)
+        done, _ = wait([primary], timeout=hedge_after)
+        if done:
+            return primary.result()
+
+        # Önce hedge bütçesine bakılır; kota token'ı yalnızca gönderilecek hedge için harcanır.
+        # Hedge kota ve devre kesiciden arka plan çağrısı olarak izin alır
+        if not self.policy.take_hedge():
+            return primary.result()
+        try:
+            self._admit(background=True)
+        except (QuotaExceededError, CircuitOpenError):
+            self.policy.refund_hedge()
+            return primary.result()
+        hedge = self._hedge_executor.submit(self._send, endpoint, params, timeout, True)
+
+        # Önce başarıyla dönen yanıt kullanılır; diğeri arka planda tamamlanır
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        self.policy.record_hedge_win()
+                    return future.result()
+                error = error or future.exception()
+        raise error
+
+    def pool_stats(self):
+        """urllib3 bağlantı havuzlarının anlık kullanımını döndür"""
+        pools = []
+        adapter = self.session.get_adapter(self.base_url)
+        # Tekrar oynatma adaptörü ağa çıkmaz, bağlantı havuzu yoktur
+        manager = getattr(adapter, 'poolmanager', None)
+        if manager is None:
+            return pools
+        for key in list(manager.pools.keys()):
+            pool = manager.pools.get(key)
+            if pool is None:
+                continue
+            idle = sum(1 for conn in list(pool.pool.queue) if conn is not None)
+            pools.append({
+                'host': f"{key.key_scheme}://{key.key_host}:{key.key_port}",
+                'connections_opened': pool.num_connections,
+                'requests': pool.num_requests,
+                'idle': idle,
+                'maxsize': pool.pool.maxsize
+            })
+        return pools
+
+    def stats(self):
+        """İstemci sayaçlarını ve havuz kullanımını döndür"""
+        with self._lock:
+            counters = {
+                'requests': self.requests,
+                'errors': self.errors,
+                'retries': self.retries,
+                'in_flight': self.in_flight
+            }
+        counters.update({
+            'pool_size': self.pool_size,
+            'keep_alive': self.keep_alive,
+            'connect_timeout': self.timeout[0],
+            'read_timeout': self.timeout[1],
+            'latency': self.policy.stats(),
+            'pools': self.pool_stats(),
+            'fixtures': self.fixtures.stats() if self.fixtures is not None else None
+        })
+        return counters
+
+    def close(self):
+        """Havuzdaki bağlantıları kapat"""
+        self._hedge_executor.shutdown(wait=False)
+        self.session.close()
+
+
+# Uygulamalar tarafından paylaşılan upstream istemcisi
+upstream_client = OpenWeatherClient()
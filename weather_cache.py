@@ -0,0 +1,199 @@
+"""
+Hava Durumu API'si için süreç içi TTL önbelleği.
+
+OpenWeather yanıtları kanonik şehir kimliği, birim ve dil anahtarıyla
+saklanır (bkz. city_names). Önbellek hem kayıt sayısı hem de yaklaşık bellek kullanımı ile
+sınırlıdır; sınır aşıldığında en az kullanılan (LRU) kayıt atılır.
+
+Kayıtların üç yaş aralığı vardır:
+- WEATHER_CACHE_TTL altında kayıt tazedir ve doğrudan sunulur.
+- WEATHER_CACHE_SOFT_TTL altında bayat kayıt hemen sunulur, arka planda yenilenir.
+- WEATHER_CACHE_HARD_TTL altında bayat kayıt yalnızca upstream hata verirse sunulur.
+
+WEATHER_CACHE_BACKEND ile süreç içi önbellek yerine worker süreçleri
+arasında paylaşılan bir backend (sqlite, redis) seçilebilir; bkz.
+cache_backends.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from city_names import alias_index
+
+# Önbellek konfigürasyonu (ortam değişkenlerinden)
+CACHE_TTL = float(os.getenv('WEATHER_CACHE_TTL', 300))
+CACHE_MAX_ENTRIES = int(os.getenv('WEATHER_CACHE_MAX_ENTRIES', 1000))
+CACHE_MAX_BYTES = int(os.getenv('WEATHER_CACHE_MAX_BYTES', 5 * 1024 * 1024))
+CACHE_SOFT_TTL = float(os.getenv('WEATHER_CACHE_SOFT_TTL', 900))
+CACHE_HARD_TTL = float(os.getenv('WEATHER_CACHE_HARD_TTL', 3600))
+CACHE_BACKEND = os.getenv('WEATHER_CACHE_BACKEND', 'memory').lower()
+# Paylaşılan backend'lerde kayıtlar diğer worker'larca da okunur
+SHARED_CACHE = CACHE_BACKEND != 'memory'
+
+# Bulunamayan şehirler (upstream 404) için ayrı, küçük negatif önbellek
+NEGATIVE_CACHE_TTL = float(os.getenv('NEGATIVE_CACHE_TTL', 60))
+NEGATIVE_CACHE_MAX_ENTRIES = int(os.getenv('NEGATIVE_CACHE_MAX_ENTRIES', 5000))
+
+# get_entry() sonucu: değer, saniye cinsinden yaş ve tazelik bilgisi
+CacheEntry = namedtuple('CacheEntry', ['value', 'age', 'fresh'])
+
+
+def make_key(city, units='metric', lang='tr'):
+    """Şehrin kanonik kimliği, birim ve dil bilgisinden önbellek anahtarı oluştur"""
+    return f"{alias_index.canonical(city)}|{units}|{lang}"
+
+
+def approx_size(value):
+    """Bir kaydın bellekte kapladığı yaklaşık boyutu (byte) hesapla"""
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    try:
+        # Byte alanları (serileştirilmiş gövde, sıkıştırılmış varyantlar) kendi uzunluklarıyla sayılır
+        return len(json.dumps(value, ensure_ascii=False, default=lambda b: '.' * len(b)).encode('utf-8'))
+    except (TypeError, ValueError):
+        return len(repr(value))
+
+
+class TTLCache:
+    """Thread-safe, LRU tahliyeli ve bellek sınırlı TTL önbelleği"""
+
+    def __init__(self, ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES,
+                 max_bytes=CACHE_MAX_BYTES, sizeof=approx_size, max_age=None):
+        self.ttl = ttl
+        # Bayat kayıtların tutulacağı en uzun yaş (varsayılan: bayat kayıt tutma)
+        self.max_age = ttl if max_age is None else max(ttl, max_age)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof
+        # anahtar -> (yazılma_zamanı, taze_bitiş, son_geçerlilik, değer, boyut)
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        """Anahtarın taze değerini döndür; yoksa veya bayatsa None"""
+        entry = self.get_entry(key)
+        if entry is None or not entry.fresh:
+            return None
+        return entry.value
+
+    def get_entry(self, key):
+        """Anahtarın kaydını (taze ya da bayat) CacheEntry olarak döndür
+
+        Kayıt max_age süresini aşmışsa silinir ve None döner.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            stored_at, fresh_until, expires_at, value, _ = entry
+            if expires_at <= now:
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            fresh = now < fresh_until
+            if fresh:
+                self.hits += 1
+            else:
+                self.stale_hits += 1
+            return CacheEntry(value, now - stored_at, fresh)
+
+    def set(self, key, value, ttl=None):
+        """Değeri önbelleğe yaz ve gerekirse eski kayıtları tahliye et"""
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        size = self._sizeof(value)
+        if size > self.max_bytes:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (now, now + ttl, now + max(ttl, self.max_age), value, size)
+            self._bytes += size
+            while (len(self._data) > self.max_entries
+                   or self._bytes > self.max_bytes):
+                oldest = next(iter(self._data))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def delete(self, key):
+        """Anahtarı önbellekten sil"""
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+
+    def clear(self):
+        """Tüm kayıtları temizle"""
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """Önbellek sayaçlarını döndür"""
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.misses
+            return {
+                'backend': 'memory',
+                'entries': len(self._data),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'ttl': self.ttl,
+                'max_age': self.max_age,
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+    def _remove(self, key):
+        size = self._data.pop(key)[-1]
+        self._bytes -= size
+
+
+def create_cache(namespace, ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES,
+                 max_bytes=CACHE_MAX_BYTES, max_age=None, sizeof=approx_size,
+                 backend=CACHE_BACKEND):
+    """Seçilen backend için önbellek oluştur (memory, sqlite ya da redis)
+
+    Paylaşılan backend'lerde namespace, aynı dosya/sunucu üzerindeki farklı
+    önbelleklerin kayıtlarını birbirinden ayırır.
+    """
+    if backend == 'memory':
+        return TTLCache(ttl=ttl, max_entries=max_entries, max_bytes=max_bytes,
+                        sizeof=sizeof, max_age=max_age)
+    if backend == 'sqlite':
+        from cache_backends import SQLiteCache
+        return SQLiteCache(namespace=namespace, ttl=ttl, max_entries=max_entries, max_age=max_age)
+    if backend == 'redis':
+        from cache_backends import RedisCache
+        return RedisCache(namespace=namespace, ttl=ttl, max_age=max_age)
+    raise ValueError(f"Bilinmeyen önbellek backend'i: {backend} (memory, sqlite, redis)")
+
+
+# Uygulamalar tarafından paylaşılan önbellek
+weather_cache = create_cache('weather', max_age=CACHE_HARD_TTL)
+
+# Negatif önbellek ayrı tutulur; anlamsız sorgular geçerli kayıtları tahliye edemez
+negative_cache = create_cache('negative', ttl=NEGATIVE_CACHE_TTL, max_entries=NEGATIVE_CACHE_MAX_ENTRIES,
+                              max_bytes=NEGATIVE_CACHE_MAX_ENTRIES, sizeof=lambda value: 1)
@@ -0,0 +1,557 @@
+"""
+Tüm uygulamaların paylaştığı hava durumu servis hattı.
+
+app.py, app_swagger.py, app_swagger_fixed.py ve async mod (app_async.py)
+şehir sorgusunu aynı aşamalardan geçirir; önbellek, bağlantı havuzu veya
+metrik gibi bir iyileştirme tek yerde yapılır:
+
+- clean_city: şehir ismini temizleme ve doğrulama (önbellek anahtarı make_key ile)
+- WeatherService.get_by_coords: koordinatı en yakın bilinen şehre eşleme (city_locator)
+- WeatherService.get_forecast: 5 günlük tahmin serisi (sütunlu saklama, bkz. forecast)
+- WeatherService.lookup: önbellek aşaması (taze / SWR / bayat / negatif)
+- WeatherService.fetch: upstream aşaması (kabul kontrolü, paylaşılan istemci)
+- raise_for_status, map_exception: hata eşleyici (Türkçe mesajlı WeatherError)
+- build_weather_response: dönüştürücü (Türkçe mesaj, serileştirilmiş gövde)
+
+Aşamalar HTTP çatısından bağımsızdır; hatalar WeatherError olarak yükselir
+ve her uygulama bunu kendi hata biçimine çevirir. Async mod, upstream ve
+önbellek aşamalarının engellemeyen sürümlerini kullanan bir alt sınıf
+tanımlar; doğrulama, hata eşleme ve dönüştürme aynen paylaşılır.
+"""
+
+import asyncio
+import math
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from flask_restx import Model, fields, marshal
+
+from weather_cache import weather_cache, negative_cache, make_key, CACHE_SOFT_TTL, SHARED_CACHE
+from singleflight import weather_singleflight
+from upstream import upstream_client, parse_retry_after
+from quota import QuotaExceededError
+from circuit_breaker import CircuitOpenError
+from admission import weather_admission, AdmissionRejected
+from metrics import metrics
+from city_resolver import city_resolver
+from city_names import alias_index
+from city_locator import city_locator
+from cache_warmer import CacheWarmer, WARMER_CITIES, parse_city_list
+from conditional import stamp
+from serialization import dumps
+from compression import precompress
+from forecast import (ForecastSeries, FORECAST_FIELDS, forecast_cache, city_summary, parse_fields,
+                      store_value, load_value)
+
+# Bayat kayıtları arka planda yenilemek için iş parçacığı sayısı
+REFRESH_MAX_WORKERS = int(os.getenv('REFRESH_MAX_WORKERS', 4))
+
+# Kullanıcıya dönen Türkçe hata mesajları
+INVALID_CITY_MESSAGE = 'Lütfen geçerli bir şehir ismi giriniz.'
+INVALID_COORDS_MESSAGE = 'Lütfen geçerli bir enlem (-90..90) ve boylam (-180..180) giriniz.'
+LOCATION_NOT_FOUND_MESSAGE = 'Bu konum için hava durumu bulunamadı.'
+INVALID_WINDOW_MESSAGE = 'Lütfen geçerli bir zaman penceresi giriniz (start, end: Unix zamanı; hours: pozitif saat).'
+QUOTA_MESSAGE = "Hava durumu servisi kotası doldu. Lütfen daha sonra tekrar deneyin."
+CIRCUIT_MESSAGE = "Hava durumu servisi geçici olarak kullanılamıyor. Lütfen daha sonra tekrar deneyin."
+OVERLOAD_MESSAGE = "Hava durumu servisi şu anda yoğun. Lütfen daha sonra tekrar deneyin."
+TIMEOUT_MESSAGE = "Hava durumu servisi yanıt vermiyor. Lütfen daha sonra tekrar deneyin."
+CONNECTION_MESSAGE = "İnternet bağlantısı sorunu. Lütfen bağlantınızı kontrol edin."
+INVALID_KEY_MESSAGE = "API anahtarı geçersiz."
+
+# Zaman aşımı ve bağlantı hatası sayılan istemci istisnaları
+TIMEOUT_ERRORS = (requests.exceptions.Timeout, asyncio.TimeoutError)
+CONNECTION_ERRORS = (requests.exceptions.ConnectionError,)
+
+# Yanıt modelleri (dönüştürücü gövdeyi bu modelle doğrular; Swagger'a uygulamalar kaydeder)
+weather_details = Model('WeatherDetails', {
+    'temperature': fields.Integer(description='Sıcaklık (°C)', example=18),
+    'feels_like': fields.Integer(description='Hissedilen sıcaklık (°C)', example=17),
+    'humidity': fields.Integer(description='Nem oranı (%)', example=63),
+    'wind_speed_kmh': fields.Float(description='Rüzgar hızı (km/h)', example=18.5),
+    'description': fields.String(description='Hava durumu açıklaması', example='Parçalı Az Bulutlu'),
+    'icon': fields.String(description='Hava durumu ikonu kodu', example='03d')
+})
+
+weather_response = Model('WeatherResponse', {
+    'success': fields.Boolean(description='İşlem başarı durumu', example=True),
+    'city': fields.String(description='Şehir adı', example='İstanbul'),
+    'country': fields.String(description='Ülke kodu', example='TR'),
+    'message': fields.String(description='Türkçe hava durumu mesajı'),
+    'details': fields.Nested(weather_details, description='Detaylı hava durumu bilgileri')
+})
+
+
+class WeatherError(Exception):
+    """HTTP durum kodu ve Türkçe mesaj taşıyan hata (api.abort karşılığı)"""
+
+    def __init__(self, status, message, retry_after=None):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.retry_after = retry_after
+
+
+def not_found_message(city):
+    """Bulunamayan şehir için Türkçe hata mesajı"""
+    return f"'{city}' şehri bulunamadı. Lütfen şehir ismini kontrol edin."
+
+
+def clean_city(city):
+    """Şehir ismini temizle; geçersizse 400 WeatherError"""
+    city = city.strip() if isinstance(city, str) else ''
+    if len(city) < 2:
+        raise WeatherError(400, INVALID_CITY_MESSAGE)
+    return city
+
+
+def clean_coords(lat, lon):
+    """Enlem ve boylamı doğrula; geçersizse 400 WeatherError"""
+    try:
+        lat, lon = float(lat), float(lon)
+    except (TypeError, ValueError):
+        raise WeatherError(400, INVALID_COORDS_MESSAGE)
+    if not (math.isfinite(lat) and math.isfinite(lon) and -90 <= lat <= 90 and -180 <= lon <= 180):
+        raise WeatherError(400, INVALID_COORDS_MESSAGE)
+    return lat, lon
+
+
+def cell_key(cell, units='metric', lang='tr'):
+    """Yakınında bilinen şehir olmayan ızgara hücresinin önbellek anahtarı"""
+    return f"@{cell[0]}:{cell[1]}|{units}|{lang}"
+
+
+def clean_forecast_query(fields=None, start=None, end=None, hours=None):
+    """Tahmin sorgusunun alan listesi ve zaman penceresini doğrula; geçersizse 400 WeatherError"""
+    try:
+        fields = parse_fields(fields)
+    except ValueError as e:
+        raise WeatherError(400, f"Geçersiz alan: '{e}'. Geçerli alanlar: {', '.join(FORECAST_FIELDS)}")
+    try:
+        start, end, hours = (None if value in (None, '') else int(value) for value in (start, end, hours))
+    except (TypeError, ValueError):
+        raise WeatherError(400, INVALID_WINDOW_MESSAGE)
+    if hours is not None and hours <= 0:
+        raise WeatherError(400, INVALID_WINDOW_MESSAGE)
+    return fields, start, end, hours
+
+
+def build_forecast_response(series, fields=FORECAST_FIELDS, start=None, end=None, hours=None):
+    """Serinin [start, end) penceresindeki noktalarını seçilen alanlarla döndür
+
+    `hours` verilirse pencere start'tan (yoksa ilk tahmin noktasından)
+    itibaren o kadar saatle sınırlanır.
+    """
+    if hours is not None:
+        base = start if start is not None else (series.times[0] if len(series) else 0)
+        end = base + hours * 3600 if end is None else min(end, base + hours * 3600)
+    lo, hi = series.window(start, end)
+    return {
+        'success': True,
+        'city': series.city,
+        'country': series.country,
+        'count': hi - lo,
+        'forecast': series.rows(lo, hi, fields)
+    }
+
+
+def upstream_params(api_key, **query):
+    """OpenWeather sorgu parametreleri (metrik birimler, Türkçe açıklamalar)"""
+    return dict(query, appid=api_key, units='metric', lang='tr')
+
+
+def raise_for_status(response, city):
+    """Başarısız upstream yanıtını WeatherError'a çevir"""
+    if response.status_code == 200:
+        return
+    if response.status_code == 404:
+        raise WeatherError(404, not_found_message(city))
+    if response.status_code == 429:
+        retry_after = parse_retry_after(response.headers.get('Retry-After'))
+        raise WeatherError(503, QUOTA_MESSAGE, retry_after=retry_after or 0)
+    if response.status_code == 401:
+        raise WeatherError(500, INVALID_KEY_MESSAGE)
+    raise WeatherError(500, f"Hava durumu servisi hatası: {response.status_code}")
+
+
+def map_exception(error, timeout_errors=TIMEOUT_ERRORS, connection_errors=CONNECTION_ERRORS):
+    """Servis hattında oluşan istisnayı WeatherError'a çevir
+
+    Kota, devre kesici ve kabul kontrolü reddi upstream'e gidilmeden dönen
+    Retry-After'lı 503'lerdir.
+    """
+    if isinstance(error, WeatherError):
+        return error
+    if isinstance(error, QuotaExceededError):
+        return WeatherError(503, QUOTA_MESSAGE, retry_after=error.retry_after or 0)
+    if isinstance(error, CircuitOpenError):
+        return WeatherError(503, CIRCUIT_MESSAGE, retry_after=error.retry_after or 0)
+    if isinstance(error, AdmissionRejected):
+        return WeatherError(503, OVERLOAD_MESSAGE, retry_after=error.retry_after or 0)
+    if isinstance(error, timeout_errors):
+        return WeatherError(504, TIMEOUT_MESSAGE)
+    if isinstance(error, connection_errors):
+        return WeatherError(503, CONNECTION_MESSAGE)
+    return WeatherError(500, f"Beklenmeyen bir hata oluştu: {str(error)}")
+
+
+def build_weather_response(data):
+    """OpenWeather yanıtından Türkçe WeatherResponse sözlüğünü oluştur"""
+    # Hava durumu bilgilerini çıkar
+    weather_desc = data['weather'][0]['description'].title()
+    temp = round(data['main']['temp'])
+    humidity = data['main']['humidity']
+    wind_speed = round(data['wind']['speed'] * 3.6, 1)  # m/s'den km/h'ye çevir
+    feels_like = round(data['main']['feels_like'])
+
+    # Şehir ismini düzelt (API'den gelen doğru isim)
+    city_name = data['name']
+    country = data['sys']['country']
+
+    # Türkçe yanıt oluştur
+    message = (f"{city_name} ({country})'da hava sıcaklığı {temp}°C "
+              f"(hissedilen {feels_like}°C), nem oranı %{humidity}, "
+              f"rüzgar hızı {wind_speed} km/h ve hava durumu: {weather_desc}.")
+
+    result = {
+        "success": True,
+        "city": city_name,
+        "country": country,
+        "message": message,
+        "details": {
+            "temperature": temp,
+            "feels_like": feels_like,
+            "humidity": humidity,
+            "wind_speed_kmh": wind_speed,
+            "description": weather_desc,
+            "icon": data['weather'][0]['icon']
+        }
+    }
+
+    # Doğrulanmış yanıt önbelleğe girmeden bir kez serileştirilir ve sıkıştırılır (hızlı yol);
+    # ETag ve Last-Modified için gözlem zamanı (`dt`) sonuca özel alan olarak eklenir
+    return precompress(stamp(result, data.get('dt'), dumps(marshal(result, weather_response))))
+
+
+class WeatherService:
+    """Önbellek, istek birleştirme ve upstream aşamalarını birleştiren senkron servis hattı"""
+
+    timeout_errors = TIMEOUT_ERRORS
+    connection_errors = CONNECTION_ERRORS
+
+    def __init__(self, api_key=None, client=upstream_client, cache=weather_cache,
+                 negative=negative_cache, singleflight=weather_singleflight,
+                 admission=weather_admission, locator=city_locator, forecasts=forecast_cache,
+                 refresh_workers=REFRESH_MAX_WORKERS):
+        self.api_key = api_key or os.getenv('OPENWEATHER_API_KEY')
+        self.client = client
+        self.cache = cache
+        self.negative = negative
+        self.singleflight = singleflight
+        self.admission = admission
+        self.locator = locator
+        self.forecasts = forecasts
+        # Sıklık skorları için ısıtıcı (uygulama atar)
+        self.warmer = None
+        self.refresh_workers = refresh_workers
+        self._refresh_executor = None
+        self._refreshing = set()
+        self._refreshing_lock = threading.Lock()
+
+    def get(self, city, cache_info=None):
+        """Şehir için hava durumunu önbellekten ya da OpenWeather'dan getir
+
+        Taze kayıtlar doğrudan sunulur. Yumuşak TTL içindeki bayat kayıtlar
+        hemen sunulur ve arka planda yenilenir. Sert TTL içindeki bayat kayıtlar
+        ise yalnızca upstream hata verdiğinde sunulur.
+
+        Aynı şehir için eşzamanlı gelen istekler tek bir upstream çağrısında
+        birleştirilir; bekleyen tüm istekler aynı sonucu veya hatayı alır.
+        Önbellek durumu (status, age) verilen `cache_info` sözlüğüne yazılır.
+        """
+        cache_info = {} if cache_info is None else cache_info
+        city = clean_city(city)
+        cache_key = make_key(city)
+        entry, value = self.lookup(city, cache_key, cache_info)
+        if value is not None:
+            return value
+
+        try:
+            result = self.singleflight.do(cache_key, lambda: self.fetch(city, cache_key))
+        except WeatherError as e:
+            return self.serve_stale(entry, e, cache_info)
+
+        self.mark_cache(cache_info, 'MISS')
+        return result
+
+    def get_by_coords(self, lat, lon, cache_info=None):
+        """Koordinat için hava durumunu en yakın bilinen şehrin kaydından getir
+
+        GEO_MAX_DISTANCE_KM içinde bilinen bir şehir varsa istek o şehrin
+        sorgusuna dönüşür ve isimle yapılan sorgularla aynı önbellek kaydını
+        paylaşır. Yoksa koordinat ızgara hücresine yuvarlanır ve hücre merkezi
+        için tek bir upstream çağrısı yapılır; dönen şehir hücreye bağlanır.
+        """
+        cache_info = {} if cache_info is None else cache_info
+        city, cell = self.locate(lat, lon)
+        if city is not None:
+            return self.get(city, cache_info)
+
+        key = cell_key(cell)
+        entry = self.cache.get_entry(key)
+        if entry is not None and entry.fresh:
+            self.mark_cache(cache_info, 'HIT', entry.age)
+            return entry.value
+
+        try:
+            result = self.singleflight.do(key, lambda: self.fetch_cell(cell, key))
+        except WeatherError as e:
+            return self.serve_stale(entry, e, cache_info)
+
+        self.mark_cache(cache_info, 'MISS')
+        return result
+
+    def locate(self, lat, lon):
+        """Koordinatı doğrula; (en yakın şehir, None) ya da (None, ızgara hücresi) döndür"""
+        lat, lon = clean_coords(lat, lon)
+        city = self.locator.nearest(lat, lon)
+        if city is not None:
+            metrics.inc('geo_lookups_total', result='city')
+            return city, None
+        metrics.inc('geo_lookups_total', result='cell')
+        return None, self.locator.cell(lat, lon)
+
+    def lookup(self, city, cache_key, cache_info):
+        """Önbellek aşaması: (kayıt, sunulacak değer); upstream'e gidilecekse değer None
+
+        Kısa süre önce bulunamayan şehir için upstream'e tekrar gidilmez.
+        """
+        if self.warmer is not None:
+            self.warmer.record(cache_key, city)
+        entry = self.cache.get_entry(cache_key)
+        if entry is not None:
+            if entry.fresh:
+                self.mark_cache(cache_info, 'HIT', entry.age)
+                return entry, entry.value
+            if entry.age < CACHE_SOFT_TTL:
+                self.refresh_in_background(city, cache_key)
+                self.mark_cache(cache_info, 'STALE', entry.age)
+                return entry, entry.value
+
+        if entry is None and self.negative.get(cache_key) is not None:
+            self.mark_cache(cache_info, 'HIT')
+            raise WeatherError(404, not_found_message(city))
+        return entry, None
+
+    def serve_stale(self, entry, error, cache_info):
+        """Upstream hatasında (5xx) eldeki bayat veriyi sun; yoksa hatayı ilet"""
+        if entry is not None and error.status >= 500:
+            self.mark_cache(cache_info, 'STALE', entry.age)
+            return entry.value
+        raise error
+
+    def mark_cache(self, cache_info, status, age=0):
+        """İsteğin önbellek durumunu yanıt başlıkları ve metrikler için kaydet"""
+        metrics.inc('cache_lookups_total', result=status.lower())
+        cache_info.update(status=status, age=age)
+
+    def fetch(self, city, cache_key, background=False):
+        """Upstream aşaması: OpenWeather'dan veriyi al, dönüştür ve önbelleğe yaz
+
+        `background` çağrıları (SWR yenilemesi, ısıtıcı) kota bütçesinde
+        kullanıcı isteklerinin gerisinde kalır ve kabul kontrolünde kuyrukta
+        beklemez.
+        """
+        try:
+            # Eşzamanlı upstream çağrıları sınırlıdır; kapasite doluysa kısa bir kuyrukta beklenir
+            with self.admission.slot(background=background):
+                response = self.client.get('weather', params=upstream_params(self.api_key, q=city),
+                                           background=background)
+            return self.accept(city, cache_key, response)
+        except Exception as e:
+            raise map_exception(e, self.timeout_errors, self.connection_errors)
+
+    def fetch_cell(self, cell, key):
+        """Izgara hücresinin merkezi için upstream'e koordinatla sor
+
+        Yanıt bir şehir adı taşıyorsa kayıt o şehrin anahtarı altında tutulur
+        (hücre şehre bağlanır); isimsiz konumlar hücre anahtarı altında tutulur.
+        """
+        lat, lon = self.locator.cell_center(cell)
+        try:
+            with self.admission.slot():
+                response = self.client.get('weather', params=upstream_params(self.api_key, lat=lat, lon=lon))
+            return self.accept_cell(cell, key, response)
+        except Exception as e:
+            raise map_exception(e, self.timeout_errors, self.connection_errors)
+
+    def accept_cell(self, cell, key, response):
+        """Hücre merkezi yanıtını doğrula, hücreyi dönen şehre bağla ve sakla"""
+        if response.status_code == 404:
+            raise WeatherError(404, LOCATION_NOT_FOUND_MESSAGE)
+        raise_for_status(response, key)
+
+        data = response.json()
+        city = self.locator.learn_response(data, cell)
+        if city is None:
+            result = build_weather_response(data)
+            self.cache.set(key, result)
+            return result
+        return self.store(city, make_key(city), data)
+
+    def accept(self, city, cache_key, response):
+        """Upstream yanıtını doğrula ve sakla"""
+        if response.status_code == 404:
+            self.negative.set(cache_key, True)
+        raise_for_status(response, city)
+        return self.store(city, cache_key, response.json())
+
+    def store(self, city, cache_key, data):
+        """OpenWeather verisini Türkçe yanıta dönüştür ve kanonik anahtar altında sakla"""
+        result = build_weather_response(data)
+
+        # Sorgunun kanonik kimliğini ("istanbul,tr"), /group için şehir ID'sini
+        # ve koordinat sorguları için şehrin konumunu öğren
+        alias_index.learn(city, data)
+        city_resolver.learn_response(city, data)
+        self.locator.learn_response(data)
+
+        # Kayıt kanonik anahtar altında tutulur; farklı yazımlar aynı kaydı paylaşır
+        canonical_key = make_key(city)
+        self.cache.set(canonical_key, result)
+        if SHARED_CACHE and canonical_key != cache_key:
+            # Diğer worker'lar bu yazımın kanonik kimliğini henüz öğrenmemiş olabilir
+            self.cache.set(cache_key, result)
+        return result
+
+    def fetch_group(self, chunk):
+        """ID'leri bilinen en fazla 20 şehri tek bir /group çağrısıyla getir
+
+        `chunk` (anahtar, şehir, şehir_id) üçlülerinden oluşur. Yanıtta bulunan
+        şehirler önbelleğe yazılır ve anahtar -> yanıt sözlüğü olarak döndürülür;
+        eksik kalan şehirler çağıran tarafından tek tek sorgulanır.
+        """
+        params = upstream_params(self.api_key, id=','.join(str(city_id) for _, _, city_id in chunk))
+
+        # Kota yoksa QuotaExceededError, kapasite doluysa AdmissionRejected yükselir;
+        # şehirler tek tek (önbellek/503) ele alınır
+        with self.admission.slot():
+            response = self.client.get('group', params=params)
+        return self.accept_group(chunk, response)
+
+    def accept_group(self, chunk, response):
+        """/group yanıtındaki şehirleri dönüştür ve önbelleğe yaz"""
+        if response.status_code != 200:
+            return {}
+
+        by_id = {item.get('id'): item for item in response.json().get('list', [])}
+
+        results = {}
+        for key, _, city_id in chunk:
+            data = by_id.get(city_id)
+            if data is None:
+                continue
+            result = build_weather_response(data)
+            self.locator.learn_response(data)
+            self.cache.set(key, result)
+            results[key] = result
+        return results
+
+    def get_forecast(self, city, cache_info=None):
+        """Şehir için 5 günlük / 3 saatlik tahmin serisini (ForecastSeries) getir
+
+        Seriler ayrı bir önbellekte sütunlu tutulur; upstream hata verirse
+        sert TTL içindeki bayat seri sunulur. Bulunamayan şehirler hava durumu
+        sorgularıyla aynı negatif önbelleği paylaşır.
+        """
+        cache_info = {} if cache_info is None else cache_info
+        city = clean_city(city)
+        cache_key = make_key(city)
+        entry, series = self.lookup_forecast(city, cache_key, cache_info)
+        if series is not None:
+            return series
+
+        try:
+            series = self.singleflight.do(f"forecast:{cache_key}", lambda: self.fetch_forecast(city, cache_key))
+        except WeatherError as e:
+            return load_value(self.serve_stale(entry, e, cache_info))
+
+        self.mark_cache(cache_info, 'MISS')
+        return series
+
+    def lookup_forecast(self, city, cache_key, cache_info):
+        """Tahmin önbelleği aşaması: (kayıt, sunulacak seri); upstream'e gidilecekse seri None"""
+        entry = self.forecasts.get_entry(cache_key)
+        if entry is not None and entry.fresh:
+            self.mark_cache(cache_info, 'HIT', entry.age)
+            return entry, load_value(entry.value)
+        if entry is None and self.negative.get(cache_key) is not None:
+            self.mark_cache(cache_info, 'HIT')
+            raise WeatherError(404, not_found_message(city))
+        return entry, None
+
+    def fetch_forecast(self, city, cache_key):
+        """OpenWeather /forecast çağrısı; seri sütunlara çevrilip önbelleğe yazılır"""
+        try:
+            with self.admission.slot():
+                response = self.client.get('forecast', params=upstream_params(self.api_key, q=city))
+            return self.accept_forecast(city, cache_key, response)
+        except Exception as e:
+            raise map_exception(e, self.timeout_errors, self.connection_errors)
+
+    def accept_forecast(self, city, cache_key, response):
+        """/forecast yanıtını doğrula, sütunlu seriye çevir ve kanonik anahtar altında sakla"""
+        if response.status_code == 404:
+            self.negative.set(cache_key, True)
+        raise_for_status(response, city)
+
+        data = response.json()
+        series = ForecastSeries.from_response(data)
+
+        summary = city_summary(data)
+        alias_index.learn(city, summary)
+        city_resolver.learn_response(city, summary)
+        self.locator.learn_response(summary)
+
+        canonical_key = make_key(city)
+        value = store_value(series)
+        self.forecasts.set(canonical_key, value)
+        if SHARED_CACHE and canonical_key != cache_key:
+            self.forecasts.set(cache_key, value)
+        return series
+
+    def refresh_in_background(self, city, cache_key):
+        """Bayat kaydı isteği bekletmeden arka planda yenile"""
+        with self._refreshing_lock:
+            if cache_key in self._refreshing:
+                return
+            self._refreshing.add(cache_key)
+            if self._refresh_executor is None:
+                self._refresh_executor = ThreadPoolExecutor(max_workers=self.refresh_workers,
+                                                            thread_name_prefix='weather-refresh')
+
+        def refresh():
+            try:
+                self.warm(city, cache_key)
+            except Exception:
+                # Yenileme başarısızsa bayat kayıt sert TTL dolana kadar kullanılmaya devam eder
+                pass
+            finally:
+                with self._refreshing_lock:
+                    self._refreshing.discard(cache_key)
+
+        self._refresh_executor.submit(refresh)
+
+    def warm(self, city, cache_key):
+        """Şehri arka plan önceliğiyle yeniden getir (eşzamanlı isteklerle birleştirilir)"""
+        return self.singleflight.do(cache_key, lambda: self.fetch(city, cache_key, background=True))
+
+
+weather_service = WeatherService()
+
+# Popüler şehirleri ve sabit ısıtma listesini süreleri dolmadan yenileyen ısıtıcı
+# (uygulama WARMER_ENABLED ise başlatır)
+cache_warmer = CacheWarmer(weather_cache, weather_service.warm, make_key, negative_cache=negative_cache,
+                           static_cities=parse_city_list(WARMER_CITIES))
+weather_service.warmer = cache_warmer